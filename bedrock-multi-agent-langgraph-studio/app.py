@@ -1,7 +1,19 @@
 # app.py
-from fastapi import FastAPI, Request
+import asyncio
+import json
+import uuid
+from contextlib import aclosing, suppress
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from src.supervisor_agent.graph import run_supervisor_agent
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from src.supervisor_agent.graph import arun_supervisor_agent, astream_supervisor_agent
+# Same module the graphs record into (src/ is on the path for their own imports)
+from common.metrics import get_metrics_registry
+
+# Events buffered between the graph and a slow client before the graph is paused
+SSE_QUEUE_SIZE = 64
+# Idle seconds before a keep-alive comment (and a disconnect check)
+SSE_KEEPALIVE_SECONDS = 15
 
 app = FastAPI()
 app.add_middleware(
@@ -12,9 +24,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _user_id(body: dict) -> int | None:
+    """Return the request's user_id as the int the traveler Id column holds, or None if absent."""
+    user_id = body.get("user_id")
+    if user_id is None:
+        return None
+    if isinstance(user_id, int) and not isinstance(user_id, bool):
+        return user_id
+    if isinstance(user_id, str) and user_id.strip().isdigit():
+        return int(user_id)
+    raise HTTPException(status_code=400, detail="user_id must be an integer")
+
+
 @app.post("/chat")
 async def chat_endpoint(request: Request):
     body = await request.json()
     messages = body.get("messages", [])
-    result = run_supervisor_agent({"messages": messages})
-    return result
+    # Each conversation gets its own checkpoint thread; clients resend thread_id to continue it
+    thread_id = body.get("thread_id") or str(uuid.uuid4())
+    result = await arun_supervisor_agent(
+        {"messages": messages}, thread_id=thread_id, user_id=_user_id(body)
+    )
+    return {**result, "thread_id": thread_id}
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus text exposition format
+    return PlainTextResponse(get_metrics_registry().render(), media_type="text/plain; version=0.0.4")
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _sse_stream(request: Request, events, thread_id: str):
+    """Relay graph events to the client as SSE.
+
+    A bounded queue sits between the graph and the socket, so a slow reader
+    pauses the graph instead of growing a buffer. When the client goes away
+    the producer task is cancelled, which closes the graph stream and
+    cancels any in-flight model or tool call. The last event is ``done`` on
+    success and ``error`` on failure, never both.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+    finished = object()
+
+    async def produce():
+        try:
+            async with aclosing(events) as stream:
+                async for event in stream:
+                    await queue.put(event)
+        except Exception as e:
+            await queue.put({"event": "error", "message": str(e)})
+        await queue.put(finished)
+
+    producer = asyncio.create_task(produce())
+    try:
+        yield _sse("start", {"thread_id": thread_id})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event is finished:
+                yield _sse("done", {})
+                break
+            yield _sse(event["event"], event)
+            if event["event"] == "error":
+                break
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    thread_id = body.get("thread_id") or str(uuid.uuid4())
+    events = astream_supervisor_agent(
+        {"messages": messages}, thread_id=thread_id, user_id=_user_id(body)
+    )
+    return StreamingResponse(
+        _sse_stream(request, events, thread_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,146 @@
+"""Concurrency and streaming check for /chat and /chat/stream against a stub LLM.
+
+Replaces every Bedrock-backed chain with a stub that sleeps for a fixed
+latency and serves the FastAPI app with uvicorn on a local port. Then:
+
+- times N concurrent /chat requests against one (the overlap itself is
+  asserted by tests/test_async_chat.py);
+- measures time-to-first-byte and first routing event on /chat/stream;
+- disconnects a /chat/stream client mid-run and checks the graph stops.
+
+Usage:
+    python benchmarks/bench_async_chat.py [--requests 10] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+# Compile graphs without a checkpointer so concurrent requests do not share a thread
+os.environ.setdefault("env", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from app import app  # noqa: E402
+
+WORKFLOW = ["destination_agent", "flight_agent", "hotel_agent"]
+PORT = 8765
+model_calls = 0
+
+
+def stub_chain(respond, latency: float) -> RunnableLambda:
+    def invoke(state):
+        global model_calls
+        model_calls += 1
+        time.sleep(latency)
+        return respond(state)
+
+    async def ainvoke(state):
+        global model_calls
+        model_calls += 1
+        await asyncio.sleep(latency)
+        return respond(state)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def install_stubs(latency: float):
+    supervisor = sys.modules["src.supervisor_agent.graph"]
+
+    def route(state):
+        done = {getattr(m, "name", None) for m in state["messages"]}
+        return supervisor.routeResponse(next=next((m for m in WORKFLOW if m not in done), "FINISH"))
+
+    supervisor.supervisor_chain = stub_chain(route, latency)
+    sys.modules["destination_agent.graph"].destination_agent_chain = stub_chain(
+        lambda state: AIMessage(content="We recommend visiting Lisbon."), latency
+    )
+    sys.modules["flight_agent.graph"].flight_agent_chain = stub_chain(
+        lambda state: AIMessage(content="Flight AirEurope 09:10 FINISHED"), latency
+    )
+    # The hotel stub streams its answer token by token
+    hotel_model = GenericFakeChatModel(
+        messages=iter(AIMessage(content="City Hotel Lisbon, 3 nights FINISHED") for _ in iter(int, 1))
+    )
+    sys.modules["hotel_agent.graph"].runnable_with_tools = (
+        stub_chain(lambda state: state["messages"], latency) | hotel_model
+    )
+
+
+REQUEST = {"messages": [{"role": "user", "content": "Plan a trip for me"}]}
+
+
+async def chat(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    response = await client.post("/chat", json=REQUEST)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def stream(client: httpx.AsyncClient, stop_after: str | None = None) -> dict:
+    """Read /chat/stream, returning when each event type was first seen (seconds)."""
+    start = time.perf_counter()
+    first_seen = {}
+    async with client.stream("POST", "/chat/stream", json=REQUEST) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line.removeprefix("event: ")
+                first_seen.setdefault(event, time.perf_counter() - start)
+                if event == stop_after:
+                    break
+    return first_seen
+
+
+async def main(requests: int, latency: float) -> bool:
+    install_stubs(latency)
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=None) as client:
+        calls_before = model_calls
+        single = await chat(client)
+        calls_per_request = model_calls - calls_before
+        start = time.perf_counter()
+        await asyncio.gather(*(chat(client) for _ in range(requests)))
+        wall = time.perf_counter() - start
+
+        streamed = await stream(client)
+
+        # Disconnect after the first member finishes; no model calls should follow
+        await stream(client, stop_after="agent")
+        await asyncio.sleep(latency / 2)
+        calls_at_disconnect = model_calls
+        await asyncio.sleep(latency * 4)
+        calls_after = model_calls - calls_at_disconnect
+
+    server.should_exit = True
+    await serving
+
+    print(f"stub LLM latency {latency * 1e3:.0f} ms, {calls_per_request} model calls per request")
+    print(f"  one /chat request    : {single:6.2f} s")
+    print(f"  {f'{requests} concurrent':<21}: {wall:6.2f} s wall")
+    print(f"  serialized estimate  : {single * requests:6.2f} s")
+    print("  /chat/stream first   : " + ", ".join(f"{e} {t:.2f}s" for e, t in streamed.items()))
+    cancelled = calls_after == 0
+    print(f"  model calls after disconnect: {calls_after} ({'cancelled' if cancelled else 'NOT cancelled'})")
+    return "token" in streamed and cancelled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.requests, args.latency)) else 1)
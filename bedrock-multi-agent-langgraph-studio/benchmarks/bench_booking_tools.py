@@ -0,0 +1,99 @@
+"""Booking tool throughput: connection-per-call vs the pooled BookingsDB.
+
+Runs a retrieve/change/cancel-shaped mix against a scratch copy of
+travel_bookings.db, single-threaded and from a thread pool.
+
+Usage:
+    python benchmarks/bench_booking_tools.py [--db data/travel_bookings.db] [--calls 5000] [--threads 8]
+"""
+
+import argparse
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from common.bookings_db import BookingsDB  # noqa: E402
+
+DEFAULT_DB = Path(__file__).resolve().parents[2] / "data" / "travel_bookings.db"
+
+
+def legacy_call(path: str, op: str, booking_id: int):
+    """The pre-pool pattern: open, run one statement, commit, close."""
+    with closing(sqlite3.connect(path, timeout=10.0)) as conn:
+        with closing(conn.cursor()) as cursor:
+            if op == "retrieve":
+                cursor.execute("SELECT * FROM flight_bookings WHERE booking_id = ?", (booking_id,))
+                return cursor.fetchone()
+            if op == "change":
+                cursor.execute(
+                    "UPDATE flight_bookings SET departure_date = ? WHERE booking_id = ?",
+                    ("2025-01-01", booking_id),
+                )
+            else:
+                cursor.execute("SELECT * FROM hotel_bookings WHERE booking_id=?", (booking_id,))
+            conn.commit()
+            return cursor.rowcount
+
+
+def pooled_call(db: BookingsDB, op: str, booking_id: int):
+    if op == "retrieve":
+        return db.fetch_one("SELECT * FROM flight_bookings WHERE booking_id = ?", (booking_id,))
+    if op == "change":
+        return db.execute(
+            "UPDATE flight_bookings SET departure_date = ? WHERE booking_id = ?",
+            ("2025-01-01", booking_id),
+        )
+    return db.fetch_one("SELECT * FROM hotel_bookings WHERE booking_id=?", (booking_id,))
+
+
+def workload(calls: int, seed: int = 3):
+    rng = random.Random(seed)
+    # Mostly reads, like agent traffic
+    return [(rng.choices(["retrieve", "change", "hotel"], [6, 1, 3])[0], rng.randint(1, 1000)) for _ in range(calls)]
+
+
+def run(fn, ops, threads: int) -> float:
+    start = time.perf_counter()
+    if threads == 1:
+        for op, booking_id in ops:
+            fn(op, booking_id)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(lambda item: fn(*item), ops))
+    return len(ops) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "travel_bookings.db")
+        shutil.copy(args.db, path)
+        ops = workload(args.calls)
+        db = BookingsDB(path)
+
+        print(f"{args.calls} calls against a copy of {args.db}")
+        for threads in (1, args.threads):
+            legacy = run(lambda op, b: legacy_call(path, op, b), ops, threads)
+            pooled = run(lambda op, b: pooled_call(db, op, b), ops, threads)
+            print(
+                f"  threads={threads:<3} connect-per-call {legacy:10,.0f} calls/s   "
+                f"pooled {pooled:10,.0f} calls/s   ({pooled / legacy:.1f}x)"
+            )
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Checkpointer write/resume latency: MemorySaver vs pickle file vs SQLite.
+
+Drives a small messages graph through multi-turn conversations (each turn adds
+a user message, a tool result and an AI reply) and measures the time per turn,
+the time to resume a thread from a freshly opened store (as after a restart)
+and the size on disk. The pickle baseline dumps the whole saver to one file
+after every turn, as the ``langgraph dev`` in-memory runtime does.
+
+Usage:
+    python benchmarks/bench_checkpointer.py [--threads 50] [--turns 10] [--payload 4000]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, MessagesState, StateGraph
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from common.sqlite_checkpoint import SQLiteCheckpointSaver  # noqa: E402
+
+# Realistic, compressible text for tool payloads
+CORPUS = (Path(__file__).resolve().parent.parent / "README.md").read_text().split()
+
+
+class PickleFileSaver(MemorySaver):
+    """MemorySaver persisted by pickling all of its state to one file."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                storage, writes, blobs = pickle.load(f)
+            for thread_id, namespaces in storage.items():
+                self.storage[thread_id].update(namespaces)
+            self.writes.update(writes)
+            self.blobs.update(blobs)
+
+    def flush(self):
+        # The default factories are lambdas, so pickle plain dict copies
+        state = (
+            {thread_id: dict(namespaces) for thread_id, namespaces in self.storage.items()},
+            {key: dict(writes) for key, writes in self.writes.items()},
+            dict(self.blobs),
+        )
+        with open(self.path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def build_graph(checkpointer, payload: int, seed: int = 5):
+    rng = random.Random(seed)
+
+    def agent(state):
+        text = " ".join(rng.choices(CORPUS, k=payload // 6))[:payload]
+        return {
+            "messages": [
+                AIMessage("", tool_calls=[{"name": "travel_guide", "args": {"query": "x"}, "id": "call"}]),
+                ToolMessage(text, tool_call_id="call"),
+                AIMessage(text[: payload // 4]),
+            ]
+        }
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("agent", agent)
+    builder.add_edge(START, "agent")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def config(thread: int) -> dict:
+    return {"configurable": {"thread_id": f"thread-{thread}"}}
+
+
+def run(name: str, make_saver, reopen, args, flush=None):
+    saver = make_saver()
+    graph = build_graph(saver, args.payload)
+    turn_times = []
+    for turn in range(args.turns):
+        for thread in range(args.threads):
+            start = time.perf_counter()
+            graph.invoke({"messages": [("user", f"turn {turn}")]}, config(thread))
+            if flush:
+                flush(saver)
+            turn_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    fresh = reopen(saver)
+    open_s = time.perf_counter() - start
+    resume_times = []
+    sample = random.Random(1).sample(range(args.threads), min(20, args.threads))
+    for thread in sample:
+        start = time.perf_counter()
+        state = build_graph(fresh, args.payload).get_state(config(thread))
+        resume_times.append(time.perf_counter() - start)
+        assert len(state.values["messages"]) == args.turns * 4, name
+
+    return {
+        "name": name,
+        "turn_ms": statistics.median(turn_times) * 1e3,
+        "turn_p95_ms": sorted(turn_times)[int(len(turn_times) * 0.95)] * 1e3,
+        "open_ms": open_s * 1e3,
+        "resume_ms": statistics.median(resume_times) * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--payload", type=int, default=4000, help="tool result size in characters")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "checkpoints.pckl")
+        sqlite_path = os.path.join(tmp, "checkpoints.db")
+        results = [
+            run("MemorySaver", MemorySaver, lambda saver: saver, args),
+            run(
+                "pickle file",
+                lambda: PickleFileSaver(pickle_path),
+                lambda saver: PickleFileSaver(pickle_path),
+                args,
+                flush=PickleFileSaver.flush,
+            ),
+            run(
+                "SQLite",
+                lambda: SQLiteCheckpointSaver(sqlite_path),
+                lambda saver: SQLiteCheckpointSaver(sqlite_path),
+                args,
+            ),
+        ]
+        sizes = {
+            "MemorySaver": None,
+            "pickle file": os.path.getsize(pickle_path),
+            "SQLite": SQLiteCheckpointSaver(sqlite_path).file_size(),
+        }
+
+    codec = SQLiteCheckpointSaver(":memory:").serde.codec
+    print(f"{args.threads} threads x {args.turns} turns, {args.payload}-char tool results, SQLite codec {codec}")
+    print(f"  {'':<12} {'turn p50':>10} {'turn p95':>10} {'reopen':>10} {'resume':>10} {'on disk':>10}")
+    for r in results:
+        size = sizes[r["name"]]
+        print(
+            f"  {r['name']:<12} {r['turn_ms']:8.2f}ms {r['turn_p95_ms']:8.2f}ms "
+            f"{r['open_ms']:8.2f}ms {r['resume_ms']:8.2f}ms "
+            f"{'-' if size is None else f'{size / 1e6:.1f} MB':>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
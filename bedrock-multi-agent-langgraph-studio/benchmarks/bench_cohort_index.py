@@ -0,0 +1,141 @@
+"""Parity check and microbenchmark for the destination cohort index.
+
+Compares ``CohortIndex.recommend`` against the original DataFrame/Counter
+implementation on the bundled traveler file and on synthetic travelers, and
+checks that ``recommend_destinations_bulk`` agrees with the index for every
+traveler.
+
+Usage:
+    python benchmarks/bench_cohort_index.py [--travelers 1000000] [--queries 200]
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from common.profiles import DEFAULT_TRAVEL_DATA_PATH, ProfileSnapshot  # noqa: E402
+from destination_agent.cohort import CohortIndex  # noqa: E402
+from destination_agent.tools import recommend_destinations_bulk  # noqa: E402
+
+CITIES = [
+    "Amsterdam", "Athens", "Barcelona", "Bergen", "Berlin", "Bratislava", "Brussels",
+    "Bucharest", "Budapest", "Copenhagen", "Dublin", "Edinburgh", "Florence", "Geneva",
+    "Helsinki", "Istanbul", "Krakow", "Lisbon", "Ljubljana", "London", "Lyon", "Madrid",
+    "Milan", "Munich", "Nice", "Oslo", "Paris", "Porto", "Prague", "Reykjavik", "Riga",
+    "Rome", "Seville", "Sofia", "Stockholm", "Tallinn", "Valencia", "Venice", "Vienna",
+    "Vilnius", "Warsaw", "Zagreb", "Zurich",
+]
+
+
+def legacy_recommend(df: pd.DataFrame, user_id) -> str | None:
+    """Reference: the pre-index implementation of compare_and_recommend_destination."""
+    user_data = df[df["Id"] == user_id].iloc[0]
+    current_location = user_data["Current_Location"]
+    age = user_data["Age"]
+    past_destinations = user_data["Past_Travel_Destinations"].split(", ")
+    similar_users = df[
+        (df["Current_Location"] == current_location)
+        & (df["Age"].between(age - 5, age + 5))
+    ]
+    destination_counts = Counter(
+        dest
+        for user_dests in similar_users["Past_Travel_Destinations"].str.split(", ")
+        for dest in user_dests
+    )
+    for dest in [current_location] + past_destinations:
+        if dest in destination_counts:
+            del destination_counts[dest]
+    if not destination_counts:
+        return None
+    return destination_counts.most_common(1)[0][0]
+
+
+def indexed_recommend(snapshot: ProfileSnapshot, index: CohortIndex, user_id) -> str | None:
+    user_data = snapshot.get(user_id)
+    location = user_data["Current_Location"]
+    return index.recommend(
+        location,
+        user_data["Age"],
+        [location] + user_data["Past_Travel_Destinations"].split(", "),
+    )
+
+
+def synthetic_travelers(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    cities = np.array(CITIES, dtype=object)
+    trips = rng.integers(1, 6, size=n)
+    picks = rng.integers(0, len(cities), size=int(trips.sum()))
+    splits = np.split(cities[picks], np.cumsum(trips)[:-1])
+    return pd.DataFrame(
+        {
+            "Id": np.arange(1, n + 1, dtype=np.float64),
+            "Current_Location": cities[rng.integers(0, len(cities), size=n)],
+            "Age": rng.integers(18, 81, size=n).astype(np.float64),
+            "Past_Travel_Destinations": [", ".join(s) for s in splits],
+        }
+    )
+
+
+def check(name: str, df: pd.DataFrame, user_ids) -> bool:
+    start = time.perf_counter()
+    snapshot = ProfileSnapshot(df, mtime_ns=None)
+    index = CohortIndex(snapshot.frame)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [legacy_recommend(df, u) for u in user_ids]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [indexed_recommend(snapshot, index, u) for u in user_ids]
+    indexed_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = recommend_destinations_bulk(snapshot)
+    bulk_s = time.perf_counter() - start
+    everyone = bulk["Id"].tolist()
+    bulk_mismatches = sum(
+        indexed_recommend(snapshot, index, u) != d
+        for u, d in zip(everyone, bulk["Recommended_Destination"])
+    )
+
+    mismatches = [(u, e, a) for u, e, a in zip(user_ids, expected, actual) if e != a]
+    n = len(user_ids)
+    print(f"[{name}] travelers={len(df):,} queries={n:,}")
+    print(f"  index build      : {build_s * 1e3:10.1f} ms")
+    print(f"  legacy per query : {legacy_s / n * 1e6:10.1f} us")
+    print(f"  indexed per query: {indexed_s / n * 1e6:10.1f} us  ({legacy_s / indexed_s:,.0f}x)")
+    print(f"  bulk, all users  : {bulk_s * 1e3:10.1f} ms  ({len(everyone):,} travelers)")
+    print(f"  parity           : {'OK' if not mismatches else f'{len(mismatches)} MISMATCHES'}")
+    for mismatch in mismatches[:10]:
+        print(f"    user={mismatch[0]} legacy={mismatch[1]} indexed={mismatch[2]}")
+    print(f"  bulk parity      : {'OK' if not bulk_mismatches else f'{bulk_mismatches} MISMATCHES'}")
+    return not mismatches and not bulk_mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--travelers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    ok = True
+    bundled = pd.read_csv(DEFAULT_TRAVEL_DATA_PATH)
+    bundled = bundled[bundled["Id"].notna()].reset_index(drop=True)
+    ok &= check("bundled", bundled, list(dict.fromkeys(bundled["Id"].astype(int))))
+
+    synthetic = synthetic_travelers(args.travelers)
+    sample = np.random.default_rng(1).choice(synthetic["Id"].to_numpy(), args.queries, replace=False)
+    ok &= check("synthetic", synthetic, [int(u) for u in sample])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
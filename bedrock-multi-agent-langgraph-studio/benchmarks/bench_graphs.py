@@ -0,0 +1,170 @@
+"""End-to-end graph benchmark against the offline Bedrock stand-in.
+
+Runs every prompt in data/examples.txt through ``run_supervisor_agent`` and
+through each sub-graph on its own, with ``BEDROCK_FAKE=1`` so the real
+prompts, tools, routing and compaction run while every model call is
+answered by ``common.fake_bedrock`` after ``--latency`` seconds. Reports, per
+target, wall time, LLM calls, tool time and peak Python memory, and, per
+graph node, call counts and latency. ``--json`` writes the numbers to a file
+so later changes can be compared against a baseline.
+
+Usage:
+    python benchmarks/bench_graphs.py [--latency 0.05] [--repeat 1] [--json baseline.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ["BEDROCK_FAKE"] = "1"
+os.environ.setdefault("env", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+EXAMPLES = Path(__file__).resolve().parents[2] / "data" / "examples.txt"
+TARGETS = ["supervisor", "destination_agent", "flight_agent", "hotel_agent"]
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    os.environ["BEDROCK_FAKE_LATENCY"] = str(args.latency)
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    import src.supervisor_agent.graph as supervisor
+
+    class Recorder(BaseCallbackHandler):
+        """Times graph nodes (labelled by their subgraph path), LLM calls and tools."""
+
+        def __init__(self):
+            self.nodes = defaultdict(list)
+            self.tools = defaultdict(list)
+            self.llm_calls = 0
+            self._open = {}
+            self._active = set()
+
+        def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+            metadata = metadata or {}
+            ns = metadata.get("langgraph_checkpoint_ns")
+            # Nodes are wrapped in several runnables; time the outermost one
+            if ns and kwargs.get("name") == metadata.get("langgraph_node") and ns not in self._active:
+                self._active.add(ns)
+                self._open[run_id] = (ns, time.perf_counter())
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            self._close(run_id)
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            self._close(run_id)
+
+        def _close(self, run_id):
+            if run_id in self._open:
+                ns, start = self._open.pop(run_id)
+                self._active.discard(ns)
+                label = "/".join(part.split(":")[0] for part in ns.split("|"))
+                self.nodes[label].append(time.perf_counter() - start)
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            self.llm_calls += 1
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            self._open[run_id] = (None, time.perf_counter(), kwargs.get("name") or serialized.get("name"))
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            _, start, name = self._open.pop(run_id)
+            self.tools[name].append(time.perf_counter() - start)
+
+    def runner(target):
+        if target == "supervisor":
+            return lambda state, callbacks: supervisor.run_supervisor_agent(state, callbacks=callbacks)
+        graph = sys.modules[f"{target}.graph"].graph
+        return lambda state, callbacks: graph.invoke(state, config={**supervisor.session_config(), "callbacks": callbacks})
+
+    prompts = [line.strip() for line in EXAMPLES.read_text().splitlines() if line.strip()]
+    results = {}
+    nodes = defaultdict(list)
+    for target in TARGETS:
+        run = runner(target)
+        recorder = Recorder()
+        walls = []
+        for _ in range(args.repeat):
+            for prompt in prompts:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run({"messages": [("user", prompt)]}, [recorder])
+                walls.append(time.perf_counter() - start)
+        # Memory on a separate pass: tracemalloc slows Python enough to skew the timings
+        tracemalloc.start()
+        peak = 0
+        for prompt in prompts:
+            tracemalloc.reset_peak()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run({"messages": [("user", prompt)]}, None)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        runs = len(walls)
+        tool_seconds = sum(sum(v) for v in recorder.tools.values())
+        results[target] = {
+            "runs": runs,
+            "wall_ms_mean": statistics.mean(walls) * 1000,
+            "wall_ms_p95": percentile(walls, 0.95) * 1000,
+            "llm_calls_per_run": recorder.llm_calls / runs,
+            "tool_ms_per_run": tool_seconds * 1000 / runs,
+            "tools": {name: len(times) for name, times in recorder.tools.items()},
+            "peak_kib": peak / 1024,
+        }
+        for label, times in recorder.nodes.items():
+            nodes[f"standalone {target}: {label}" if target != "supervisor" else label].extend(times)
+
+    print(f"{len(prompts)} prompts x {args.repeat}, fake model latency {args.latency}s")
+    print(f"  {'target':<18} {'runs':>5} {'mean ms':>8} {'p95 ms':>8} {'LLM calls':>10} {'tool ms':>8} {'peak KiB':>9}")
+    for target, r in results.items():
+        print(
+            f"  {target:<18} {r['runs']:>5} {r['wall_ms_mean']:>8.1f} {r['wall_ms_p95']:>8.1f} "
+            f"{r['llm_calls_per_run']:>10.1f} {r['tool_ms_per_run']:>8.2f} {r['peak_kib']:>9.0f}"
+        )
+    print(f"\n  {'node':<44} {'calls':>6} {'mean ms':>8} {'p95 ms':>8} {'total ms':>9}")
+    node_stats = {}
+    for label, times in sorted(nodes.items()):
+        node_stats[label] = {
+            "calls": len(times),
+            "mean_ms": statistics.mean(times) * 1000,
+            "p95_ms": percentile(times, 0.95) * 1000,
+            "total_ms": sum(times) * 1000,
+        }
+        s = node_stats[label]
+        print(f"  {label:<44} {s['calls']:>6} {s['mean_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['total_ms']:>9.0f}")
+    max_rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n  process max RSS {max_rss_mib:.0f} MiB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {"latency": args.latency, "prompts": len(prompts), "targets": results, "nodes": node_stats, "max_rss_mib": max_rss_mib},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
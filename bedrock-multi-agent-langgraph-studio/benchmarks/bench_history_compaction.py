@@ -0,0 +1,95 @@
+"""Prompt tokens per model call with and without history compaction.
+
+Replays a multi-turn conversation through the supervisor workflow's message
+pattern (supervisor hop, sub-agent tool call and result, agent answer handed
+back to the supervisor) and feeds every model input through each agent's
+``HistoryCompactor``. Prints the prompt tokens sent per agent with compaction
+off and on, and the tokens saved.
+
+Usage:
+    python benchmarks/bench_history_compaction.py [--turns 10] [--tool-chars 6000]
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from common.compaction import DEFAULT_BUDGETS, HistoryCompactor, count_tokens  # noqa: E402
+
+EXAMPLES = Path(__file__).resolve().parents[2] / "data" / "examples.txt"
+HOPS = [
+    ("destination_agent", "compare_and_recommend_destination"),
+    ("flight_agent", "search_flights"),
+    ("hotel_agent", "suggest_hotels"),
+]
+
+
+def tool_payload(rng: random.Random, chars: int) -> str:
+    rows = []
+    while sum(map(len, rows)) < chars:
+        rows.append(
+            f"{{'flight_id': 'FL{rng.randint(1000, 9999)}', 'airline': 'AirEurope', "
+            f"'departure': '2025-05-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:10', "
+            f"'price': {rng.randint(80, 900)}.00}}"
+        )
+    return "[" + ", ".join(rows) + "] FINISHED"
+
+
+def replay(queries, compactors, tool_chars: int):
+    """Yield (agent, model input, compactor) for every model call of the conversation."""
+    rng = random.Random(3)
+    history = []
+    for turn, query in enumerate(queries):
+        history.append(HumanMessage(query))
+        for agent, tool in HOPS:
+            yield "supervisor", history, compactors["supervisor"]
+            history.append(HumanMessage(f"Supervisor decided: {agent}", name="supervisor"))
+            # Inside the sub-graph: call the tool, read its result, answer
+            local = list(history)
+            yield agent, local, compactors[agent]
+            call_id = f"call-{turn}-{agent}"
+            local += [
+                AIMessage("", tool_calls=[{"name": tool, "args": {"query": query}, "id": call_id}]),
+                ToolMessage(tool_payload(rng, tool_chars), tool_call_id=call_id),
+            ]
+            yield agent, local, compactors[agent]
+            # Agents restate most of what their tools returned
+            answer = f"{agent} result for '{query}': " + tool_payload(rng, tool_chars // 2)
+            history.append(HumanMessage(answer, name=agent))
+        yield "supervisor", history, compactors["supervisor"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--tool-chars", type=int, default=6000)
+    args = parser.parse_args()
+
+    queries = [line.strip() for line in EXAMPLES.read_text().splitlines() if line.strip()][: args.turns]
+    compactors = {agent: HistoryCompactor(agent) for agent in DEFAULT_BUDGETS}
+    raw = dict.fromkeys(DEFAULT_BUDGETS, 0)
+    peak = dict.fromkeys(DEFAULT_BUDGETS, 0)
+    for agent, messages, compactor in replay(queries, compactors, args.tool_chars):
+        tokens = count_tokens(messages)
+        raw[agent] += tokens
+        peak[agent] = max(peak[agent], tokens)
+        compacted = compactor.compact({"messages": messages})["messages"]
+        assert count_tokens(compacted) <= max(compactor.budget, tokens)
+
+    print(f"{len(queries)} user turns, {args.tool_chars}-char tool results")
+    print(f"  {'agent':<18} {'budget':>7} {'calls':>6} {'raw tokens':>11} {'compacted':>10} {'saved':>7} {'raw peak':>9}")
+    for agent, compactor in compactors.items():
+        stats = compactor.stats()
+        print(
+            f"  {agent:<18} {stats['budget']:>7} {stats['calls']:>6} {raw[agent]:>11,} "
+            f"{stats['tokens_out']:>10,} {stats['tokens_saved'] / max(raw[agent], 1):>6.0%} {peak[agent]:>9,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
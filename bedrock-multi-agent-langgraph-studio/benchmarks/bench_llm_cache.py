@@ -0,0 +1,126 @@
+"""Latency and hit rate of repeated questions with the LLM response cache.
+
+Sends the questions in data/examples.txt through a fake chat model that
+sleeps like a Bedrock call, with tools bound the way the sub-agents bind
+theirs. Every pass builds fresh messages (new ids), so hits depend on the
+canonical key rather than object identity. Passes:
+
+    cold     empty cache, every call reaches the model
+    memory   same questions again, answered by the in-memory LRU
+    disk     memory tier dropped (as after a restart), answered by SQLite
+    tools    same questions with different tools bound; must all miss
+
+Usage:
+    python benchmarks/bench_llm_cache.py [--latency 0.5] [--repeat 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+
+from common.llm_cache import GraphLLMCache, ResponseStore  # noqa: E402
+
+EXAMPLES = Path(__file__).resolve().parents[2] / "data" / "examples.txt"
+TOOLS = [
+    {"name": "search_flights", "description": "Search flights", "input_schema": {"type": "object"}},
+    {"name": "suggest_hotels", "description": "Suggest hotels", "input_schema": {"type": "object"}},
+]
+
+
+class SleepingChatModel(BaseChatModel):
+    """Answers after ``latency`` seconds, counting the calls that reach it."""
+
+    latency: float = 0.5
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "sleeping-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        self.calls += 1
+        reply = AIMessage(
+            f"Answer to: {messages[-1].content}",
+            usage_metadata={"input_tokens": 900, "output_tokens": 100, "total_tokens": 1000},
+            response_metadata={"model_name": "fake"},
+        )
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+def run_pass(model, questions, repeat: int) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    answers = []
+    for _ in range(repeat):
+        for question in questions:
+            messages = [
+                SystemMessage("You are a helpful travel assistant.", id=str(uuid.uuid4())),
+                HumanMessage(question, id=str(uuid.uuid4())),
+            ]
+            answers.append(model.invoke(messages).content)
+    return time.perf_counter() - start, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    questions = [line.strip() for line in EXAMPLES.read_text().splitlines() if line.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResponseStore(path=f"{tmp}/llm_cache.db")
+        cache = GraphLLMCache("bench", store)
+        llm = SleepingChatModel(latency=args.latency, cache=cache)
+        model = llm.bind(tools=TOOLS)
+
+        results = {}
+        baseline = None
+        for name in ("cold", "memory", "disk", "tools"):
+            if name == "disk":
+                store._memory.clear()
+            bound = llm.bind(tools=TOOLS[:1]) if name == "tools" else model
+            calls_before, memory_before, disk_before = llm.calls, store.memory_hits, store.disk_hits
+            elapsed, answers = run_pass(bound, questions, args.repeat)
+            baseline = baseline or answers
+            results[name] = (
+                elapsed,
+                llm.calls - calls_before,
+                store.memory_hits - memory_before,
+                store.disk_hits - disk_before,
+                answers == baseline,
+            )
+        stats = store.stats()
+
+    total = len(questions) * args.repeat
+    print(f"{len(questions)} questions x {args.repeat}, {args.latency}s per model call")
+    print(f"  {'pass':<8} {'wall':>7} {'per call':>9} {'model':>6} {'memory':>7} {'disk':>5} {'same answers':>13}")
+    for name, (elapsed, calls, memory, disk, same) in results.items():
+        print(f"  {name:<8} {elapsed:6.2f}s {elapsed / total * 1000:7.1f}ms {calls:>6} {memory:>7} {disk:>5} {str(same):>13}")
+    print(
+        f"  hit rate {stats['hit_rate']:.0%} ({stats['memory_hits']} memory, {stats['disk_hits']} disk, "
+        f"{stats['misses']} misses), graph hit rate {cache.stats()['hit_rate']:.0%}, {stats['disk_bytes']:,} bytes on disk"
+    )
+    ok = (
+        results["memory"][1] == 0
+        and results["disk"][1] == 0
+        and results["disk"][3] == len(questions)
+        and results["tools"][1] == len(questions)
+        and all(same for *_, same in list(results.values())[:3])
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Wall-clock of a full plan with flight and hotel run in sequence vs fanned out.
+
+Runs the compiled supervisor graph with stub chains that sleep for a fixed
+latency per agent, once with SUPERVISOR_PARALLEL off and once on. With the
+fan-out, the flight and hotel legs cost the slower of the two instead of
+their sum plus a supervisor round trip.
+
+Usage:
+    python benchmarks/bench_parallel_fanout.py [--flight 0.6] [--hotel 0.5] [--destination 0.3] [--supervisor 0.3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ.setdefault("env", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+import src.supervisor_agent.graph as supervisor  # noqa: E402
+
+CHAINS = {
+    "destination_agent": "destination_agent_chain",
+    "flight_agent": "flight_agent_chain",
+    "hotel_agent": "runnable_with_tools",
+}
+
+
+def sleeper(latency: float, respond) -> RunnableLambda:
+    def invoke(state):
+        time.sleep(latency)
+        return respond(state)
+
+    async def ainvoke(state):
+        await asyncio.sleep(latency)
+        return respond(state)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def install_stubs(args):
+    supervisor.supervisor_chain = sleeper(
+        args.supervisor, lambda state: supervisor.routeResponse(next="destination_agent")
+    )
+    replies = {
+        "destination_agent": "We recommend Lisbon, travelling on 2025-06-01.",
+        "flight_agent": "AirEurope FL1234 to Lisbon 09:10 FINISHED",
+        "hotel_agent": "City Hotel Lisbon, 3 nights FINISHED",
+    }
+    for name, chain in CHAINS.items():
+        latency = getattr(args, name.removesuffix("_agent"))
+        setattr(sys.modules[f"{name}.graph"], chain, sleeper(latency, lambda state, r=replies[name]: AIMessage(r)))
+
+
+async def run(parallel: bool) -> tuple[float, list[str]]:
+    supervisor.SUPERVISOR_PARALLEL = parallel
+    start = time.perf_counter()
+    result = await supervisor.graph.ainvoke({"messages": [("user", "Plan a vacation for me")]})
+    elapsed = time.perf_counter() - start
+    return elapsed, [m.name for m in result["messages"] if m.name in supervisor.members]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flight", type=float, default=0.6)
+    parser.add_argument("--hotel", type=float, default=0.5)
+    parser.add_argument("--destination", type=float, default=0.3)
+    parser.add_argument("--supervisor", type=float, default=0.3)
+    args = parser.parse_args()
+    install_stubs(args)
+
+    sequential, seq_members = asyncio.run(run(False))
+    parallel, par_members = asyncio.run(run(True))
+    print(f"stub latency: supervisor {args.supervisor}s, destination {args.destination}s, flight {args.flight}s, hotel {args.hotel}s")
+    print(f"  sequential : {sequential:5.2f} s  {' > '.join(seq_members)}")
+    print(f"  fan-out    : {parallel:5.2f} s  {' > '.join(par_members)}")
+    print(f"  saved      : {sequential - parallel:5.2f} s (expected ~{min(args.flight, args.hotel):.2f} s)")
+    ok = sorted(seq_members) == sorted(par_members) and parallel < sequential
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
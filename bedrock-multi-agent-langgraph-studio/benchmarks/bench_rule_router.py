@@ -0,0 +1,90 @@
+"""Supervisor LLM calls per conversation with and without the rule router.
+
+Runs the compiled supervisor graph with stub chains: the stub supervisor
+follows the prompt's workflow (destination -> flight -> hotel -> FINISH,
+starting where the request points) and records every call. Each scenario is
+run with SUPERVISOR_ROUTER=llm and =rules; the member sequence must match and
+the rules should take over every hop after the first. The stub members call
+no tools, so their replies say FINISHED; tests/test_rule_router.py checks the
+same hops with the real member prompts and tools.
+
+Usage:
+    python benchmarks/bench_rule_router.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ.setdefault("env", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+import src.supervisor_agent.graph as supervisor  # noqa: E402
+
+WORKFLOW = ["destination_agent", "flight_agent", "hotel_agent"]
+SCENARIOS = {
+    "full plan": ("Plan a vacation for me next month", "destination_agent", {}),
+    "flights only": ("Find me flights to Lisbon on 2025-06-01", "flight_agent", {}),
+    "hotels only": ("Suggest hotels in Boston", "hotel_agent", {}),
+    "agent asks back": (
+        "Plan a vacation for me",
+        "destination_agent",
+        {"destination_agent": "Which month would you like to travel?"},
+    ),
+}
+supervisor_calls = 0
+
+
+def install_stubs(first: str, replies: dict):
+    def route(state):
+        global supervisor_calls
+        supervisor_calls += 1
+        ran = [m.name for m in state["messages"] if m.name in WORKFLOW]
+        if not ran:
+            return supervisor.routeResponse(next=first)
+        if state["messages"][-1].content.endswith("?"):
+            return supervisor.routeResponse(next="FINISH")
+        later = [m for m in WORKFLOW[WORKFLOW.index(ran[-1]) + 1:] if m not in ran]
+        return supervisor.routeResponse(next=later[0] if later else "FINISH")
+
+    supervisor.supervisor_chain = RunnableLambda(route)
+    for name in WORKFLOW:
+        reply = replies.get(name, f"{name} done FINISHED")
+        sys.modules[f"{name}.graph"].__dict__[
+            {"destination_agent": "destination_agent_chain", "flight_agent": "flight_agent_chain", "hotel_agent": "runnable_with_tools"}[name]
+        ] = RunnableLambda(lambda state, reply=reply: AIMessage(reply))
+
+
+def run(query: str, mode: str) -> tuple[list[str], int]:
+    global supervisor_calls
+    supervisor.SUPERVISOR_ROUTER = mode
+    supervisor_calls = 0
+    result = supervisor.graph.invoke({"messages": [("user", query)]})
+    return [m.name for m in result["messages"] if m.name in WORKFLOW], supervisor_calls
+
+
+def main():
+    ok = True
+    print(f"  {'scenario':<16} {'members':<50} {'LLM routing calls':>18}")
+    for name, (query, first, replies) in SCENARIOS.items():
+        install_stubs(first, replies)
+        llm_route, llm_calls = run(query, "llm")
+        rule_route, rule_calls = run(query, "rules")
+        same = llm_route == rule_route
+        ok &= same
+        print(
+            f"  {name:<16} {' > '.join(rule_route):<50} {llm_calls:>8} -> {rule_calls:<4}"
+            f"{'' if same else ' ROUTE MISMATCH ' + ' > '.join(llm_route)}"
+        )
+    stats = supervisor.router.stats()
+    print(f"  rule hit rate {stats['hit_rate']:.0%} ({stats['rule_hits']}/{stats['decisions']}), by rule {stats['by_rule']}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
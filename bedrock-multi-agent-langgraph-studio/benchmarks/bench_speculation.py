@@ -0,0 +1,107 @@
+"""Speculative destination_agent: latency on a hit, wasted tokens on a miss.
+
+Runs the supervisor graph with stub chains (a sleeping supervisor, and
+sub-agents backed by a fake chat model that reports token usage) with
+SUPERVISOR_SPECULATE off and on. "plan" requests start at destination_agent,
+so speculation hits and saves the destination leg's latency; "flights"
+requests start at flight_agent, so the speculative run is discarded and its
+tokens are wasted.
+
+Usage:
+    python benchmarks/bench_speculation.py [--supervisor 0.4] [--destination 0.3] [--agent 0.2]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "src")]
+os.environ.setdefault("env", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+import src.supervisor_agent.graph as supervisor  # noqa: E402
+
+USAGE = {"input_tokens": 900, "output_tokens": 100, "total_tokens": 1000}
+REQUESTS = {
+    "plan": ("Plan a vacation for me", "destination_agent"),
+    "flights": ("Find flights to Lisbon on 2025-06-01", "flight_agent"),
+}
+
+
+def sleeper(latency: float) -> RunnableLambda:
+    def invoke(value):
+        time.sleep(latency)
+        return value
+
+    async def ainvoke(value):
+        await asyncio.sleep(latency)
+        return value
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def fake_model(reply: str) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=(AIMessage(reply, usage_metadata=USAGE, response_metadata={"model_name": "fake"}) for _ in itertools.count()))
+
+
+def install_stubs(args, first: str):
+    supervisor.supervisor_chain = sleeper(args.supervisor) | RunnableLambda(
+        lambda state: supervisor.routeResponse(next=first)
+    )
+    chains = {
+        "destination_agent": ("destination_agent_chain", args.destination, "We recommend Lisbon."),
+        "flight_agent": ("flight_agent_chain", args.agent, "AirEurope FL1234 09:10 FINISHED"),
+        "hotel_agent": ("runnable_with_tools", args.agent, "City Hotel Lisbon FINISHED"),
+    }
+    for name, (chain, latency, reply) in chains.items():
+        setattr(
+            sys.modules[f"{name}.graph"],
+            chain,
+            sleeper(latency) | RunnableLambda(lambda state: state["messages"]) | fake_model(reply),
+        )
+
+
+async def run(query: str, speculate: bool) -> float:
+    supervisor.SUPERVISOR_SPECULATE = speculate
+    start = time.perf_counter()
+    await supervisor.graph.ainvoke({"messages": [("user", query)]})
+    return time.perf_counter() - start
+
+
+async def main(args) -> bool:
+    ok = True
+    for name, (query, first) in REQUESTS.items():
+        install_stubs(args, first)
+        before = supervisor.speculation.stats()
+        baseline = await run(query, False)
+        speculative = await run(query, True)
+        await asyncio.sleep(args.destination)  # let a discarded run settle
+        after = supervisor.speculation.stats()
+        hit = after["hits"] > before["hits"]
+        wasted = after["wasted_tokens"] - before["wasted_tokens"]
+        print(
+            f"  {name:<8} off {baseline:5.2f} s   on {speculative:5.2f} s   "
+            f"{'hit ' if hit else 'miss'}   wasted tokens {wasted}"
+        )
+        ok &= hit == (first == "destination_agent")
+    stats = supervisor.speculation.stats()
+    print(f"  speculation: {stats}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--supervisor", type=float, default=0.4)
+    parser.add_argument("--destination", type=float, default=0.3)
+    parser.add_argument("--agent", type=float, default=0.2)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args)) else 1)
@@ -0,0 +1,141 @@
+"""Cold start vs warm worker latency for runner.py jobs.
+
+Cold: a fresh ``python runner.py --json`` process per prompt, which is what a
+Windmill job pays on top of the container start (imports, graph compile,
+client creation, then the run). Warm: the same prompts sent to
+``runner.py --serve``, whose pre-warmed workers already did all of that.
+Both sides use stub chains that sleep ``--llm`` seconds per model call, so the
+difference is start-up cost rather than Bedrock latency. The warm server is
+also sent a concurrent batch to show the process pool working in parallel.
+
+Usage:
+    python benchmarks/bench_warm_worker.py [--jobs 5] [--workers 2] [--llm 0.05]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+PROMPTS = [
+    "Plan a vacation for me",
+    "Suggest a destination for next month",
+    "Plan a trip and find flights and hotels",
+]
+PRELOAD = f"{Path(__file__).stem}:install_stubs"
+
+
+def install_stubs():
+    """Replace the model chains with sleeping stubs (run inside each runner process)."""
+    import asyncio
+
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    supervisor = sys.modules["src.supervisor_agent.graph"]
+    latency = float(os.environ.get("BENCH_LLM_LATENCY", "0.05"))
+
+    def sleeper(respond):
+        def invoke(state):
+            time.sleep(latency)
+            return respond(state)
+
+        async def ainvoke(state):
+            await asyncio.sleep(latency)
+            return respond(state)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+    supervisor.supervisor_chain = sleeper(lambda state: supervisor.routeResponse(next="destination_agent"))
+    chains = {
+        "destination_agent": "destination_agent_chain",
+        "flight_agent": "flight_agent_chain",
+        "hotel_agent": "runnable_with_tools",
+    }
+    for name, chain in chains.items():
+        setattr(sys.modules[f"{name}.graph"], chain, sleeper(lambda state, n=name: AIMessage(f"{n} done FINISHED")))
+
+
+def environment(llm: float) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT / "src"), str(BENCH_DIR), env.get("PYTHONPATH", "")])
+    env.setdefault("env", "bench")
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    env["BENCH_LLM_LATENCY"] = str(llm)
+    return env
+
+
+def cold(prompt: str, env: dict) -> tuple[float, dict]:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "runner.py", "--json", "--preload", PRELOAD, prompt],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if not out.stdout.strip():
+        sys.exit(f"runner.py failed:\n{out.stderr}")
+    return elapsed, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--llm", type=float, default=0.05, help="stub model latency in seconds")
+    args = parser.parse_args()
+    env = environment(args.llm)
+    sys.path.insert(0, str(ROOT))
+    from runner import send_job
+
+    prompts = [PROMPTS[i % len(PROMPTS)] for i in range(args.jobs)]
+    cold_runs = [cold(prompt, env) for prompt in prompts]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = f"{tmp}/runner.sock"
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "runner.py", "--serve", "--socket", target, "--workers", str(args.workers), "--preload", PRELOAD],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            ready = json.loads(server.stdout.readline())
+            startup = time.perf_counter() - start
+            warm_runs = []
+            for prompt in prompts:
+                t = time.perf_counter()
+                reply = send_job({"prompt": prompt}, target)
+                warm_runs.append((time.perf_counter() - t, reply))
+            batch_start = time.perf_counter()
+            with ThreadPoolExecutor(args.workers * 2) as executor:
+                batch = list(executor.map(lambda p: send_job({"prompt": p}, target), prompts * 2))
+            batch_wall = time.perf_counter() - batch_start
+        finally:
+            server.terminate()
+            server.wait()
+
+    cold_ms = [t * 1000 for t, _ in cold_runs]
+    warm_ms = [t * 1000 for t, _ in warm_runs]
+    run_ms = [r["elapsed_ms"] for _, r in warm_runs]
+    print(f"{args.jobs} jobs, stub model latency {args.llm}s, {args.workers} warm workers")
+    print(f"  cold process per job : median {statistics.median(cold_ms):7.0f} ms  (max {max(cold_ms):.0f})")
+    print(f"  warm worker          : median {statistics.median(warm_ms):7.0f} ms  (graph run {statistics.median(run_ms):.0f} ms)")
+    print(f"  speed-up             : {statistics.median(cold_ms) / statistics.median(warm_ms):7.1f}x")
+    print(f"  server start-up      : {startup * 1000:7.0f} ms once (pool warm-up {ready['warmup_ms']:.0f} ms)")
+    serial = sum(r["elapsed_ms"] for r in batch) / 1000
+    pids = {r["pid"] for r in batch}
+    print(f"  concurrent batch     : {len(batch)} jobs in {batch_wall:.2f} s (serial {serial:.2f} s) across {len(pids)} workers")
+    ok = all(r["ok"] for _, r in cold_runs + warm_runs) and all(r["ok"] for r in batch)
+    ok &= [r["answer"] for _, r in cold_runs] == [r["answer"] for _, r in warm_runs]
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Precompute destination recommendations for every traveler.
+
+Run nightly (or after the traveler file changes). compare_and_recommend_destination
+reads the table directly while it is newer than the traveler file.
+"""
+
+import argparse
+import time
+
+from src.destination_agent.tools import RECOMMENDATIONS_PATH, materialize_recommendations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=RECOMMENDATIONS_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = materialize_recommendations(args.output)
+    print(
+        f"Wrote {len(table)} recommendations to {args.output} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
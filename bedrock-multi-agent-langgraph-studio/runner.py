@@ -1,30 +1,237 @@
-from langchain_core.messages import HumanMessage
-from src.supervisor_agent.graph import run_supervisor_agent
-import sys
-import boto3
+"""Run the supervisor graph for one prompt, or serve prompts from warm workers.
+
+One-shot (what each Windmill job used to do inside a fresh container):
+
+    python runner.py "Plan a vacation for me"
+
+Warm worker: import and compile the graphs once, keep a pool of pre-warmed
+processes and answer newline-delimited JSON jobs on a Unix socket (or
+``host:port``):
+
+    python runner.py --serve --socket /tmp/travel-runner.sock --workers 4
+    python runner.py --send "Plan a vacation for me" --socket /tmp/travel-runner.sock
+
+A job is ``{"prompt": ..., "thread_id": ..., "user_id": ...}`` and the reply is
+``{"ok": true, "thread_id": ..., "answer": ..., "messages": [...], ...}`` or
+``{"ok": false, "error": ...}``. A job without ``thread_id`` starts a new
+conversation; resend the returned ``thread_id`` to continue it. Only the
+standard library is imported at module level so ``--send`` stays cheap; the
+graph is loaded by the workers.
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
 import os
-import json 
+import signal
+import socket
+import socketserver
+import sys
+import time
+import uuid
+
+GRAPH_MODULE = "src.supervisor_agent.graph"
+DEFAULT_SOCKET = os.environ.get("RUNNER_SOCKET", "/tmp/travel-runner.sock")
+DEFAULT_WORKERS = int(os.environ.get("RUNNER_WORKERS", "2"))
+# Workers are recycled after this many jobs (0 keeps them forever)
+MAX_JOBS_PER_WORKER = int(os.environ.get("RUNNER_MAX_JOBS_PER_WORKER", "0"))
+READY_TIMEOUT_SECONDS = 120.0
+MAX_JOB_BYTES = 1 << 20
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+
+def load_hooks(preload: list[str]):
+    """Import each ``module`` or ``module:function`` in ``preload``, calling the function."""
+    for spec in preload:
+        module_name, _, function = spec.partition(":")
+        module = importlib.import_module(module_name)
+        if function:
+            getattr(module, function)()
+
+
+def run_job(job: dict) -> dict:
+    """Run one job against the supervisor graph and return the JSON-ready reply."""
+    start = time.perf_counter()
+    try:
+        from langchain_core.messages import HumanMessage
+
+        graph = importlib.import_module(GRAPH_MODULE)
+        # Workers live across jobs, so a job without a thread must not share the default one
+        thread_id = job.get("thread_id") or str(uuid.uuid4())
+        result = graph.run_supervisor_agent(
+            {"messages": [HumanMessage(content=job["prompt"])]}, thread_id=thread_id, user_id=job.get("user_id")
+        )
+        messages = [{"name": m.name or m.type, "content": _text(m.content)} for m in result["messages"]]
+        reply = {
+            "ok": True,
+            "thread_id": thread_id,
+            "answer": messages[-1]["content"] if messages else "",
+            "messages": messages,
+            "metrics": result.get("metrics"),
+        }
+    except Exception as exc:
+        reply = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    reply["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    reply["pid"] = os.getpid()
+    return reply
+
+
+def _warm_worker(preload: list[str], ready):
+    """Pool initializer: load the graph (a no-op when the fork server preloaded it) and the Bedrock client."""
+    graph = importlib.import_module(GRAPH_MODULE)
+    from common.bedrock import get_bedrock_client
+
+    get_bedrock_client().resolve()
+    load_hooks(preload)
+    # Compiled at import; touching it here keeps a broken graph from passing the readiness check
+    graph.graph.get_graph()
+    ready.release()
+
+
+def start_pool(workers: int, preload: list[str], max_jobs: int = MAX_JOBS_PER_WORKER):
+    """Start ``workers`` processes and return the pool once every one of them is warm.
+
+    The fork server imports the graph once and forks the workers from it, so
+    they share its compiled modules instead of importing them each.
+    """
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload([GRAPH_MODULE])
+    ready = ctx.Semaphore(0)
+    pool = ctx.Pool(workers, initializer=_warm_worker, initargs=(preload, ready), maxtasksperchild=max_jobs or None)
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    for _ in range(workers):
+        if not ready.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            pool.terminate()
+            raise RuntimeError(f"workers not ready after {READY_TIMEOUT_SECONDS:.0f}s")
+    return pool
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON job per line and writes one JSON reply per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            if len(line) > MAX_JOB_BYTES:
+                reply = {"ok": False, "error": "job too large"}
+            else:
+                try:
+                    job = json.loads(line)
+                    if not isinstance(job, dict) or not isinstance(job.get("prompt"), str):
+                        raise ValueError('expected {"prompt": "..."}')
+                except ValueError as exc:
+                    reply = {"ok": False, "error": f"bad job: {exc}"}
+                else:
+                    reply = self.server.pool.apply(run_job, (job,))
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class UnixJobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class TCPJobServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _address(target: str):
+    """Return ``(host, port)`` for ``host:port`` targets, else the socket path."""
+    host, sep, port = target.rpartition(":")
+    if sep and port.isdigit() and "/" not in target:
+        return host or "127.0.0.1", int(port)
+    return target
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(target: str, workers: int, preload: list[str], max_jobs: int = MAX_JOBS_PER_WORKER):
+    """Warm the pool, then answer jobs on ``target`` until interrupted or terminated."""
+    signal.signal(signal.SIGTERM, _interrupt)
+    start = time.perf_counter()
+    pool = start_pool(workers, preload, max_jobs)
+    address = _address(target)
+    if isinstance(address, tuple):
+        server = TCPJobServer(address, JobHandler)
+    else:
+        if os.path.exists(address):
+            os.unlink(address)
+        server = UnixJobServer(address, JobHandler)
+    server.pool = pool
+    print(
+        json.dumps({"ready": True, "socket": target, "workers": workers, "warmup_ms": round((time.perf_counter() - start) * 1000, 1)}),
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.terminate()
+        if not isinstance(address, tuple) and os.path.exists(address):
+            os.unlink(address)
+
+
+def send_job(job: dict, target: str = DEFAULT_SOCKET, timeout: float | None = None) -> dict:
+    """Send ``job`` to a running worker and return its reply."""
+    address = _address(target)
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.sendall(json.dumps(job).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            return json.loads(reader.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("prompt", nargs="?", default="Default prompt here")
+    parser.add_argument("--serve", action="store_true", help="run as a warm worker")
+    parser.add_argument("--send", action="store_true", help="send the prompt to a running worker")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path or host:port")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--max-jobs-per-worker", type=int, default=MAX_JOBS_PER_WORKER)
+    parser.add_argument("--thread-id")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--json", action="store_true", help="print the one-shot result as a JSON reply")
+    parser.add_argument(
+        "--preload", action="append", default=[], help="module or module:function to run in each worker first"
+    )
+    args = parser.parse_args()
+
+    job = {"prompt": args.prompt, "thread_id": args.thread_id, "user_id": args.user_id}
+    if args.serve:
+        serve(args.socket, args.workers, args.preload, args.max_jobs_per_worker)
+    elif args.send:
+        reply = send_job(job, args.socket)
+        print(json.dumps(reply))
+        sys.exit(0 if reply.get("ok") else 1)
+    elif args.json:
+        importlib.import_module(GRAPH_MODULE)
+        load_hooks(args.preload)
+        reply = run_job(job)
+        print(json.dumps(reply))
+        sys.exit(0 if reply.get("ok") else 1)
+    else:
+        from langchain_core.messages import HumanMessage
+
+        from src.supervisor_agent.graph import run_supervisor_agent
+
+        load_hooks(args.preload)
+        state = {"messages": [HumanMessage(content=args.prompt)]}
+        result = run_supervisor_agent(state, thread_id=args.thread_id, user_id=args.user_id)
+        print(result)
 
 
 if __name__ == "__main__":
-    user_prompt = sys.argv[1] if len(sys.argv) > 1 else "Default prompt here"
-    message = HumanMessage(content=user_prompt)
-    state = {"messages": [message]}
-    result = run_supervisor_agent(state)
-    # messages = result["messages"]
-    # formatted = "\n---\n".join(
-    #         f"🧠 {m.name or 'user'}:\n{m.content}" for m in messages
-    #     )
-    # print(formatted)
-    # session_id = os.environ["SESSION_ID"]
-    # s3_bucket = os.environ["S3_BUCKET"]
-    # s3_key = f"results/{session_id}.json"
-    # s3 = boto3.client("s3")
-    # s3.put_object(
-    #     Bucket=s3_bucket,
-    #     Key=s3_key,
-    #     Body=json.dumps(result),
-    #     ContentType="application/json"
-    # )
-    print(result)
-    
\ No newline at end of file
+    main()
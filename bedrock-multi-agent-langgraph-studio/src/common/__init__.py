@@ -0,0 +1,29 @@
+"""Shared helpers used by all agent modules."""
+
+from common.bedrock import get_bedrock_client, make_chat_model
+from common.bookings_db import BookingsDB, get_bookings_db
+from common.checkpoint import BoundedMemorySaver, make_checkpointer
+from common.compaction import HistoryCompactor, compact_history, compaction_stats
+from common.llm_cache import GraphLLMCache, ResponseStore, get_llm_cache, llm_cache_stats
+from common.profiles import TravelProfileStore, get_profile_store
+from common.sqlite_checkpoint import SQLiteCheckpointSaver, get_sqlite_checkpointer
+
+__all__ = [
+    "BookingsDB",
+    "BoundedMemorySaver",
+    "GraphLLMCache",
+    "HistoryCompactor",
+    "ResponseStore",
+    "SQLiteCheckpointSaver",
+    "TravelProfileStore",
+    "compact_history",
+    "compaction_stats",
+    "get_bedrock_client",
+    "get_bookings_db",
+    "get_llm_cache",
+    "get_profile_store",
+    "get_sqlite_checkpointer",
+    "llm_cache_stats",
+    "make_chat_model",
+    "make_checkpointer",
+]
@@ -0,0 +1,131 @@
+"""Shared Bedrock clients and chat models for every graph.
+
+All agents talk to Bedrock through one ``bedrock-runtime`` client per region,
+so they share a single HTTP connection pool instead of opening one per graph.
+Clients are created on first use rather than at import, which keeps
+``import supervisor_agent`` (and ``langgraph dev`` start-up) fast and lets
+the graphs be imported without AWS credentials.
+
+Environment:
+    BEDROCK_REGION                 Region (falls back to AWS_REGION, AWS_DEFAULT_REGION, us-east-1)
+    BEDROCK_MODEL_ID               Default model for every agent
+    BEDROCK_MODEL_ID_<AGENT>       Per-agent override, e.g. BEDROCK_MODEL_ID_SUPERVISOR
+    BEDROCK_MAX_POOL_CONNECTIONS   HTTP connections kept per client (default 50)
+    BEDROCK_MAX_ATTEMPTS           Attempts per call, first try included (default 6)
+    BEDROCK_RETRY_MODE             botocore retry mode (default adaptive)
+    BEDROCK_CONNECT_TIMEOUT        Seconds (default 5)
+    BEDROCK_READ_TIMEOUT           Seconds (default 120)
+    BEDROCK_FAKE                   1 to answer from common.fake_bedrock instead of Bedrock
+"""
+
+import threading
+from os import environ
+
+import boto3
+from botocore.config import Config
+from langchain_aws import ChatBedrockConverse
+from langchain_core.language_models import BaseChatModel
+
+from common.llm_cache import get_llm_cache
+
+DEFAULT_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+BEDROCK_REGION = (
+    environ.get("BEDROCK_REGION") or environ.get("AWS_REGION") or environ.get("AWS_DEFAULT_REGION") or "us-east-1"
+)
+BEDROCK_MODEL_ID = environ.get("BEDROCK_MODEL_ID", DEFAULT_MODEL_ID)
+BEDROCK_MAX_POOL_CONNECTIONS = int(environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+BEDROCK_MAX_ATTEMPTS = int(environ.get("BEDROCK_MAX_ATTEMPTS", "6"))
+BEDROCK_RETRY_MODE = environ.get("BEDROCK_RETRY_MODE", "adaptive")
+BEDROCK_CONNECT_TIMEOUT = float(environ.get("BEDROCK_CONNECT_TIMEOUT", "5"))
+BEDROCK_READ_TIMEOUT = float(environ.get("BEDROCK_READ_TIMEOUT", "120"))
+BEDROCK_FAKE = environ.get("BEDROCK_FAKE", "") == "1"
+
+
+def bedrock_config() -> Config:
+    """Return the botocore config shared by every Bedrock client."""
+    return Config(
+        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=BEDROCK_READ_TIMEOUT,
+        retries={"total_max_attempts": BEDROCK_MAX_ATTEMPTS, "mode": BEDROCK_RETRY_MODE},
+    )
+
+
+class LazyClient:
+    """Stands in for a boto3 client and creates it on first attribute access.
+
+    Attributes:
+        service (str): boto3 service name.
+        region (str): AWS region.
+    """
+
+    def __init__(self, service: str, region: str):
+        self.service = service
+        self.region = region
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def resolve(self):
+        """Return the real boto3 client, creating it if needed."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # Sessions are not thread-safe, so each client gets its own
+                    session = boto3.session.Session()
+                    self._client = session.client(self.service, region_name=self.region, config=bedrock_config())
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        state = "created" if self.created else "not created"
+        return f"<LazyClient {self.service} {self.region} ({state})>"
+
+
+_clients: dict[tuple[str, str], LazyClient] = {}
+_lock = threading.Lock()
+
+
+def get_bedrock_client(service: str = "bedrock-runtime", region: str | None = None) -> LazyClient:
+    """Return the process-wide client for ``service`` in ``region`` (default ``BEDROCK_REGION``)."""
+    key = (service, region or BEDROCK_REGION)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = LazyClient(*key)
+        return _clients[key]
+
+
+def model_id_for(agent: str) -> str:
+    """Return the model id for ``agent``, honouring ``BEDROCK_MODEL_ID_<AGENT>``."""
+    return environ.get(f"BEDROCK_MODEL_ID_{agent.upper()}", BEDROCK_MODEL_ID)
+
+
+def make_chat_model(agent: str, **kwargs) -> BaseChatModel:
+    """Return a ``ChatBedrockConverse`` for ``agent`` on the shared clients.
+
+    Defaults to ``temperature=0`` and the agent's response cache; ``kwargs``
+    override any constructor argument. With ``BEDROCK_FAKE=1`` the model is a
+    scripted ``FakeChatBedrockConverse`` that never calls AWS.
+    """
+    if BEDROCK_FAKE:
+        # Imported here so production processes never load the offline stand-in
+        from common.fake_bedrock import FakeChatBedrockConverse
+
+        return FakeChatBedrockConverse(agent=agent, cache=get_llm_cache(agent), **kwargs)
+    params = {
+        "model": model_id_for(agent),
+        "temperature": 0,
+        "max_tokens": None,
+        "client": get_bedrock_client(),
+        # Control-plane client; without it every model builds its own at import
+        "bedrock_client": get_bedrock_client("bedrock"),
+        "cache": get_llm_cache(agent),
+    }
+    params.update(kwargs)
+    return ChatBedrockConverse(**params)
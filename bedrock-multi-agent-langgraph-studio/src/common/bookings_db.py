@@ -0,0 +1,193 @@
+"""Shared access layer for the travel bookings SQLite database.
+
+Each thread keeps one long-lived connection per database path, opened in WAL
+mode so readers do not block the writer. sqlite3's per-connection statement
+cache keeps the prepared statements of the booking tools hot across calls.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from os import environ
+
+from common.metrics import timed_connection
+
+BOOKINGS_DB_PATH = environ.get("BOOKINGS_DB_PATH", "data/travel_bookings.db")
+BUSY_TIMEOUT_SECONDS = 10.0
+CACHED_STATEMENTS = 256
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    # 1: per-user booking history lookups
+    """
+    CREATE INDEX IF NOT EXISTS idx_flight_bookings_user_departure
+        ON flight_bookings (user_id, departure_date);
+    CREATE INDEX IF NOT EXISTS idx_hotel_bookings_user_checkin
+        ON hotel_bookings (user_id, check_in_date);
+    """,
+]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending ``MIGRATIONS`` to ``conn`` and return the resulting schema version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        try:
+            conn.executescript(f"BEGIN; {script} PRAGMA user_version = {target}; COMMIT;")
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        version = target
+    return version
+
+
+def placeholders(count: int) -> str:
+    """Return ``?, ?, ...`` with ``count`` parameters for an ``IN (...)`` clause."""
+    return ", ".join("?" * count)
+
+
+def parse_cursor(cursor: str) -> tuple[str, int]:
+    """Split a ``date|booking_id`` page cursor, raising ``ValueError`` if it is malformed."""
+    last_date, sep, last_id = cursor.rpartition("|")
+    if not sep or not last_date or not last_id.isdigit():
+        raise ValueError(f"invalid cursor {cursor!r}, pass the next_cursor of a previous page")
+    return last_date, int(last_id)
+
+
+def unique_ids(booking_ids) -> list[int]:
+    """Return ``booking_ids`` as ints with duplicates removed, keeping the order given."""
+    return list(dict.fromkeys(int(booking_id) for booking_id in booking_ids))
+
+
+class BookingsDB:
+    """Per-thread pool of persistent connections to one bookings database."""
+
+    def __init__(self, path: str = BOOKINGS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: set[sqlite3.Connection] = set()
+        self._generation = 0
+        self._migrated = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            cached_statements=CACHED_STATEMENTS,
+            # Only the owning thread uses it, but close_all may run elsewhere
+            check_same_thread=False,
+            factory=timed_connection("bookings"),
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.add(conn)
+            if not self._migrated:
+                try:
+                    migrate(conn)
+                    self._migrated = True
+                except sqlite3.Error:
+                    # Keep serving queries; the next new connection retries
+                    pass
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use (and again after a fork)."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.pid != os.getpid() or local.generation != self._generation:
+            conn = self._connect()
+            local.conn = conn
+            local.pid = os.getpid()
+            local.generation = self._generation
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Yield this thread's connection inside a transaction, committed on success and rolled back on error.
+
+        The transaction starts with ``BEGIN IMMEDIATE``, so rows read before a
+        write (e.g. which booking IDs exist) cannot change before it commits.
+        Nested use (``transaction()`` or ``execute()`` inside a transaction)
+        joins the enclosing transaction, which commits or rolls back for both.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+
+    def fetch_one(self, sql: str, params=()) -> tuple | None:
+        """Run a query and return its first row."""
+        return self.connection().execute(sql, params).fetchone()
+
+    def fetch_all(self, sql: str, params=()) -> list[tuple]:
+        """Run a query and return all rows."""
+        return self.connection().execute(sql, params).fetchall()
+
+    def fetch_records(self, sql: str, params=()) -> list[dict]:
+        """Run a query and return all rows as column -> value dicts."""
+        cursor = self.connection().execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def list_user_bookings(
+        self, table: str, date_column: str, user_id: int, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list[dict], str | None]:
+        """Return one page of a user's bookings ordered by ``date_column``, then ``booking_id``.
+
+        Uses keyset pagination over the ``(user_id, date_column)`` index: the
+        cursor is the ``date|booking_id`` of the last row of the previous
+        page, so every page costs the same however deep the history is.
+
+        Returns:
+            tuple: The page's rows and the cursor for the next page (``None`` on the last page).
+
+        Raises:
+            ValueError: If ``cursor`` is not a ``date|booking_id`` cursor.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql = f"SELECT * FROM {table} WHERE user_id = ?"
+        params = [user_id]
+        if cursor:
+            sql += f" AND ({date_column}, booking_id) > (?, ?)"
+            params += parse_cursor(cursor)
+        sql += f" ORDER BY {date_column}, booking_id LIMIT ?"
+        rows = self.fetch_records(sql, params + [limit + 1])
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, f"{rows[-1][date_column]}|{rows[-1]['booking_id']}"
+
+    def execute(self, sql: str, params=()) -> int:
+        """Run a single write statement in its own transaction and return the affected row count."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def close_all(self):
+        """Close every connection opened by this pool, across all threads."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+            self._generation += 1
+        for conn in connections:
+            conn.close()
+
+
+_pools: dict[str, BookingsDB] = {}
+_pools_lock = threading.Lock()
+
+
+def get_bookings_db(path: str | None = None) -> BookingsDB:
+    """Return the process-wide pool for ``path`` (defaults to ``BOOKINGS_DB_PATH``)."""
+    key = os.path.abspath(path or BOOKINGS_DB_PATH)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, BookingsDB(key))
+    return pool
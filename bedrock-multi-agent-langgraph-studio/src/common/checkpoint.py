@@ -0,0 +1,172 @@
+"""Checkpointer selection and a bounded in-memory checkpointer for long-running servers."""
+
+import threading
+import time
+from collections import OrderedDict
+from os import environ
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+from common.sqlite_checkpoint import get_sqlite_checkpointer
+
+CHECKPOINT_MAX_THREADS = int(environ.get("CHECKPOINT_MAX_THREADS", "1000"))
+CHECKPOINT_IDLE_TTL_SECONDS = float(environ.get("CHECKPOINT_IDLE_TTL_SECONDS", "3600"))
+CHECKPOINT_MAX_BYTES = int(environ.get("CHECKPOINT_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class _ThreadEntry:
+    __slots__ = ("bytes", "last_used", "blob_keys", "write_keys")
+
+    def __init__(self):
+        self.bytes = 0
+        self.last_used = time.monotonic()
+        self.blob_keys = set()
+        self.write_keys = set()
+
+
+class BoundedMemorySaver(MemorySaver):
+    """``MemorySaver`` that evicts whole threads to stay within fixed limits.
+
+    Threads are kept in least-recently-used order. After every write, threads
+    idle for longer than ``idle_ttl_seconds`` are dropped, then the least
+    recently used ones until there are at most ``max_threads`` threads and at
+    most ``max_bytes`` of serialized checkpoint data. The thread being written
+    is never evicted by its own write.
+
+    Attributes:
+        evictions (int): Threads evicted so far.
+        resident_bytes (int): Serialized bytes currently held across all threads.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: int = CHECKPOINT_MAX_THREADS,
+        idle_ttl_seconds: float = CHECKPOINT_IDLE_TTL_SECONDS,
+        max_bytes: int = CHECKPOINT_MAX_BYTES,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.resident_bytes = 0
+        self._threads: OrderedDict[str, _ThreadEntry] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def stats(self) -> dict:
+        """Return eviction and residency counters."""
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "resident_bytes": self.resident_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _touch(self, thread_id: str) -> _ThreadEntry:
+        entry = self._threads.get(thread_id)
+        if entry is None:
+            entry = self._threads[thread_id] = _ThreadEntry()
+        else:
+            self._threads.move_to_end(thread_id)
+            entry.last_used = time.monotonic()
+        return entry
+
+    def _evict(self, thread_id: str):
+        entry = self._threads.pop(thread_id)
+        self.storage.pop(thread_id, None)
+        for key in entry.blob_keys:
+            self.blobs.pop(key, None)
+        for key in entry.write_keys:
+            self.writes.pop(key, None)
+        self.resident_bytes -= entry.bytes
+        self.evictions += 1
+
+    def _enforce_limits(self, keep: str):
+        now = time.monotonic()
+        for thread_id, entry in list(self._threads.items()):
+            if now - entry.last_used <= self.idle_ttl_seconds:
+                break
+            if thread_id != keep:
+                self._evict(thread_id)
+        while len(self._threads) > self.max_threads or self.resident_bytes > self.max_bytes:
+            victim = next((t for t in self._threads if t != keep), None)
+            if victim is None:
+                break
+            self._evict(victim)
+
+    def get_tuple(self, config: RunnableConfig):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            result = super().get_tuple(config)
+            if thread_id in self._threads:
+                self._touch(thread_id)
+            elif thread_id in self.storage and not any(self.storage[thread_id].values()):
+                # Lookups of unknown threads leave an empty defaultdict entry behind
+                del self.storage[thread_id]
+            return result
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            entry = self._touch(thread_id)
+            added = 0
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                if key not in entry.blob_keys:
+                    entry.blob_keys.add(key)
+                    added += len(self.blobs[key][1])
+            saved = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            added += len(saved[0][1]) + len(saved[1][1])
+            entry.bytes += added
+            self.resident_bytes += added
+            self._enforce_limits(keep=thread_id)
+            return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            before = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+            super().put_writes(config, writes, task_id, task_path)
+            after = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+            entry = self._touch(thread_id)
+            entry.write_keys.add(key)
+            entry.bytes += after - before
+            self.resident_bytes += after - before
+            self._enforce_limits(keep=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            if thread_id in self._threads:
+                self._evict(thread_id)
+                self.evictions -= 1
+            super().delete_thread(thread_id)
+
+
+def make_checkpointer() -> BaseCheckpointSaver | None:
+    """Return the checkpointer selected by the ``env`` switch.
+
+    ``env`` unset uses ``MemorySaver``, ``env=bounded`` uses
+    ``BoundedMemorySaver``, ``env=sqlite`` uses the durable
+    ``SQLiteCheckpointSaver`` shared by all graphs, and any other value (e.g.
+    ``local`` under ``langgraph dev``, which brings its own persistence)
+    compiles without one.
+    """
+    env = environ.get("env", "")
+    if env == "":
+        return MemorySaver()
+    if env == "bounded":
+        return BoundedMemorySaver()
+    if env == "sqlite":
+        return get_sqlite_checkpointer()
+    return None
@@ -0,0 +1,270 @@
+"""Token-budgeted compaction of the message history sent to each agent's model.
+
+Every supervisor hop and sub-agent call re-sends the whole conversation, so
+without a bound the prompt grows with every hop. ``compact_history(agent)``
+returns a runnable that sits in front of an agent's prompt and, once the
+history is over the agent's budget, applies the enabled strategies in order:
+
+1. ``truncate``: shorten old tool results, keeping their head and tail (tool
+   messages end with status markers such as ``FINISHED``).
+2. ``window``: drop the oldest messages, keeping the first user message and
+   never splitting a tool call from its results.
+3. ``summarize``: replace the dropped messages with a short summary, built
+   extractively or, with ``HISTORY_SUMMARIZER=llm``, by the agent's model.
+
+The checkpointed state is never changed; only the model input is compacted.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from os import environ
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    convert_to_messages,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import RunnableLambda
+
+STRATEGIES = ("truncate", "window", "summarize")
+HISTORY_COMPACTION = environ.get("HISTORY_COMPACTION", ",".join(STRATEGIES))
+HISTORY_SUMMARIZER = environ.get("HISTORY_SUMMARIZER", "extractive")
+# Routing needs far less context than the agents that call tools
+DEFAULT_BUDGETS = {
+    "supervisor": 4000,
+    "flight_agent": 8000,
+    "hotel_agent": 8000,
+    "destination_agent": 8000,
+}
+# The newest messages are what the model is acting on; never compact them
+KEEP_RECENT_MESSAGES = 4
+TOOL_RESULT_MAX_TOKENS = 300
+SUMMARY_MAX_TOKENS = 400
+SUMMARY_LINE_CHARS = 200
+SUMMARY_CACHE_SIZE = 256
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few sentences for an assistant that will continue it. "
+    "Keep the user's request, locations, dates, booking IDs and which agents have FINISHED.\n\n"
+)
+
+
+def budget_for(agent: str) -> int:
+    """Return the history token budget for ``agent``.
+
+    ``HISTORY_TOKEN_BUDGET_<AGENT>`` (e.g. ``HISTORY_TOKEN_BUDGET_SUPERVISOR``)
+    overrides ``HISTORY_TOKEN_BUDGET``, which overrides ``DEFAULT_BUDGETS``.
+    """
+    value = environ.get(f"HISTORY_TOKEN_BUDGET_{agent.upper()}") or environ.get("HISTORY_TOKEN_BUDGET")
+    return int(value) if value else DEFAULT_BUDGETS.get(agent, 8000)
+
+
+def count_tokens(messages) -> int:
+    return count_tokens_approximately(messages)
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+    )
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 3 // 4
+    tail = max_chars - head
+    return f"{text[:head]} ...[{len(text) - max_chars} chars truncated]... {text[-tail:]}"
+
+
+class HistoryCompactor:
+    """Compact one agent's model input to its token budget and count the savings.
+
+    Attributes:
+        calls (int): Histories seen.
+        compacted (int): Histories that were over budget and got compacted.
+        tokens_in (int): Estimated tokens before compaction, summed over calls.
+        tokens_out (int): Estimated tokens after compaction, summed over calls.
+        summaries (int): Summaries built (cache misses only).
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        budget: int | None = None,
+        strategies=None,
+        llm=None,
+        summarizer: str = HISTORY_SUMMARIZER,
+    ):
+        self.agent = agent
+        self.budget = budget if budget is not None else budget_for(agent)
+        if strategies is None:
+            strategies = [s.strip() for s in HISTORY_COMPACTION.split(",")]
+        self.strategies = [s for s in strategies if s in STRATEGIES]
+        self.llm = llm if summarizer == "llm" else None
+        self.calls = 0
+        self.compacted = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.summaries = 0
+        self._summary_cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        """Return call and token counters, including ``tokens_saved``."""
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "calls": self.calls,
+                "compacted": self.compacted,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "tokens_saved": self.tokens_in - self.tokens_out,
+                "summaries": self.summaries,
+            }
+
+    def _plan(self, messages: list[BaseMessage]):
+        """Apply truncate and window; return (head, dropped, tail) with dropped to be summarized."""
+        recent_start = max(0, len(messages) - KEEP_RECENT_MESSAGES)
+        if "truncate" in self.strategies:
+            max_chars = TOOL_RESULT_MAX_TOKENS * 4
+            messages = [
+                message.model_copy(update={"content": _shorten(_text(message.content), max_chars)})
+                if i < recent_start and isinstance(message, ToolMessage) and len(_text(message.content)) > max_chars
+                else message
+                for i, message in enumerate(messages)
+            ]
+            if count_tokens(messages) <= self.budget:
+                return messages, [], []
+
+        if "window" not in self.strategies:
+            return messages, [], []
+        # Pin the original request; the model API also expects a user turn first
+        pinned = 1 if messages and isinstance(messages[0], HumanMessage) else 0
+        head, body = messages[:pinned], messages[pinned:]
+        reserve = SUMMARY_MAX_TOKENS if "summarize" in self.strategies else 0
+        available = self.budget - count_tokens(head) - reserve
+        sizes = [count_tokens([message]) for message in body]
+        start, total = len(body), 0
+        while start > 0 and (len(body) - start < KEEP_RECENT_MESSAGES or total + sizes[start - 1] <= available):
+            start -= 1
+            total += sizes[start]
+        # Tool results must follow the AI message that requested them
+        while start > 0 and start < len(body) and isinstance(body[start], ToolMessage):
+            start -= 1
+        return head, body[:start], body[start:]
+
+    def _extractive_summary(self, dropped: list[BaseMessage]) -> str:
+        lines = []
+        for message in dropped:
+            speaker = message.name or message.type
+            text = _text(message.content).strip()
+            if isinstance(message, AIMessage) and message.tool_calls:
+                text = (text + " " if text else "") + "called " + ", ".join(c["name"] for c in message.tool_calls)
+            if text:
+                lines.append(f"- {speaker}: {_shorten(' '.join(text.split()), SUMMARY_LINE_CHARS)}")
+        return _shorten("\n".join(lines), SUMMARY_MAX_TOKENS * 4)
+
+    def _summary_key(self, dropped: list[BaseMessage]) -> str:
+        digest = hashlib.sha1()
+        for message in dropped:
+            digest.update(message.type.encode())
+            digest.update(_text(message.content).encode())
+        return digest.hexdigest()
+
+    def _cached_summary(self, key: str) -> str | None:
+        with self._lock:
+            summary = self._summary_cache.get(key)
+            if summary is not None:
+                self._summary_cache.move_to_end(key)
+            return summary
+
+    def _store_summary(self, key: str, summary: str):
+        with self._lock:
+            self.summaries += 1
+            self._summary_cache[key] = summary
+            while len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+                self._summary_cache.popitem(last=False)
+
+    def _summary_request(self, dropped: list[BaseMessage]) -> list[BaseMessage]:
+        return [HumanMessage(SUMMARY_PROMPT + self._extractive_summary(dropped))]
+
+    def _begin(self, state: dict):
+        """Return (messages, head, dropped, tail, summary key), or None when no compaction is needed."""
+        messages = convert_to_messages(state["messages"])
+        tokens = count_tokens(messages)
+        if tokens <= self.budget or not self.strategies:
+            with self._lock:
+                self.calls += 1
+                self.tokens_in += tokens
+                self.tokens_out += tokens
+            return None
+        head, dropped, tail = self._plan(messages)
+        key = self._summary_key(dropped) if dropped and "summarize" in self.strategies else None
+        return messages, head, dropped, tail, key
+
+    def _finish(self, state: dict, messages, head, tail, summary: str | None) -> dict:
+        if summary:
+            head = head + [HumanMessage(f"Summary of earlier conversation:\n{summary}", name="history")]
+        compacted = head + tail
+        before, after = count_tokens(messages), count_tokens(compacted)
+        with self._lock:
+            self.calls += 1
+            self.compacted += 1
+            self.tokens_in += before
+            self.tokens_out += after
+        return {**state, "messages": compacted}
+
+    def compact(self, state: dict) -> dict:
+        """Return ``state`` with its messages compacted to the budget."""
+        plan = self._begin(state)
+        if plan is None:
+            return state
+        messages, head, dropped, tail, key = plan
+        summary = None
+        if key is not None:
+            summary = self._cached_summary(key)
+            if summary is None:
+                if self.llm is not None:
+                    summary = _text(self.llm.invoke(self._summary_request(dropped)).content)
+                else:
+                    summary = self._extractive_summary(dropped)
+                self._store_summary(key, summary)
+        return self._finish(state, messages, head, tail, summary)
+
+    async def acompact(self, state: dict) -> dict:
+        """Async variant of ``compact``; the LLM summarizer is awaited."""
+        plan = self._begin(state)
+        if plan is None:
+            return state
+        messages, head, dropped, tail, key = plan
+        summary = None
+        if key is not None:
+            summary = self._cached_summary(key)
+            if summary is None:
+                if self.llm is not None:
+                    summary = _text((await self.llm.ainvoke(self._summary_request(dropped))).content)
+                else:
+                    summary = self._extractive_summary(dropped)
+                self._store_summary(key, summary)
+        return self._finish(state, messages, head, tail, summary)
+
+
+_compactors: dict[str, HistoryCompactor] = {}
+
+
+def compact_history(agent: str, llm=None) -> RunnableLambda:
+    """Return the compaction step for ``agent``, to pipe in front of its prompt."""
+    compactor = _compactors[agent] = HistoryCompactor(agent, llm=llm)
+    return RunnableLambda(compactor.compact, afunc=compactor.acompact, name=f"{agent}_history")
+
+
+def compaction_stats() -> dict:
+    """Return ``HistoryCompactor.stats()`` for every agent, keyed by agent name."""
+    return {agent: compactor.stats() for agent, compactor in _compactors.items()}
@@ -0,0 +1,228 @@
+"""Offline stand-ins for ``ChatBedrockConverse`` and ``BedrockEmbeddings``.
+
+``FakeChatBedrockConverse`` answers from a script instead of calling Bedrock,
+so the real graphs, prompts, tools and routing can run (and be timed) without
+AWS access. Each call sleeps ``latency`` seconds and reports token usage the
+way Converse does. With ``BEDROCK_FAKE=1``, ``common.bedrock.make_chat_model``
+returns one of these for every agent.
+
+The script maps each agent to what it does:
+
+- ``supervisor``: ``first`` maps prompt keywords to the member called first
+  (``default`` otherwise); later hops walk ``workflow`` and then ``FINISH``.
+  A member answering with a question ends the turn.
+- other agents: call ``tool`` with ``args`` first, then reply with ``answer``
+  (``{result}`` is replaced with the start of the tool output).
+
+``BEDROCK_FAKE_SCRIPT`` may point at a JSON file that overrides entries of
+``DEFAULT_SCRIPT``; ``BEDROCK_FAKE_LATENCY`` sets the per-call latency.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from os import environ
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.output_parsers.openai_tools import PydanticToolsParser
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+BEDROCK_FAKE_LATENCY = float(environ.get("BEDROCK_FAKE_LATENCY", "0.05"))
+BEDROCK_FAKE_SCRIPT = environ.get("BEDROCK_FAKE_SCRIPT", "")
+RESULT_PREVIEW_CHARS = 300
+
+DEFAULT_SCRIPT = {
+    "supervisor": {
+        "workflow": ["destination_agent", "flight_agent", "hotel_agent"],
+        "first": {"flight": "flight_agent", "hotel": "hotel_agent"},
+        "default": "destination_agent",
+    },
+    "destination_agent": {
+        "tool": "compare_and_recommend_destination",
+        "args": {},
+        "answer": "{result} Travel date 2025-06-01.",
+    },
+    "flight_agent": {
+        "tool": "search_flights",
+        "args": {"arrival_city": "Lisbon", "date": "2025-06-01"},
+        "answer": "Here are the flights I found: {result}",
+    },
+    "hotel_agent": {
+        "tool": "suggest_hotels",
+        "args": {"city": "Lisbon", "checkin_date": "2025-06-01"},
+        "answer": "Here is a hotel option: {result}",
+    },
+}
+
+
+def load_script(path: str = BEDROCK_FAKE_SCRIPT) -> dict:
+    """Return ``DEFAULT_SCRIPT`` with the agents in the JSON file at ``path`` replaced."""
+    script = dict(DEFAULT_SCRIPT)
+    if path:
+        with open(path) as f:
+            script.update(json.load(f))
+    return script
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatBedrockConverse(BaseChatModel):
+    """Scripted chat model with Bedrock-like latency and usage metadata.
+
+    Attributes:
+        agent (str): Script entry this model plays.
+        calls (int): Calls answered so far (cache hits excluded).
+    """
+
+    agent: str = "supervisor"
+    model_id: str = "fake.bedrock-converse"
+    latency: float = BEDROCK_FAKE_LATENCY
+    script: dict = Field(default_factory=load_script)
+    _calls: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bedrock-converse"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_id": self.model_id, "agent": self.agent}
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def bind_tools(self, tools, *, tool_choice: str | None = None, **kwargs):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        # Converse returns structured output as a forced tool call, and so does the fake
+        name = convert_to_openai_tool(schema)["function"]["name"]
+        return self.bind_tools([schema], tool_choice=name) | PydanticToolsParser(tools=[schema], first_tool_only=True)
+
+    def _route(self, messages) -> str:
+        entry = self.script["supervisor"]
+        workflow = entry["workflow"]
+        user = 0
+        for i, message in enumerate(messages):
+            if isinstance(message, HumanMessage) and message.name not in workflow + ["supervisor"]:
+                user = i
+        ran = [m for m in messages[user:] if m.name in workflow]
+        if not ran:
+            request = _text(messages[user].content).lower() if messages else ""
+            return next((member for word, member in entry["first"].items() if word in request), entry["default"])
+        if _text(ran[-1].content).rstrip().endswith("?"):
+            return "FINISH"
+        done = {m.name for m in ran}
+        later = [m for m in workflow[workflow.index(ran[-1].name) + 1:] if m not in done]
+        return later[0] if later else "FINISH"
+
+    def _reply(self, messages, tools=None, tool_choice=None) -> AIMessage:
+        tool_names = {tool["function"]["name"] for tool in tools or []}
+        if tool_choice:
+            call = {"name": tool_choice, "args": {"next": self._route(messages)}, "id": f"tooluse_{uuid.uuid4().hex[:12]}"}
+            return AIMessage("", tool_calls=[call])
+        entry = self.script.get(self.agent, {})
+        last = messages[-1] if messages else None
+        if isinstance(last, ToolMessage) or not entry.get("tool") or entry["tool"] not in tool_names:
+            result = _text(last.content)[:RESULT_PREVIEW_CHARS] if isinstance(last, ToolMessage) else ""
+            return AIMessage(entry.get("answer", "{result}").format(result=result))
+        call = {"name": entry["tool"], "args": dict(entry.get("args", {})), "id": f"tooluse_{uuid.uuid4().hex[:12]}"}
+        return AIMessage("", tool_calls=[call])
+
+    def _result(self, messages, **kwargs) -> ChatResult:
+        message = self._reply(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+        prompt_tokens = sum(_tokens(_text(m.content)) for m in messages)
+        output_tokens = _tokens(_text(message.content) + json.dumps([c["args"] for c in message.tool_calls]))
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+        }
+        message.response_metadata = {
+            "model_name": self.model_id,
+            "stopReason": "tool_use" if message.tool_calls else "end_turn",
+        }
+        with self._lock:
+            self._calls += 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result(messages, **kwargs)
+
+
+class FakeBedrockEmbeddings(Embeddings):
+    """Deterministic hashed bag-of-words vectors in place of Titan embeddings.
+
+    Texts sharing words get similar vectors, so retrieval code sees realistic
+    neighbours. ``size`` defaults to Titan v1's 1536 dimensions.
+
+    Attributes:
+        calls (int): Embedding requests made (one per document or query).
+    """
+
+    def __init__(self, size: int = 1536, latency: float = BEDROCK_FAKE_LATENCY, model_id: str = "fake.titan-embed"):
+        self.size = size
+        self.latency = latency
+        self.model_id = model_id
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> list[float]:
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _count(self, n: int):
+        with self._lock:
+            self.calls += n
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        # Titan embeds one text per request
+        time.sleep(self.latency * len(texts))
+        self._count(len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency)
+        self._count(1)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency * len(texts))
+        self._count(len(texts))
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        self._count(1)
+        return self._vector(text)
@@ -0,0 +1,321 @@
+"""Two-tier response cache for the agents' chat models.
+
+The models run at ``temperature=0``, so the same model, messages and bound
+tools give a reusable answer. ``get_llm_cache(graph)`` returns a LangChain
+``BaseCache`` to pass as ``ChatBedrockConverse(cache=...)``; every graph
+shares one store with an in-memory LRU tier in front of an SQLite tier that
+expires entries after a TTL and evicts the least recently used ones past a
+size budget.
+
+LangChain keys the cache on the serialized prompt and the model's
+``llm_string`` (model id, parameters and bound tool schemas). The prompt is
+canonicalized first: message ids and response metadata change from run to
+run and would otherwise make every lookup miss.
+
+Caching is off by default. ``LLM_CACHE=1`` enables it for every graph and
+``LLM_CACHE_<GRAPH>=0/1`` (e.g. ``LLM_CACHE_SUPERVISOR``) overrides it per graph.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from os import environ
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from common.metrics import timed_connection
+
+LLM_CACHE_PATH = environ.get("LLM_CACHE_PATH", "data/llm_cache.db")
+LLM_CACHE_TTL_SECONDS = float(environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(environ.get("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_MEMORY_ENTRIES = int(environ.get("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+BUSY_TIMEOUT_SECONDS = 10.0
+# The parts of a message the model actually sees
+CANONICAL_MESSAGE_FIELDS = ("type", "content", "name", "tool_calls", "tool_call_id", "status")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+def canonical_prompt(prompt: str) -> str:
+    """Return ``prompt`` (LangChain's serialized messages) without run-specific fields."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    canonical = []
+    for message in messages:
+        kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+        fields = {k: kwargs[k] for k in CANONICAL_MESSAGE_FIELDS if kwargs.get(k)}
+        canonical.append(fields or message)
+    return json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    return hashlib.sha256(f"{llm_string}\0{canonical_prompt(prompt)}".encode()).hexdigest()
+
+
+def _encode(generations: RETURN_VAL_TYPE) -> bytes:
+    rows = []
+    for generation in generations:
+        row = {"text": generation.text, "generation_info": generation.generation_info}
+        if isinstance(generation, ChatGeneration):
+            row["message"] = message_to_dict(generation.message)
+        rows.append(row)
+    return zlib.compress(json.dumps(rows, default=str).encode())
+
+
+def _decode(value: bytes) -> RETURN_VAL_TYPE:
+    generations = []
+    for row in json.loads(zlib.decompress(value)):
+        if "message" in row:
+            message = messages_from_dict([row["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=row["generation_info"]))
+        else:
+            generations.append(Generation(text=row["text"], generation_info=row["generation_info"]))
+    return generations
+
+
+class ResponseStore:
+    """In-memory LRU in front of an SQLite table of cached responses.
+
+    Attributes:
+        memory_hits (int): Lookups answered from memory.
+        disk_hits (int): Lookups answered from SQLite (and promoted to memory).
+        misses (int): Lookups with no live entry.
+        evictions (int): Rows removed by TTL or the size budget.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        self._disk_bytes: int | None = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the database on first use."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_SECONDS,
+                check_same_thread=False,
+                factory=timed_connection("llm_cache"),
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            local.conn = conn
+            local.pid = os.getpid()
+        return conn
+
+    def stats(self) -> dict:
+        """Return tier hit counts and sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _remember(self, key: str, created_at: float, value: RETURN_VAL_TYPE):
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> RETURN_VAL_TYPE | None:
+        """Return the cached generations for ``key``, or ``None``."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+        conn = self.connection()
+        row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            if row is not None:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                with self._lock:
+                    self.evictions += 1
+            with self._lock:
+                self.misses += 1
+            return None
+        with conn:
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        value = _decode(row[0])
+        self._remember(key, row[1], value)
+        with self._lock:
+            self.disk_hits += 1
+        return value
+
+    def put(self, key: str, value: RETURN_VAL_TYPE):
+        """Store ``value`` in both tiers, then enforce the disk budget."""
+        now = time.time()
+        blob = _encode(value)
+        self._remember(key, now, value)
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, blob, len(blob), now, now)
+            )
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(blob)
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        conn = self.connection()
+        if self._disk_bytes is None or self._disk_bytes > self.max_bytes:
+            # Other processes may share the file, so recount before evicting
+            self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if self._disk_bytes <= self.max_bytes:
+            return
+        with conn:
+            expired = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            # Least recently used first, down to 90% of the budget
+            victims = []
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                if total <= self.max_bytes * 0.9:
+                    break
+                victims.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += expired + len(victims)
+            for (key,) in victims:
+                self._memory.pop(key, None)
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = 0
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM responses")
+
+
+class GraphLLMCache(BaseCache):
+    """One graph's view of the shared ``ResponseStore``, with its own hit counters."""
+
+    def __init__(self, graph: str, store: ResponseStore):
+        self.graph = graph
+        self.store = store
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        value = self.store.get(cache_key(prompt, llm_string))
+        with self._lock:
+            self.lookups += 1
+            self.hits += value is not None
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.store.put(cache_key(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs) -> None:
+        self.store.clear()
+
+    def stats(self) -> dict:
+        """Return this graph's lookups, hits and hit rate."""
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            }
+
+
+_store: ResponseStore | None = None
+_caches: dict[str, GraphLLMCache] = {}
+_lock = threading.Lock()
+
+
+def get_response_store() -> ResponseStore:
+    """Return the process-wide ``ResponseStore``."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = ResponseStore()
+    return _store
+
+
+def llm_cache_enabled(graph: str) -> bool:
+    value = environ.get(f"LLM_CACHE_{graph.upper()}")
+    if value is None:
+        value = environ.get("LLM_CACHE", "")
+    return value == "1"
+
+
+def get_llm_cache(graph: str) -> GraphLLMCache | None:
+    """Return the response cache for ``graph``, or ``None`` when caching is disabled for it."""
+    if not llm_cache_enabled(graph):
+        return None
+    store = get_response_store()
+    with _lock:
+        if graph not in _caches:
+            _caches[graph] = GraphLLMCache(graph, store)
+        return _caches[graph]
+
+
+def llm_cache_stats() -> dict:
+    """Return per-graph hit rates and the shared store's tier counters."""
+    return {
+        "graphs": {graph: cache.stats() for graph, cache in _caches.items()},
+        "store": _store.stats() if _store is not None else None,
+    }
@@ -0,0 +1,356 @@
+"""Latency, token and query metrics for the agent graphs.
+
+``MetricsCallbackHandler`` is a LangChain callback that times every graph
+node (labelled by its subgraph path, e.g. ``flight_agent/tools``), counts LLM
+calls and their ``usage_metadata`` tokens per agent, and times tool calls.
+SQLite connections opened with ``factory=timed_connection(db)`` report query
+execution time. Everything lands in the process-wide ``MetricsRegistry``
+(rendered in Prometheus text format by ``app.py``'s ``/metrics``), and each
+handler also keeps a summary of its own run.
+
+``METRICS_ENABLED=0`` turns the graph instrumentation off.
+"""
+
+import bisect
+import contextvars
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from os import environ
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+METRICS_ENABLED = environ.get("METRICS_ENABLED", "1") != "0"
+METRIC_PREFIX = "travel_"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = defaultdict(float)
+
+    def inc(self, *labels, amount: float = 1.0):
+        self.values[labels] += amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}_total{_labels(self.labels, labels)} {value:g}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...], buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self.values = {}
+
+    def observe(self, value: float, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket = _labels(self.labels, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {total:.6f}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Process-wide metrics for the graphs, tools and SQLite databases."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        p = METRIC_PREFIX
+        self.node_duration = Histogram(f"{p}node_duration_seconds", "Graph node wall time.", ("node",))
+        self.llm_calls = Counter(f"{p}llm_calls", "Chat model calls.", ("agent", "model"))
+        self.llm_tokens = Counter(f"{p}llm_tokens", "Tokens reported in usage_metadata.", ("agent", "model", "kind"))
+        self.llm_duration = Histogram(f"{p}llm_duration_seconds", "Chat model call latency.", ("agent",))
+        self.tool_calls = Counter(f"{p}tool_calls", "Tool calls.", ("tool", "status"))
+        self.tool_duration = Histogram(f"{p}tool_duration_seconds", "Tool call latency.", ("tool",))
+        self.sqlite_duration = Histogram(
+            f"{p}sqlite_query_duration_seconds", "SQLite statement execution time.", ("db",), QUERY_BUCKETS
+        )
+        self._metrics = [
+            self.node_duration,
+            self.llm_calls,
+            self.llm_tokens,
+            self.llm_duration,
+            self.tool_calls,
+            self.tool_duration,
+            self.sqlite_duration,
+        ]
+
+    def observe(self, metric, value: float, *labels):
+        with self._lock:
+            metric.observe(value, *labels)
+
+    def inc(self, metric, *labels, amount: float = 1.0):
+        with self._lock:
+            metric.inc(*labels, amount=amount)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for metric in self._metrics:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+_registry: MetricsRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide ``MetricsRegistry``."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+# The handler of the run in progress, so SQLite time can be attributed to it
+current_handler: contextvars.ContextVar["MetricsCallbackHandler | None"] = contextvars.ContextVar(
+    "current_handler", default=None
+)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records node, LLM and tool metrics for one run into the registry and its own summary."""
+
+    # Timings are taken in the callback, so run it where the event happens
+    run_inline = True
+
+    def __init__(self, registry: MetricsRegistry | None = None):
+        self.registry = registry or get_metrics_registry()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._open = {}
+        self._open_nodes = {}
+        self._active_nodes = set()
+        self._nodes = defaultdict(lambda: {"calls": 0, "ms": 0.0})
+        self._llm = defaultdict(lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0, "ms": 0.0})
+        self._tools = defaultdict(lambda: {"calls": 0, "errors": 0, "ms": 0.0})
+        self._sqlite = defaultdict(lambda: {"queries": 0, "ms": 0.0})
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        ns = metadata.get("langgraph_checkpoint_ns")
+        if not ns or kwargs.get("name") != metadata.get("langgraph_node"):
+            return
+        with self._lock:
+            # A node runs inside several wrapper runnables; time the outermost one
+            if ns not in self._active_nodes:
+                self._active_nodes.add(ns)
+                self._open_nodes[run_id] = (ns, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close_node(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close_node(run_id)
+
+    def _close_node(self, run_id):
+        with self._lock:
+            entry = self._open_nodes.pop(run_id, None)
+            if entry is None:
+                return
+            ns, start = entry
+            self._active_nodes.discard(ns)
+            elapsed = time.perf_counter() - start
+            node = "/".join(part.split(":")[0] for part in ns.split("|"))
+            self._nodes[node]["calls"] += 1
+            self._nodes[node]["ms"] += elapsed * 1000
+        self.registry.observe(self.registry.node_duration, elapsed, node)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        agent = (metadata or {}).get("langgraph_node", "unknown")
+        with self._lock:
+            self._open[run_id] = (agent, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        agent, start = entry
+        elapsed = time.perf_counter() - start
+        input_tokens = output_tokens = 0
+        model = "unknown"
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                model = (getattr(message, "response_metadata", None) or {}).get("model_name", model)
+        with self._lock:
+            llm = self._llm[agent]
+            llm["calls"] += 1
+            llm["input_tokens"] += input_tokens
+            llm["output_tokens"] += output_tokens
+            llm["ms"] += elapsed * 1000
+        registry = self.registry
+        registry.inc(registry.llm_calls, agent, model)
+        registry.inc(registry.llm_tokens, agent, model, "input", amount=input_tokens)
+        registry.inc(registry.llm_tokens, agent, model, "output", amount=output_tokens)
+        registry.observe(registry.llm_duration, elapsed, agent)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._open.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        with self._lock:
+            self._open[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._close_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._close_tool(run_id, "error")
+
+    def _close_tool(self, run_id, status: str):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+            if entry is None:
+                return
+            name, start = entry
+            elapsed = time.perf_counter() - start
+            tool = self._tools[name]
+            tool["calls"] += 1
+            tool["errors"] += status == "error"
+            tool["ms"] += elapsed * 1000
+        self.registry.inc(self.registry.tool_calls, name, status)
+        self.registry.observe(self.registry.tool_duration, elapsed, name)
+
+    def record_query(self, db: str, elapsed: float):
+        with self._lock:
+            self._sqlite[db]["queries"] += 1
+            self._sqlite[db]["ms"] += elapsed * 1000
+
+    def summary(self) -> dict:
+        """Return this run's totals: wall time, nodes, LLM calls and tokens, tools and SQLite."""
+
+        def rounded(table):
+            return {key: {k: round(v, 2) if isinstance(v, float) else v for k, v in row.items()} for key, row in table.items()}
+
+        with self._lock:
+            return {
+                "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+                "nodes": rounded(self._nodes),
+                "llm": rounded(self._llm),
+                "tokens": {
+                    "input": sum(row["input_tokens"] for row in self._llm.values()),
+                    "output": sum(row["output_tokens"] for row in self._llm.values()),
+                },
+                "tools": rounded(self._tools),
+                "sqlite": rounded(self._sqlite),
+            }
+
+
+@contextmanager
+def instrumented(config: dict, track_queries: bool = True):
+    """Add a ``MetricsCallbackHandler`` to ``config["callbacks"]`` for one run and yield it.
+
+    With ``track_queries`` the handler also collects SQLite time for the run
+    (the run must finish in the calling context). Yields ``None`` when
+    ``METRICS_ENABLED=0``.
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+    handler = MetricsCallbackHandler()
+    config["callbacks"] = list(config.get("callbacks") or []) + [handler]
+    if not track_queries:
+        yield handler
+        return
+    token = current_handler.set(handler)
+    try:
+        yield handler
+    finally:
+        current_handler.reset(token)
+
+
+def _record_query(db: str, start: float):
+    elapsed = time.perf_counter() - start
+    registry = get_metrics_registry()
+    registry.observe(registry.sqlite_duration, elapsed, db)
+    handler = current_handler.get()
+    if handler is not None:
+        handler.record_query(db, elapsed)
+
+
+_connection_classes: dict[str, type] = {}
+
+
+def timed_connection(db: str) -> type:
+    """Return an ``sqlite3.Connection`` subclass (for ``sqlite3.connect(factory=...)``) that times statements."""
+    cls = _connection_classes.get(db)
+    if cls is not None:
+        return cls
+
+    class TimedConnection(sqlite3.Connection):
+        def execute(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().execute(*args)
+            finally:
+                _record_query(db, start)
+
+        def executemany(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().executemany(*args)
+            finally:
+                _record_query(db, start)
+
+        def executescript(self, *args):
+            start = time.perf_counter()
+            try:
+                return super().executescript(*args)
+            finally:
+                _record_query(db, start)
+
+    TimedConnection.__name__ = f"TimedConnection[{db}]"
+    return _connection_classes.setdefault(db, TimedConnection)
@@ -0,0 +1,121 @@
+"""Process-wide traveler profile store shared by the agent tools."""
+
+import os
+import threading
+from os import environ
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TRAVEL_DATA_COLUMNS = [
+    "Id",
+    "Name",
+    "Current_Location",
+    "Age",
+    "Past_Travel_Destinations",
+    "Number_of_Trips",
+    "Flight_Number",
+    "Departure_City",
+    "Arrival_City",
+    "Flight_Date",
+]
+
+DEFAULT_TRAVEL_DATA_PATH = environ.get(
+    "TRAVEL_DATA_PATH",
+    str(Path(__file__).resolve().parent.parent / "destination_agent" / "synthetic_travel_data.csv"),
+)
+
+
+class ProfileSnapshot:
+    """Immutable view of the traveler file as of one load.
+
+    Attributes:
+        frame (pd.DataFrame): Traveler rows (rows without an ``Id`` are dropped). Treat as read-only.
+        positions (dict): Row position of the first row for each ``Id``, keyed by integer id.
+        mtime_ns (int | None): File mtime at load time, ``None`` if the file was missing.
+    """
+
+    __slots__ = ("frame", "positions", "mtime_ns", "_columns")
+
+    def __init__(self, frame: pd.DataFrame, mtime_ns: int | None):
+        self.frame = frame
+        self.mtime_ns = mtime_ns
+        ids = frame["Id"].to_numpy()
+        first = ~pd.Series(ids).duplicated().to_numpy()
+        self.positions = dict(zip(ids[first].astype("int64").tolist(), np.flatnonzero(first).tolist()))
+        self._columns = {column: frame[column].to_numpy() for column in frame.columns}
+
+    def get(self, user_id) -> dict | None:
+        """Return the profile row for ``user_id`` as a dict, or ``None`` if unknown."""
+        try:
+            position = self.positions.get(user_id)
+        except TypeError:
+            return None
+        if position is None:
+            return None
+        return {
+            column: values[position : position + 1].tolist()[0]
+            for column, values in self._columns.items()
+        }
+
+
+class TravelProfileStore:
+    """Thread-safe cache of the traveler CSV.
+
+    The file is parsed once per process and re-parsed only when its mtime
+    changes, so tool calls pay an ``os.stat`` instead of a full ``read_csv``.
+    """
+
+    def __init__(self, file_path: str = DEFAULT_TRAVEL_DATA_PATH):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._snapshot: ProfileSnapshot | None = None
+
+    def _stat_mtime(self) -> int | None:
+        try:
+            return os.stat(self.file_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> pd.DataFrame:
+        try:
+            df = pd.read_csv(self.file_path)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=TRAVEL_DATA_COLUMNS)
+        return df[df["Id"].notna()].reset_index(drop=True)
+
+    def snapshot(self) -> ProfileSnapshot:
+        """Return the current snapshot, reloading it if the file changed on disk."""
+        mtime_ns = self._stat_mtime()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.mtime_ns != mtime_ns:
+                snapshot = ProfileSnapshot(self._read(), mtime_ns)
+                self._snapshot = snapshot
+        return snapshot
+
+    def get(self, user_id) -> dict | None:
+        """Return the profile for ``user_id`` or ``None`` if unknown."""
+        return self.snapshot().get(user_id)
+
+    def frame(self) -> pd.DataFrame:
+        """Return the traveler DataFrame. Do not mutate it, it is shared."""
+        return self.snapshot().frame
+
+
+_stores: dict[str, TravelProfileStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_profile_store(file_path: str | None = None) -> TravelProfileStore:
+    """Return the process-wide store for ``file_path`` (defaults to ``TRAVEL_DATA_PATH``)."""
+    key = os.path.abspath(file_path or DEFAULT_TRAVEL_DATA_PATH)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(key, TravelProfileStore(key))
+    return store
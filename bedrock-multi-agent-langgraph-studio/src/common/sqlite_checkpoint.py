@@ -0,0 +1,462 @@
+"""Durable SQLite checkpointer with compressed msgpack payloads.
+
+Checkpoints, channel values and pending writes live in one SQLite file so
+conversations survive a restart. Channel values are stored once per version
+(as ``MemorySaver`` does), so a long thread does not rewrite its whole
+history on every step. Payloads are msgpack from the default serializer,
+compressed with zstd when ``zstandard`` is installed and zlib otherwise.
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import AsyncIterator, Iterator, Sequence
+from os import environ
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from common.metrics import timed_connection
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+CHECKPOINT_DB_PATH = environ.get("CHECKPOINT_DB_PATH", "data/checkpoints.db")
+# Payloads smaller than this are stored uncompressed
+COMPRESS_MIN_BYTES = 512
+BUSY_TIMEOUT_SECONDS = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+
+class CompressedSerializer:
+    """Wrap a serializer and compress large payloads.
+
+    The codec is appended to the type tag (``msgpack+zstd``), so rows written
+    with either codec, or uncompressed, can always be read back.
+    """
+
+    def __init__(self, serde: SerializerProtocol, min_bytes: int = COMPRESS_MIN_BYTES):
+        self.serde = serde
+        self.min_bytes = min_bytes
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self._local = threading.local()
+
+    def _zstd(self):
+        # zstandard contexts are not thread-safe
+        local = self._local
+        if not hasattr(local, "compressor"):
+            local.compressor = zstandard.ZstdCompressor(level=3)
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local.compressor, local.decompressor
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_bytes:
+            return type_, data
+        if self.codec == "zstd":
+            return f"{type_}+zstd", self._zstd()[0].compress(data)
+        return f"{type_}+zlib", zlib.compress(data, 6)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        type_, _, codec = type_.partition("+")
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Checkpoint was written with zstd; install zstandard to read it")
+            payload = self._zstd()[1].decompress(payload)
+        elif codec == "zlib":
+            payload = zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """Checkpointer that persists every thread in a local SQLite file.
+
+    Each thread keeps its own WAL-mode connection. The async methods run the
+    sync ones in a worker thread so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB_PATH, *, serde: SerializerProtocol | None = None):
+        super().__init__(serde=serde)
+        self.serde = CompressedSerializer(self.serde)
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: set[sqlite3.Connection] = set()
+        self._generation = 0
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the database on first use."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.pid != os.getpid() or local.generation != self._generation:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=BUSY_TIMEOUT_SECONDS,
+                check_same_thread=False,
+                factory=timed_connection("checkpoints"),
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            with self._lock:
+                self._connections.add(conn)
+            local.conn = conn
+            local.pid = os.getpid()
+            local.generation = self._generation
+        return conn
+
+    def close_all(self):
+        """Close every connection opened by this saver, across all threads."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+            self._generation += 1
+        for conn in connections:
+            conn.close()
+
+    def _tuple(self, conn, thread_id, checkpoint_ns, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b, metadata_type, metadata_b = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        writes = conn.execute(
+            "SELECT task_id, channel, type, blob, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[4], w[0], w[5]))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_b)),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, b))) for task_id, channel, t, b, _, _ in writes],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        conn = self.connection()
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        if checkpoint_id := get_checkpoint_id(config):
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            # Resume: the newest checkpoint is the last key of the primary key index
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._tuple(conn, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        conn = self.connection()
+        sql = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY checkpoint_id DESC"
+        for thread_id, checkpoint_ns, *row in conn.execute(sql, params).fetchall():
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple(conn, thread_id, checkpoint_ns, row)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        saved = checkpoint.copy()
+        values: dict[str, Any] = saved.pop("channel_values")  # type: ignore[misc]
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version))
+            + (self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b""))
+            for channel, version in new_versions.items()
+        ]
+        conn = self.connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    *self.serde.dumps_typed(saved),
+                    *self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+                    time.time(),
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts) overwrite; regular writes are idempotent
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        conn = self.connection()
+        with conn:
+            conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        conn = self.connection()
+        with conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def file_size(self) -> int:
+        """Return the on-disk size of the database, including its write-ahead log."""
+        return sum(
+            os.path.getsize(self.path + suffix)
+            for suffix in ("", "-wal")
+            if os.path.exists(self.path + suffix)
+        )
+
+    def vacuum(self, max_age_seconds: float | None = None, max_bytes: int | None = None) -> dict:
+        """Delete whole threads by age and size, then compact the file.
+
+        Threads whose newest checkpoint is older than ``max_age_seconds`` are
+        deleted first; then the least recently updated threads are deleted
+        until the stored payloads fit in ``max_bytes``.
+
+        Returns:
+            dict: Threads deleted and kept, and the file size before and after.
+        """
+        conn = self.connection()
+        size_before = self.file_size()
+        # thread_id -> [last update, payload bytes], oldest first
+        threads = {
+            thread_id: [updated, size]
+            for thread_id, updated, size in conn.execute(
+                "SELECT thread_id, MAX(created_at), SUM(LENGTH(checkpoint) + LENGTH(metadata)) "
+                "FROM checkpoints GROUP BY thread_id ORDER BY 2"
+            )
+        }
+        for table in ("blobs", "writes"):
+            for thread_id, size in conn.execute(f"SELECT thread_id, SUM(LENGTH(blob)) FROM {table} GROUP BY thread_id"):
+                if thread_id in threads:
+                    threads[thread_id][1] += size or 0
+        doomed = []
+        if max_age_seconds is not None:
+            cutoff = time.time() - max_age_seconds
+            doomed = [thread_id for thread_id, (updated, _) in threads.items() if updated < cutoff]
+        if max_bytes is not None:
+            total = sum(size for thread_id, (_, size) in threads.items() if thread_id not in doomed)
+            for thread_id, (_, size) in threads.items():
+                if total <= max_bytes:
+                    break
+                if thread_id not in doomed:
+                    doomed.append(thread_id)
+                    total -= size
+        for thread_id in doomed:
+            self.delete_thread(thread_id)
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "deleted_threads": len(doomed),
+            "kept_threads": len(threads) - len(doomed),
+            "bytes_before": size_before,
+            "bytes_after": self.file_size(),
+        }
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same version format as MemorySaver, so checkpoints can move between them
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+_savers: dict[str, SQLiteCheckpointSaver] = {}
+_savers_lock = threading.Lock()
+
+
+def get_sqlite_checkpointer(path: str | None = None) -> SQLiteCheckpointSaver:
+    """Return the process-wide saver for ``path`` (defaults to ``CHECKPOINT_DB_PATH``)."""
+    key = os.path.abspath(path or CHECKPOINT_DB_PATH)
+    saver = _savers.get(key)
+    if saver is None:
+        with _savers_lock:
+            saver = _savers.setdefault(key, SQLiteCheckpointSaver(key))
+    return saver
@@ -0,0 +1,142 @@
+"""Precomputed cohort index for destination recommendations.
+
+Travelers are grouped by ``Current_Location`` and bucketed by ``Age``. Each
+location keeps prefix sums of destination counts over its sorted age buckets,
+so the ``±5`` year cohort of a traveler is two binary searches and one vector
+subtraction instead of a DataFrame scan and a fresh ``Counter``.
+"""
+
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from common.profiles import ProfileSnapshot, get_profile_store
+
+COHORT_AGE_SPAN = 5
+
+
+def explode_destinations(frame: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten ``Past_Travel_Destinations`` into one entry per (row, destination).
+
+    Entries are in file order, so an entry's ordinal is its position in the
+    ``Counter`` the original tool built.
+
+    Returns:
+        tuple: Row position of each entry, destination code of each entry and the destination names.
+    """
+    past = frame["Past_Travel_Destinations"]
+    has_past = past.notna().to_numpy()
+    past = past[has_past].astype(str).tolist()
+    rows = np.repeat(np.flatnonzero(has_past), [p.count(", ") + 1 for p in past])
+    dest_codes, destinations = pd.factorize(
+        np.array(", ".join(past).split(", ") if past else [], dtype=object)
+    )
+    return rows, dest_codes, destinations
+
+
+class _LocationCohorts:
+    __slots__ = ("ages", "prefix", "first_seen")
+
+    def __init__(self, ages: np.ndarray, counts: np.ndarray, first_seen: np.ndarray):
+        # ages: sorted distinct ages, counts/first_seen: one row per age bucket
+        self.ages = ages
+        self.prefix = np.zeros((len(ages) + 1, counts.shape[1]), dtype=np.int64)
+        np.cumsum(counts, axis=0, out=self.prefix[1:])
+        self.first_seen = first_seen
+
+
+class CohortIndex:
+    """Destination counts per (location, age) with O(log n) cohort queries.
+
+    ``recommend`` returns exactly what ``compare_and_recommend_destination``
+    used to compute with ``Counter.most_common(1)``, including its tie-break:
+    among equally frequent destinations the one seen first in file order wins.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame[
+            frame["Current_Location"].notna() & frame["Age"].notna()
+        ].reset_index(drop=True)
+        rows, dest_codes, self.destinations = explode_destinations(frame)
+        self.destination_ids = {d: i for i, d in enumerate(self.destinations)}
+        n_dest = len(self.destinations)
+
+        loc_codes, locations = pd.factorize(frame["Current_Location"].to_numpy())
+        ages = frame["Age"].to_numpy(dtype=np.float64)
+        self.locations: dict[str, _LocationCohorts] = {}
+
+        row_loc = loc_codes[rows]
+        row_age = ages[rows]
+        for loc_code, location in enumerate(locations):
+            loc_ages = np.unique(ages[loc_codes == loc_code])
+            in_loc = row_loc == loc_code
+            bucket = np.searchsorted(loc_ages, row_age[in_loc])
+            cell = bucket * n_dest + dest_codes[in_loc]
+            counts = np.bincount(cell, minlength=len(loc_ages) * n_dest).reshape(
+                len(loc_ages), n_dest
+            )
+            # Ordinal of the first occurrence of each destination per age bucket,
+            # used to reproduce Counter's insertion-order tie-break.
+            first_seen = np.full(len(loc_ages) * n_dest, np.iinfo(np.int64).max)
+            cells, first = np.unique(cell, return_index=True)
+            first_seen[cells] = np.flatnonzero(in_loc)[first]
+            self.locations[location] = _LocationCohorts(
+                loc_ages, counts, first_seen.reshape(len(loc_ages), n_dest)
+            )
+
+    def cohort_bounds(self, location: str, age: float) -> tuple[_LocationCohorts, int, int] | None:
+        """Return the location cohorts and the age-bucket range for a traveler."""
+        cohorts = self.locations.get(location)
+        if cohorts is None or age is None or math.isnan(age):
+            return None
+        lo = int(np.searchsorted(cohorts.ages, age - COHORT_AGE_SPAN, side="left"))
+        hi = int(np.searchsorted(cohorts.ages, age + COHORT_AGE_SPAN, side="right"))
+        return cohorts, lo, hi
+
+    def cohort_counts(self, location: str, age: float) -> np.ndarray:
+        """Return destination counts for travelers in ``location`` aged ``age ± 5``."""
+        bounds = self.cohort_bounds(location, age)
+        if bounds is None:
+            return np.zeros(len(self.destinations), dtype=np.int64)
+        cohorts, lo, hi = bounds
+        return cohorts.prefix[hi] - cohorts.prefix[lo]
+
+    def recommend(self, location: str, age: float, exclude) -> str | None:
+        """Return the most common cohort destination not in ``exclude``, or ``None``."""
+        bounds = self.cohort_bounds(location, age)
+        if bounds is None:
+            return None
+        cohorts, lo, hi = bounds
+        counts = cohorts.prefix[hi] - cohorts.prefix[lo]
+        for dest in exclude:
+            dest_id = self.destination_ids.get(dest)
+            if dest_id is not None:
+                counts[dest_id] = 0
+        best = counts.max(initial=0)
+        if best <= 0:
+            return None
+        tied = np.flatnonzero(counts == best)
+        if len(tied) > 1:
+            first_seen = cohorts.first_seen[lo:hi, tied].min(axis=0)
+            tied = tied[[int(np.argmin(first_seen))]]
+        return self.destinations[tied[0]]
+
+
+_cache_lock = threading.Lock()
+_cached: tuple[ProfileSnapshot, CohortIndex] | None = None
+
+
+def get_cohort_index(snapshot: ProfileSnapshot | None = None) -> CohortIndex:
+    """Return the cohort index for ``snapshot``, rebuilding it when the profile file changes."""
+    global _cached
+    if snapshot is None:
+        snapshot = get_profile_store().snapshot()
+    cached = _cached
+    if cached is not None and cached[0] is snapshot:
+        return cached[1]
+    with _cache_lock:
+        if _cached is None or _cached[0] is not snapshot:
+            _cached = (snapshot, CohortIndex(snapshot.frame))
+        return _cached[1]
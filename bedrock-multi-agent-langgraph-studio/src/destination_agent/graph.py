@@ -1,25 +1,16 @@
 """This "graph" is a flight agent graph"""
 
-from langchain_aws import ChatBedrockConverse
-import boto3
 from langgraph.graph import StateGraph, START, MessagesState
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from common.bedrock import make_chat_model
+from common.checkpoint import make_checkpointer
+from common.compaction import compact_history
 from destination_agent.tools import compare_and_recommend_destination
 from pydantic import BaseModel
-from os import environ
 
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")
-
-llm = ChatBedrockConverse(
-    model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-    temperature=0,
-    max_tokens=None,
-    client=bedrock_client,
-    # other params...
-)
+llm = make_chat_model("destination_agent")
 tools = [compare_and_recommend_destination]
 llm_with_tools = llm.bind_tools(tools)
 
@@ -49,7 +40,7 @@ prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-destination_agent_chain = prompt | llm_with_tools
+destination_agent_chain = compact_history("destination_agent", llm) | prompt | llm_with_tools
 
 
 def destination_agent(state):
@@ -57,8 +48,13 @@ def destination_agent(state):
     return {"messages": [result]}
 
 
+async def adestination_agent(state):
+    result = await destination_agent_chain.ainvoke(state)
+    return {"messages": [result]}
+
+
 graph_builder = StateGraph(MessagesState, config_schema=RunnableConfig)
-graph_builder.add_node("destination_agent", destination_agent)
+graph_builder.add_node("destination_agent", RunnableLambda(destination_agent, afunc=adestination_agent))
 
 tool_node = ToolNode(tools=tools)
 graph_builder.add_node("tools", tool_node)
@@ -70,9 +66,5 @@ graph_builder.add_conditional_edges(
 graph_builder.add_edge("tools", "destination_agent")
 graph_builder.add_edge(START, "destination_agent")
 
-if environ.get("env","") == "":
-    memory = MemorySaver()
-    graph = graph_builder.compile(checkpointer=memory)
-else:
-    graph = graph_builder.compile()
+graph = graph_builder.compile(checkpointer=make_checkpointer())
 graph.name = "PlannerGraph"
@@ -1,29 +1,157 @@
+import os
+import threading
+from os import environ
+import numpy as np
 import pandas as pd
-from collections import Counter
 from langchain_core.tools import tool
 from langchain_core.runnables.config import RunnableConfig
+from common.profiles import DEFAULT_TRAVEL_DATA_PATH, ProfileSnapshot, get_profile_store
+from destination_agent.cohort import COHORT_AGE_SPAN, explode_destinations, get_cohort_index
 
+RECOMMENDATIONS_PATH = environ.get(
+    "RECOMMENDATIONS_PATH",
+    os.path.join(os.path.dirname(DEFAULT_TRAVEL_DATA_PATH), "destination_recommendations.csv"),
+)
 
-def read_travel_data(file_path: str = "/app/src/destination_agent/synthetic_travel_data.csv") -> pd.DataFrame:
-    """Read travel data from CSV file"""
+
+def read_travel_data(file_path: str | None = None) -> pd.DataFrame:
+    """Read travel data from the shared profile store"""
+    return get_profile_store(file_path).frame()
+
+
+def recommend_destinations_bulk(snapshot: ProfileSnapshot | None = None, chunk_size: int = 65536) -> pd.DataFrame:
+    """Compute the destination recommendation for every traveler at once.
+
+    Rows are encoded as a sparse row x destination count matrix. Counts are
+    summed per (location, age) group with a sparse indicator product, each
+    group's ±5 year cohort is a prefix-sum difference, and the per-traveler
+    exclusions and Counter tie-break are applied with array masks in chunks.
+    Gives the same answer as ``compare_and_recommend_destination`` per user.
+
+    Args:
+        snapshot (ProfileSnapshot, optional): Travelers to score. Defaults to the shared profile store.
+        chunk_size (int): Travelers scored per dense block.
+
+    Returns:
+        pd.DataFrame: ``Id`` and ``Recommended_Destination`` (``None`` if there is nothing to recommend).
+    """
+    import scipy.sparse as sp
+
+    if snapshot is None:
+        snapshot = get_profile_store().snapshot()
+    frame = snapshot.frame
+    n_rows = len(frame)
+    rows, dest_codes, destinations = explode_destinations(frame)
+    n_dest = len(destinations)
+    counts = sp.csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (rows, dest_codes)), shape=(n_rows, n_dest)
+    )
+
+    # (location, age) groups sorted by location then age
+    valid = (frame["Current_Location"].notna() & frame["Age"].notna()).to_numpy()
+    loc_codes, locations = pd.factorize(frame["Current_Location"], sort=True)
+    ages = frame["Age"].to_numpy(dtype=np.float64)
+    group_of_row = np.full(n_rows, -1, dtype=np.int64)
+    if valid.any():
+        age_min = ages[valid].min()
+        width = ages[valid].max() - age_min + 2 * COHORT_AGE_SPAN + 1
+        row_keys = loc_codes[valid] * width + (ages[valid] - age_min)
+        group_keys, group_of_row[valid] = np.unique(row_keys, return_inverse=True)
+    else:
+        group_keys = np.zeros(0)
+    n_groups = len(group_keys)
+    lo = np.searchsorted(group_keys, group_keys - COHORT_AGE_SPAN, side="left")
+    hi = np.searchsorted(group_keys, group_keys + COHORT_AGE_SPAN, side="right")
+
+    indicator = sp.csr_matrix(
+        (np.ones(valid.sum(), dtype=np.int64), (group_of_row[valid], np.flatnonzero(valid))),
+        shape=(n_groups, n_rows),
+    )
+    prefix = np.zeros((n_groups + 1, n_dest), dtype=np.int64)
+    np.cumsum((indicator @ counts).toarray(), axis=0, out=prefix[1:])
+    cohort_counts = prefix[hi] - prefix[lo]
+
+    # First file-order ordinal of each destination per group and per cohort
+    no_ordinal = np.iinfo(np.int64).max
+    first_seen = np.full(n_groups * n_dest, no_ordinal)
+    entry_groups = group_of_row[rows]
+    in_group = entry_groups >= 0
+    cells, first = np.unique(entry_groups[in_group] * n_dest + dest_codes[in_group], return_index=True)
+    first_seen[cells] = np.flatnonzero(in_group)[first]
+    first_seen = first_seen.reshape(n_groups, n_dest)
+    cohort_first_seen = np.empty_like(first_seen)
+    for group in range(n_groups):
+        cohort_first_seen[group] = first_seen[lo[group] : hi[group]].min(axis=0)
+
+    # One scored row per traveler: the first row of each Id
+    user_ids = np.fromiter(snapshot.positions.keys(), dtype=np.int64, count=len(snapshot.positions))
+    user_rows = np.fromiter(snapshot.positions.values(), dtype=np.int64, count=len(snapshot.positions))
+    destination_ids = {d: i for i, d in enumerate(destinations)}
+    location_dest = np.array([destination_ids.get(loc, -1) for loc in locations], dtype=np.int64)
+    recommended = np.full(len(user_rows), None, dtype=object)
+
+    for start in range(0, len(user_rows), chunk_size):
+        chunk_rows = user_rows[start : start + chunk_size]
+        groups = group_of_row[chunk_rows]
+        scored = np.flatnonzero(groups >= 0)
+        if not len(scored) or not n_dest:
+            continue
+        scores = cohort_counts[groups[scored]]
+        # Exclude each traveler's past destinations and current location
+        past_r, past_c = counts[chunk_rows[scored]].nonzero()
+        scores[past_r, past_c] = 0
+        home = location_dest[loc_codes[chunk_rows[scored]]]
+        has_home = home >= 0
+        scores[np.flatnonzero(has_home), home[has_home]] = 0
+
+        best = scores.max(axis=1, initial=0)
+        tie_keys = np.where(scores == best[:, None], cohort_first_seen[groups[scored]], no_ordinal)
+        choice = tie_keys.argmin(axis=1)
+        hit = best > 0
+        recommended[start + scored[hit]] = destinations[choice[hit]]
+
+    return pd.DataFrame(
+        {"Id": user_ids, "Recommended_Destination": pd.Series(recommended, dtype=object)}
+    )
+
+
+def materialize_recommendations(output_path: str = RECOMMENDATIONS_PATH, snapshot: ProfileSnapshot | None = None) -> pd.DataFrame:
+    """Write the ``Id -> Recommended_Destination`` table read by the tool.
+
+    The file is replaced atomically. The tool ignores it once the traveler
+    file is newer than the table.
+    """
+    table = recommend_destinations_bulk(snapshot)
+    tmp_path = f"{output_path}.tmp"
+    table.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return table
+
+
+_materialized_lock = threading.Lock()
+_materialized: tuple[int, dict] | None = None
+
+
+def read_materialized_recommendations(snapshot: ProfileSnapshot, path: str = RECOMMENDATIONS_PATH) -> dict | None:
+    """Return the materialized ``{user_id: destination or ""}`` table, or ``None`` if absent or stale."""
+    global _materialized
     try:
-        df = pd.read_csv(file_path)
-        return df
+        mtime_ns = os.stat(path).st_mtime_ns
     except FileNotFoundError:
-        return pd.DataFrame(
-            columns=[
-                "Id",
-                "Name",
-                "Current_Location",
-                "Age",
-                "Past_Travel_Destinations",
-                "Number_of_Trips",
-                "Flight_Number",
-                "Departure_City",
-                "Arrival_City",
-                "Flight_Date",
-            ]
-        )
+        return None
+    if snapshot.mtime_ns is not None and mtime_ns < snapshot.mtime_ns:
+        return None
+    cached = _materialized
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    with _materialized_lock:
+        if _materialized is None or _materialized[0] != mtime_ns:
+            table = pd.read_csv(path, dtype={"Recommended_Destination": str}, keep_default_na=False)
+            _materialized = (
+                mtime_ns,
+                dict(zip(table["Id"].tolist(), table["Recommended_Destination"].tolist())),
+            )
+        return _materialized[1]
 
 
 @tool
@@ -37,42 +165,32 @@ def compare_and_recommend_destination(config: RunnableConfig) -> str:
 
     """
 
-    df = read_travel_data()
+    snapshot = get_profile_store().snapshot()
     print(f"config: {config}")
     user_id = config.get("configurable", {})["configurable"]["user_id"]
     print(user_id)
 
-    if user_id not in df["Id"].values:
+    user_data = snapshot.get(user_id)
+    if user_data is None:
         return "User not found in the travel database."
 
-    user_data = df[df["Id"] == user_id].iloc[0]
     current_location = user_data["Current_Location"]
     age = user_data["Age"]
     past_destinations = user_data["Past_Travel_Destinations"].split(", ")
 
-    # Get all past destinations of users with similar age (±5 years) and same current location
-    similar_users = df[
-        (df["Current_Location"] == current_location)
-        & (df["Age"].between(age - 5, age + 5))
-    ]
-    all_destinations = [
-        dest
-        for user_dests in similar_users["Past_Travel_Destinations"].str.split(", ")
-        for dest in user_dests
-    ]
-
-    # Count occurrences of each destination
-    destination_counts = Counter(all_destinations)
-
-    # Remove user's current location and past destinations from recommendations
-    for dest in [current_location] + past_destinations:
-        if dest in destination_counts:
-            del destination_counts[dest]
-
-    if not destination_counts:
-        return f"No new recommendations found for users in {current_location} with similar age."
+    # Most common past destination of users with similar age (±5 years) and same
+    # current location, excluding user's current location and past destinations.
+    # Prefer the precomputed table from materialize_recommendations when present.
+    materialized = read_materialized_recommendations(snapshot)
+    recommended_destination = materialized.get(user_id) if materialized else None
+    if recommended_destination is None:
+        recommended_destination = get_cohort_index(snapshot).recommend(
+            current_location, age, [current_location] + past_destinations
+        )
+    elif recommended_destination == "":
+        recommended_destination = None
 
-    # Get the most common destination
-    recommended_destination = destination_counts.most_common(1)[0][0]
+    if recommended_destination is None:
+        return f"No new recommendations found for users in {current_location} with similar age."
 
     return f"Based on your current location ({current_location}), age ({age}), and past travel data, we recommend visiting {recommended_destination}."
@@ -1,36 +1,34 @@
 """This "graph" is a flight agent graph"""
 
-from langchain_aws import ChatBedrockConverse
-import boto3
 from langgraph.graph import StateGraph, START, MessagesState
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
-from os import environ
+from common.bedrock import make_chat_model
+from common.checkpoint import make_checkpointer
+from common.compaction import compact_history
 
 from flight_agent.tools import (
     search_flights,
     retrieve_flight_booking,
     change_flight_booking,
     cancel_flight_booking,
+    retrieve_flight_bookings,
+    change_flight_bookings,
+    cancel_flight_bookings,
+    list_my_flight_bookings,
 )
 
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")
-
-llm = ChatBedrockConverse(
-    model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-    #model="anthropic.claude-3-sonnet-20240229-v1:0",
-    temperature=0,
-    max_tokens=None,
-    client=bedrock_client,
-    # other params...
-)
+llm = make_chat_model("flight_agent")
 tools = [
     search_flights,
     retrieve_flight_booking,
     change_flight_booking,
     cancel_flight_booking,
+    retrieve_flight_bookings,
+    change_flight_bookings,
+    cancel_flight_bookings,
+    list_my_flight_bookings,
 ]
 llm_with_tools = llm.bind_tools(tools)
 
@@ -49,7 +47,7 @@ prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-flight_agent_chain = prompt | llm_with_tools
+flight_agent_chain = compact_history("flight_agent", llm) | prompt | llm_with_tools
 
 
 def flight_agent(state):
@@ -57,8 +55,13 @@ def flight_agent(state):
     return {"messages": [result]}
 
 
+async def aflight_agent(state):
+    result = await flight_agent_chain.ainvoke(state)
+    return {"messages": [result]}
+
+
 graph_builder = StateGraph(MessagesState, config_schema=RunnableConfig)
-graph_builder.add_node("flight_agent", flight_agent)
+graph_builder.add_node("flight_agent", RunnableLambda(flight_agent, afunc=aflight_agent))
 
 tool_node = ToolNode(tools=tools)
 graph_builder.add_node("tools", tool_node)
@@ -72,9 +75,5 @@ graph_builder.add_edge(START, "flight_agent")
 
 #graph = graph_builder.compile(checkpointer=memory)
 
-if environ.get("env","") == "":
-    memory = MemorySaver()
-    graph = graph_builder.compile(checkpointer=memory)
-else:
-    graph = graph_builder.compile()
+graph = graph_builder.compile(checkpointer=make_checkpointer())
 graph.name = "FlightAgentGraph"
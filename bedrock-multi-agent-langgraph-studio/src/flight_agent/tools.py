@@ -1,33 +1,10 @@
 from datetime import datetime, timedelta
-from contextlib import closing
 import json
 import random
-import sqlite3
-import pandas as pd
 from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
-
-
-def read_travel_data(file_path: str = "/app/src/destination_agent/synthetic_travel_data.csv") -> pd.DataFrame:
-    """Read travel data from CSV file"""
-    try:
-        df = pd.read_csv(file_path)
-        return df
-    except FileNotFoundError:
-        return pd.DataFrame(
-            columns=[
-                "Id",
-                "Name",
-                "Current_Location",
-                "Age",
-                "Past_Travel_Destinations",
-                "Number_of_Trips",
-                "Flight_Number",
-                "Departure_City",
-                "Arrival_City",
-                "Flight_Date",
-            ]
-        )
+from common.bookings_db import DEFAULT_PAGE_SIZE, get_bookings_db, placeholders, unique_ids
+from common.profiles import get_profile_store
 
 
 @tool
@@ -43,14 +20,13 @@ def search_flights(config: RunnableConfig, arrival_city: str, date: str = None)
         str: A formatted string containing flight information including airline, departure time, arrival time, duration, and price for multiple flights.
     """
 
-    df = read_travel_data()
     user_id = config.get("configurable", {})["configurable"]["user_id"]
     print(user_id)
 
-    if user_id not in df["Id"].values:
+    user_data = get_profile_store().get(user_id)
+    if user_data is None:
         return "User not found in the travel database."
 
-    user_data = df[df["Id"] == user_id].iloc[0]
     current_location = user_data["Current_Location"]
 
     departure_city = current_location.capitalize()
@@ -116,16 +92,9 @@ def retrieve_flight_booking(booking_id: int) -> str:
     Returns:
         str: A string containing the booking information if found, or a message indicating no booking was found
     """
-    booking = None
-    with closing(sqlite3.connect("data/travel_bookings.db", timeout=10.0)) as conn:
-        with closing(conn.cursor()) as cursor:
-            # Execute the query to retrieve the booking
-            cursor.execute(
-                "SELECT * FROM flight_bookings WHERE booking_id = ?", (booking_id,)
-            )
-            booking = cursor.fetchone()
-        # Close the connection
-        conn.close()
+    booking = get_bookings_db().fetch_one(
+        "SELECT * FROM flight_bookings WHERE booking_id = ?", (booking_id,)
+    )
 
     if booking:
         return f"Booking found: {booking} FINISHED"
@@ -145,28 +114,16 @@ def change_flight_booking(booking_id: int, new_date: str) -> str:
     Returns:
         str: A message indicating the result of the booking change operation
     """
-    # conn = sqlite3.connect("data/travel_bookings.db")
-    # cursor = conn.cursor()
-    result = ""
-    with closing(sqlite3.connect("data/travel_bookings.db", timeout=10.0)) as conn:
-        with closing(conn.cursor()) as cursor:
-            # Execute the query to update the booking date
-            cursor.execute(
-                "UPDATE flight_bookings SET departure_date = ? WHERE booking_id = ?",
-                (new_date, booking_id),
-            )
-            conn.commit()
-
-            # Check if the booking was updated
-            if cursor.rowcount > 0:
-                result = f"Booking updated with ID: {booking_id}, new date: {new_date} FINISHED"
-            else:
-                result = f"No booking found with ID: {booking_id} FINISHED"
-
-        # Close the connection
-        conn.close()
-
-    return result
+    updated = get_bookings_db().execute(
+        "UPDATE flight_bookings SET departure_date = ? WHERE booking_id = ?",
+        (new_date, booking_id),
+    )
+
+    # Check if the booking was updated
+    if updated > 0:
+        return f"Booking updated with ID: {booking_id}, new date: {new_date} FINISHED"
+    else:
+        return f"No booking found with ID: {booking_id} FINISHED"
 
 
 @tool
@@ -181,22 +138,125 @@ def cancel_flight_booking(booking_id: int) -> str:
         str: A message indicating the result of the booking cancellation operation
 
     """
-    # conn = sqlite3.connect("data/travel_bookings.db")
-    # cursor  = conn.cursor()
-    result = ""
-    with closing(sqlite3.connect("data/travel_bookings.db", timeout=10.0)) as conn:
-        with closing(conn.cursor()) as cursor:
-            cursor.execute(
-                "DELETE FROM flight_bookings WHERE booking_id = ?", (booking_id,)
+    deleted = get_bookings_db().execute(
+        "DELETE FROM flight_bookings WHERE booking_id = ?", (booking_id,)
+    )
+
+    # Check if the booking was deleted
+    if deleted > 0:
+        return f"Booking canceled with ID: {booking_id} FINISHED"
+    else:
+        return f"No booking found with ID: {booking_id} FINISHED"
+
+
+@tool
+def retrieve_flight_bookings(booking_ids: list[int]) -> str:
+    """
+    Retrieve several flight bookings at once. Use this instead of calling retrieve_flight_booking once per ID.
+
+    Args:
+        booking_ids (list[int]): The unique identifiers of the bookings to retrieve
+
+    Returns:
+        str: One line per booking ID with the booking information, or a message indicating no booking was found
+    """
+    ids = unique_ids(booking_ids)
+    rows = get_bookings_db().fetch_all(
+        f"SELECT * FROM flight_bookings WHERE booking_id IN ({placeholders(len(ids))})",
+        ids,
+    )
+    found = {row[0]: row for row in rows}
+    results = [
+        f"Booking found: {found[booking_id]}" if booking_id in found else f"No booking found with ID: {booking_id}"
+        for booking_id in ids
+    ]
+    return "\n".join(results) + " FINISHED"
+
+
+@tool
+def change_flight_bookings(booking_ids: list[int], new_date: str) -> str:
+    """
+    Change the date of several flight bookings in one step. Use this instead of calling change_flight_booking once per ID.
+
+    Args:
+        booking_ids (list[int]): The unique identifiers of the bookings to be changed
+        new_date (str): The new date for the bookings
+
+    Returns:
+        str: One line per booking ID with the result of the booking change operation
+    """
+    ids = unique_ids(booking_ids)
+    with get_bookings_db().transaction() as conn:
+        existing = {
+            row[0]
+            for row in conn.execute(
+                f"SELECT booking_id FROM flight_bookings WHERE booking_id IN ({placeholders(len(ids))})",
+                ids,
             )
-            conn.commit()
-            # Check if the booking was deleted
-            if cursor.rowcount > 0:
-                result = f"Booking canceled with ID: {booking_id} FINISHED"
-            else:
-                result = f"No booking found with ID: {booking_id} FINISHED"
+        }
+        conn.executemany(
+            "UPDATE flight_bookings SET departure_date = ? WHERE booking_id = ?",
+            [(new_date, booking_id) for booking_id in ids if booking_id in existing],
+        )
 
-        # Close the connection
-        conn.close()
+    results = [
+        f"Booking updated with ID: {booking_id}, new date: {new_date}" if booking_id in existing else f"No booking found with ID: {booking_id}"
+        for booking_id in ids
+    ]
+    return "\n".join(results) + " FINISHED"
+
+
+@tool
+def cancel_flight_bookings(booking_ids: list[int]) -> str:
+    """
+    Cancel several flight bookings in one step. Use this instead of calling cancel_flight_booking once per ID.
 
-    return result
+    Args:
+        booking_ids (list[int]): The unique identifiers of the bookings to be cancelled
+
+    Returns:
+        str: One line per booking ID with the result of the booking cancellation operation
+    """
+    ids = unique_ids(booking_ids)
+    with get_bookings_db().transaction() as conn:
+        existing = {
+            row[0]
+            for row in conn.execute(
+                f"SELECT booking_id FROM flight_bookings WHERE booking_id IN ({placeholders(len(ids))})",
+                ids,
+            )
+        }
+        conn.executemany(
+            "DELETE FROM flight_bookings WHERE booking_id = ?",
+            [(booking_id,) for booking_id in ids if booking_id in existing],
+        )
+
+    results = [
+        f"Booking canceled with ID: {booking_id}" if booking_id in existing else f"No booking found with ID: {booking_id}"
+        for booking_id in ids
+    ]
+    return "\n".join(results) + " FINISHED"
+
+
+@tool
+def list_my_flight_bookings(config: RunnableConfig, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE) -> str:
+    """
+    List the user's flight bookings ordered by departure date. It knows the user, no booking ID is needed
+
+    Args:
+        cursor (str, optional): The next_cursor value from a previous call, to get the following page
+        limit (int, optional): Maximum number of bookings to return (at most 50)
+
+    Returns:
+        str: A JSON object with the bookings on this page, next_cursor (null when there are no more bookings)
+            and status "FINISHED", or with an error message if the cursor is invalid
+    """
+    user_id = config.get("configurable", {})["configurable"]["user_id"]
+
+    try:
+        bookings, next_cursor = get_bookings_db().list_user_bookings(
+            "flight_bookings", "departure_date", user_id, cursor, limit
+        )
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return json.dumps({"bookings": bookings, "next_cursor": next_cursor, "status": "FINISHED"})
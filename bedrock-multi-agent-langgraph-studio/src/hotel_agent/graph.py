@@ -1,32 +1,26 @@
 """This "graph" is a hotel agent graph"""
 
 from typing import TypedDict, Annotated
-from langchain_aws import ChatBedrockConverse
-import boto3
 from langgraph.graph import StateGraph, START, MessagesState
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
+from common.bedrock import make_chat_model
+from common.checkpoint import make_checkpointer
+from common.compaction import compact_history
 from hotel_agent.tools import (
     suggest_hotels,
     retrieve_hotel_booking,
     change_hotel_booking,
     cancel_hotel_booking,
+    retrieve_hotel_bookings,
+    change_hotel_bookings,
+    cancel_hotel_bookings,
+    list_my_hotel_bookings,
 )
-from os import environ
 
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")
-
-llm = ChatBedrockConverse(
-    model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-    #model="anthropic.claude-3-sonnet-20240229-v1:0",
-    temperature=0,
-    max_tokens=None,
-    client=bedrock_client,
-    # other params...
-)
+llm = make_chat_model("hotel_agent")
 
 #memory = MemorySaver()
 
@@ -50,17 +44,25 @@ hotel_tools = [
     retrieve_hotel_booking,
     change_hotel_booking,
     cancel_hotel_booking,
+    retrieve_hotel_bookings,
+    change_hotel_bookings,
+    cancel_hotel_bookings,
+    list_my_hotel_bookings,
 ]
 
-runnable_with_tools = primary_assistant_prompt | llm.bind_tools(hotel_tools)
+runnable_with_tools = compact_history("hotel_agent", llm) | primary_assistant_prompt | llm.bind_tools(hotel_tools)
 
 
 def hotel_agent(state: State):
     return {"messages": [runnable_with_tools.invoke(state)]}
 
 
+async def ahotel_agent(state: State):
+    return {"messages": [await runnable_with_tools.ainvoke(state)]}
+
+
 graph_builder = StateGraph(MessagesState, config_schema=RunnableConfig)
-graph_builder.add_node("hotel_agent", hotel_agent)
+graph_builder.add_node("hotel_agent", RunnableLambda(hotel_agent, afunc=ahotel_agent))
 
 tool_node = ToolNode(tools=hotel_tools)
 graph_builder.add_node("tools", tool_node)
@@ -74,10 +76,6 @@ graph_builder.add_edge(START, "hotel_agent")
 
 #graph = graph_builder.compile(checkpointer=memory)
 
-if environ.get("env","") == "":
-    memory = MemorySaver()
-    graph = graph_builder.compile(checkpointer=memory)
-else:
-    graph = graph_builder.compile()
+graph = graph_builder.compile(checkpointer=make_checkpointer())
 
 graph.name = "HotelAgentGraph"
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from contextlib import closing
+import json
 import random
 import sqlite3
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from common.bookings_db import DEFAULT_PAGE_SIZE, get_bookings_db, placeholders, unique_ids
 
 
 @tool
@@ -52,12 +54,9 @@ def retrieve_hotel_booking(booking_id: int) -> str:
     Returns:
         str: A string containing the hotel booking information if found, or a message indicating no booking was found
     """
-    with closing(sqlite3.connect("./data/travel_bookings.db", timeout=10.0)) as conn:
-        with closing(conn.cursor()) as cursor:
-            cursor.execute(
-                "SELECT * FROM hotel_bookings WHERE booking_id=?", (booking_id,)
-            )
-            booking = cursor.fetchone()
+    booking = get_bookings_db().fetch_one(
+        "SELECT * FROM hotel_bookings WHERE booking_id=?", (booking_id,)
+    )
 
     if booking:
         return f"Booking found: {booking}"
@@ -80,39 +79,135 @@ def change_hotel_booking(
     Returns:
     str: A message indicating the result of the booking change operation
     """
+    check_in_date = new_checkin_date
+    try:
+        with get_bookings_db().transaction() as conn:
+            # First, fetch the current booking details
+            booking = conn.execute(
+                "SELECT * FROM hotel_bookings WHERE booking_id = ?", (booking_id,)
+            ).fetchone()
 
-    with closing(sqlite3.connect("./data/travel_bookings.db", timeout=10.0)) as conn:
-        with closing(conn.cursor()) as cursor:
-            try:
-                # First, fetch the current booking details
-                cursor.execute(
-                    """
-                    SELECT * FROM hotel_bookings WHERE booking_id = ?
-                """,
-                    (booking_id,),
-                )
+            if booking is None:
+                return f"No hotel booking found with ID: {booking_id}"
+
+            # Unpack the booking details
+            (
+                _,
+                user_id,
+                user_name,
+                city,
+                hotel_name,
+                check_in_date,
+                check_out_date,
+                nights,
+                price_per_night,
+                total_price,
+                num_guests,
+                room_type,
+            ) = booking
+
+            # Update check-in and check-out dates if provided
+            if new_checkin_date:
+                check_in_date = new_checkin_date
+            if new_checkout_date:
+                check_out_date = new_checkout_date
+
+            # Recalculate nights and total price
+            checkin = datetime.strptime(check_in_date, "%Y-%m-%d")
+            checkout = datetime.strptime(check_out_date, "%Y-%m-%d")
+            nights = (checkout - checkin).days
+            total_price = nights * price_per_night
+
+            # Update the booking in the database
+            conn.execute(
+                """
+                UPDATE hotel_bookings
+                SET check_in_date = ?, check_out_date = ?, nights = ?, total_price = ?
+                WHERE booking_id = ?
+            """,
+                (check_in_date, check_out_date, nights, total_price, booking_id),
+            )
+
+        return f"Hotel booking updated: Booking ID {booking_id}, New check-in: {check_in_date}, New check-out: {check_out_date}, Nights: {nights}, Total Price: {total_price} FINISHED"
+
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} Booking ID {booking_id}, New check-in: {check_in_date} FINISHED"
+
+
+@tool
+def cancel_hotel_booking(booking_id: int) -> str:
+    """
+    Cancel a hotel booking. If the task completes, reply with "FINISHED"
+
+    Args:
+        booking_id (int): The unique identifier of the booking to be cancelled
+
+    Returns:
+        str: A message indicating the result of the booking cancellation operation
+    """
+    deleted = get_bookings_db().execute(
+        "DELETE FROM hotel_bookings WHERE booking_id = ?", (booking_id,)
+    )
+
+    # Check if the booking was deleted
+    if deleted > 0:
+        return f"Booking canceled with ID: {booking_id} FINISHED"
+    else:
+        return f"No booking found with ID: {booking_id} FINISHED"
+
+
+@tool
+def retrieve_hotel_bookings(booking_ids: list[int]) -> str:
+    """
+    Retrieve several hotel bookings at once. Use this instead of calling retrieve_hotel_booking once per ID.
+
+    Args:
+        booking_ids (list[int]): The unique identifiers of the hotel bookings to retrieve
 
-                booking = cursor.fetchone()
-
-                if booking is None:
-                    return f"No hotel booking found with ID: {booking_id}"
-
-                # Unpack the booking details
-                (
-                    _,
-                    user_id,
-                    user_name,
-                    city,
-                    hotel_name,
-                    check_in_date,
-                    check_out_date,
-                    nights,
-                    price_per_night,
-                    total_price,
-                    num_guests,
-                    room_type,
-                ) = booking
+    Returns:
+        str: One line per booking ID with the hotel booking information, or a message indicating no booking was found
+    """
+    ids = unique_ids(booking_ids)
+    rows = get_bookings_db().fetch_all(
+        f"SELECT * FROM hotel_bookings WHERE booking_id IN ({placeholders(len(ids))})",
+        ids,
+    )
+    found = {row[0]: row for row in rows}
+    return "\n".join(
+        f"Booking found: {found[booking_id]}" if booking_id in found else f"No booking found with ID: {booking_id}"
+        for booking_id in ids
+    )
+
+
+@tool
+def change_hotel_bookings(
+    booking_ids: list[int], new_checkin_date: str = None, new_checkout_date: str = None
+) -> str:
+    """
+    Change the dates of several hotel bookings in one step. Use this instead of calling change_hotel_booking once per ID. If the task completes, reply with "FINISHED"
 
+    Args:
+    booking_ids (list[int]): The unique identifiers of the bookings to be changed
+    new_checkin_date (str, optional): The new check-in date in YYYY-MM-DD format
+    new_checkout_date (str, optional): The new check-out date in YYYY-MM-DD format
+
+    Returns:
+    str: One line per booking ID with the result of the booking change operation
+    """
+    ids = unique_ids(booking_ids)
+    results = {}
+    updates = []
+    try:
+        with get_bookings_db().transaction() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT booking_id, check_in_date, check_out_date, price_per_night
+                FROM hotel_bookings WHERE booking_id IN ({placeholders(len(ids))})
+            """,
+                ids,
+            ).fetchall()
+
+            for booking_id, check_in_date, check_out_date, price_per_night in rows:
                 # Update check-in and check-out dates if provided
                 if new_checkin_date:
                     check_in_date = new_checkin_date
@@ -125,48 +220,80 @@ def change_hotel_booking(
                 nights = (checkout - checkin).days
                 total_price = nights * price_per_night
 
-                # Update the booking in the database
-                cursor.execute(
-                    """
-                    UPDATE hotel_bookings
-                    SET check_in_date = ?, check_out_date = ?, nights = ?, total_price = ?
-                    WHERE booking_id = ?
-                """,
-                    (check_in_date, check_out_date, nights, total_price, booking_id),
+                updates.append((check_in_date, check_out_date, nights, total_price, booking_id))
+                results[booking_id] = (
+                    f"Hotel booking updated: Booking ID {booking_id}, New check-in: {check_in_date}, "
+                    f"New check-out: {check_out_date}, Nights: {nights}, Total Price: {total_price}"
                 )
 
-                conn.commit()
-
-                return f"Hotel booking updated: Booking ID {booking_id}, New check-in: {check_in_date}, New check-out: {check_out_date}, Nights: {nights}, Total Price: {total_price} FINISHED"
+            conn.executemany(
+                """
+                UPDATE hotel_bookings
+                SET check_in_date = ?, check_out_date = ?, nights = ?, total_price = ?
+                WHERE booking_id = ?
+            """,
+                updates,
+            )
 
-            except sqlite3.Error as e:
-                conn.rollback()
-                return f"An error occurred: {str(e)} Booking ID {booking_id}, New check-in: {check_in_date} FINISHED"
+    except sqlite3.Error as e:
+        return f"An error occurred: {str(e)} Booking IDs {ids}, no bookings were changed FINISHED"
 
-            finally:
-                pass
+    return "\n".join(
+        results.get(booking_id, f"No hotel booking found with ID: {booking_id}")
+        for booking_id in ids
+    ) + " FINISHED"
 
 
 @tool
-def cancel_hotel_booking(booking_id: int) -> str:
+def cancel_hotel_bookings(booking_ids: list[int]) -> str:
     """
-    Cancel a hotel booking. If the task completes, reply with "FINISHED"
+    Cancel several hotel bookings in one step. Use this instead of calling cancel_hotel_booking once per ID. If the task completes, reply with "FINISHED"
 
     Args:
-        booking_id (int): The unique identifier of the booking to be cancelled
+        booking_ids (list[int]): The unique identifiers of the bookings to be cancelled
 
     Returns:
-        str: A message indicating the result of the booking cancellation operation
+        str: One line per booking ID with the result of the booking cancellation operation
     """
-    with closing(sqlite3.connect("./data/travel_bookings.db", timeout=10.0)) as conn:
-        with closing(conn.cursor()) as cursor:
-            cursor.execute(
-                "DELETE FROM hotel_bookings WHERE booking_id = ?", (booking_id,)
+    ids = unique_ids(booking_ids)
+    with get_bookings_db().transaction() as conn:
+        existing = {
+            row[0]
+            for row in conn.execute(
+                f"SELECT booking_id FROM hotel_bookings WHERE booking_id IN ({placeholders(len(ids))})",
+                ids,
             )
-            conn.commit()
+        }
+        conn.executemany(
+            "DELETE FROM hotel_bookings WHERE booking_id = ?",
+            [(booking_id,) for booking_id in ids if booking_id in existing],
+        )
+
+    return "\n".join(
+        f"Booking canceled with ID: {booking_id}" if booking_id in existing else f"No booking found with ID: {booking_id}"
+        for booking_id in ids
+    ) + " FINISHED"
+
+
+@tool
+def list_my_hotel_bookings(config: RunnableConfig, cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE) -> str:
+    """
+    List the user's hotel bookings ordered by check-in date. It knows the user, no booking ID is needed
+
+    Args:
+        cursor (str, optional): The next_cursor value from a previous call, to get the following page
+        limit (int, optional): Maximum number of bookings to return (at most 50)
+
+    Returns:
+        str: A JSON object with the bookings on this page, next_cursor (null when there are no more bookings)
+            and status "FINISHED", or with an error message if the cursor is invalid
+    """
+    user_id = config.get("configurable", {})["configurable"]["user_id"]
 
-            # Check if the booking was deleted
-            if cursor.rowcount > 0:
-                return f"Booking canceled with ID: {booking_id} FINISHED"
-            else:
-                return f"No booking found with ID: {booking_id} FINISHED"
+    try:
+        bookings, next_cursor = get_bookings_db().list_user_bookings(
+            "hotel_bookings", "check_in_date", user_id, cursor, limit
+        )
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return json.dumps({"bookings": bookings, "next_cursor": next_cursor, "status": "FINISHED"})
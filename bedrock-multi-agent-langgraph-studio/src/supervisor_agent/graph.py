@@ -1,34 +1,38 @@
 from typing import TypedDict, Literal, Annotated
 from pydantic import BaseModel
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph.message import add_messages
 from langchain_core.messages import HumanMessage
-from langchain_aws import ChatBedrockConverse
-import boto3
-from langgraph.checkpoint.memory import MemorySaver
+from common.bedrock import make_chat_model
+from common.checkpoint import make_checkpointer
+from common.compaction import compact_history
+from common.metrics import instrumented
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
 from langgraph.graph import END, StateGraph, START
+from langgraph.types import Send
+import asyncio
+import contextvars
 import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import environ
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from flight_agent import graph as flight_agent_graph
 from hotel_agent import graph as hotel_agent_graph
 from destination_agent import graph as destination_agent_graph
-from os import environ
+from destination_agent.graph import graph_builder as destination_graph_builder
 
 
 members = ["flight_agent", "hotel_agent", "destination_agent"]
+# Order the supervisor prompt walks the members in
+workflow = ["destination_agent", "flight_agent", "hotel_agent"]
 options = ["FINISH"] + members
 #memory = MemorySaver()
 
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")
-
-llm = ChatBedrockConverse(
-    model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-    temperature=0,
-    max_tokens=None,
-    client=bedrock_client,
-    # other params...
-)
+llm = make_chat_model("supervisor")
 
 
 class routeResponse(BaseModel):
@@ -58,7 +62,7 @@ prompt = ChatPromptTemplate.from_messages(
     ]
 ).partial(options=str(options), members=", ".join(members))
 
-supervisor_chain = prompt | llm.with_structured_output(routeResponse)
+supervisor_chain = compact_history("supervisor", llm) | prompt | llm.with_structured_output(routeResponse)
 
 
 class State(TypedDict):
@@ -66,33 +70,351 @@ class State(TypedDict):
     next: str | None
 
 
-def supervisor_agent(state: State):
-    result = supervisor_chain.invoke(state)
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") for block in content if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+
+def _members_in_turn(messages) -> list[str]:
+    """Return the members that answered since the user's latest message, in order."""
+    turn_start = 0
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        if isinstance(message, HumanMessage) and message.name not in members + ["supervisor"]:
+            turn_start = i
+            break
+    return [m.name for m in messages[turn_start:] if m.name in members]
+
+
+# Set SUPERVISOR_PARALLEL=1 to run flight_agent and hotel_agent side by side
+# once destination_agent has picked the destination
+SUPERVISOR_PARALLEL = environ.get("SUPERVISOR_PARALLEL", "") == "1"
+parallel_members = ["flight_agent", "hotel_agent"]
+
+
+def _fan_out(next_: str, state: State) -> str:
+    if not SUPERVISOR_PARALLEL or next_ != parallel_members[0]:
+        return next_
+    ran = _members_in_turn(state["messages"])
+    if "destination_agent" in ran and not any(member in ran for member in parallel_members):
+        return ",".join(parallel_members)
+    return next_
+
+
+def _route(result: routeResponse, state: State):
+    next_ = _fan_out(result.next, state)
     output = {
-        "next": result.next,
+        "next": next_,
         "messages": [
             HumanMessage(
-                content=f"Supervisor decided: {result.next}", name="supervisor"
+                content=f"Supervisor decided: {next_}", name="supervisor"
             )
         ],
     }
     print(f"Supervisor output: {output}")
     return output
 
+
+# Set SUPERVISOR_ROUTER=llm to send every routing decision to the model
+SUPERVISOR_ROUTER = environ.get("SUPERVISOR_ROUTER", "rules")
+
+
+class RuleRouter:
+    """Decide predictable supervisor hops without calling the LLM.
+
+    Mirrors the supervisor prompt: within the current user turn, the member
+    after the last one that ran in ``workflow`` order goes next (destination,
+    then flight, then hotel), members never repeat, and the turn finishes
+    after hotel_agent. Rules only apply once the last member is done: its run
+    used a tool and ended with a plain answer (``member_finished``, set by the
+    member node), or its reply says FINISHED. The first hop of a turn, a
+    member that answered without doing its task and a member that answered
+    with a question are left to the LLM.
+
+    Attributes:
+        decisions (int): Routing decisions seen.
+        hits (int): Decisions made by the rules.
+    """
+
+    def __init__(self, workflow: list[str]):
+        self.workflow = workflow
+        self.decisions = 0
+        self.hits = 0
+        self.by_rule: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        """Return decision counts and the rule hit rate."""
+        with self._lock:
+            return {
+                "decisions": self.decisions,
+                "rule_hits": self.hits,
+                "llm_calls": self.decisions - self.hits,
+                "hit_rate": self.hits / self.decisions if self.decisions else 0.0,
+                "by_rule": dict(self.by_rule),
+            }
+
+    def _decide(self, messages) -> tuple[str, str] | None:
+        ran = _members_in_turn(messages)
+        if not ran:
+            return None
+        last = messages[-1]
+        if last.name != ran[-1]:
+            return None
+        text = _text(last.content).rstrip()
+        finished = last.additional_kwargs.get("member_finished") or "FINISHED" in text
+        if not finished or text.endswith("?"):
+            return None
+        for member in self.workflow[self.workflow.index(ran[-1]) + 1:]:
+            if member not in ran:
+                return member, f"{ran[-1]}->{member}"
+        return "FINISH", f"{ran[-1]}->FINISH"
+
+    def route(self, messages) -> str | None:
+        """Return the next member (or ``FINISH``), or ``None`` when the LLM should decide."""
+        decision = self._decide(messages)
+        with self._lock:
+            self.decisions += 1
+            if decision is not None:
+                self.hits += 1
+                self.by_rule[decision[1]] = self.by_rule.get(decision[1], 0) + 1
+        return decision[0] if decision else None
+
+
+router = RuleRouter(workflow)
+
+
+def _rule_route(state: State) -> routeResponse | None:
+    if SUPERVISOR_ROUTER != "rules":
+        return None
+    next_ = router.route(state["messages"])
+    return routeResponse(next=next_) if next_ else None
+
+
+# Set SUPERVISOR_SPECULATE=1 to start destination_agent while the first routing call runs
+SUPERVISOR_SPECULATE = environ.get("SUPERVISOR_SPECULATE", "") == "1"
+MAX_PENDING_SPECULATIONS = 64
+
+
+def _routed_state(state: State, member: str) -> dict:
+    """Return the input a member node receives once the supervisor has routed to it."""
+    return {**state, "messages": state["messages"] + [HumanMessage(content=f"Supervisor decided: {member}", name="supervisor")]}
+
+
+class Speculation:
+    """Run one member ahead of the supervisor's first routing decision of a turn.
+
+    The member's sub-graph (compiled without a checkpointer) is started next to
+    the routing LLM call. If the supervisor picks that member, its node takes
+    the speculative result instead of running again; otherwise the run is
+    cancelled and the tokens it already used are counted as wasted. Only the
+    first turn of a thread is speculated on: later turns would need the state
+    the checkpointed sub-graph saved for the thread.
+
+    Attributes:
+        launched (int): Speculative runs started.
+        hits (int): Runs whose result was used.
+        misses (int): Runs discarded because the supervisor routed elsewhere.
+        wasted_tokens (int): Tokens reported by the model calls of discarded runs.
+    """
+
+    def __init__(self, member: str, graph):
+        self.member = member
+        self.graph = graph
+        self.launched = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted_tokens = 0
+        self._pending: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def stats(self) -> dict:
+        """Return hit/miss counts, the hit rate and the wasted tokens."""
+        with self._lock:
+            resolved = self.hits + self.misses
+            return {
+                "launched": self.launched,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / resolved if resolved else 0.0,
+                "wasted_tokens": self.wasted_tokens,
+            }
+
+    @staticmethod
+    def _key(messages, config: RunnableConfig) -> str:
+        configurable = config.get("configurable", {})
+        digest = hashlib.sha1(repr((configurable.get("thread_id"), configurable.get("configurable"))).encode())
+        for message in messages:
+            digest.update(repr((message.type, message.name, _text(message.content))).encode())
+        return digest.hexdigest()
+
+    def _run_config(self, config: RunnableConfig, usage) -> RunnableConfig:
+        # Only the session keys: the speculative run must not join the supervisor's task
+        configurable = config.get("configurable", {})
+        return RunnableConfig(
+            configurable={k: configurable[k] for k in ("thread_id", "configurable") if k in configurable},
+            callbacks=[usage],
+        )
+
+    def _register(self, key: str, handle, usage):
+        with self._lock:
+            self.launched += 1
+            self._pending[key] = (handle, usage)
+            while len(self._pending) > MAX_PENDING_SPECULATIONS:
+                self._pending.popitem(last=False)[1][0].cancel()
+
+    def start(self, state: State, config: RunnableConfig) -> str:
+        """Start the member in a worker thread and return the speculation key."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculation")
+        branch = _routed_state(state, self.member)
+        key = self._key(branch["messages"], config)
+        usage = UsageMetadataCallbackHandler()
+        self._register(key, self._executor.submit(self.graph.invoke, branch, self._run_config(config, usage)), usage)
+        return key
+
+    def astart(self, state: State, config: RunnableConfig) -> str:
+        """Start the member as an asyncio task and return the speculation key."""
+        branch = _routed_state(state, self.member)
+        key = self._key(branch["messages"], config)
+        usage = UsageMetadataCallbackHandler()
+        # A fresh context keeps the run out of the supervisor task's graph context
+        task = asyncio.create_task(
+            self.graph.ainvoke(branch, self._run_config(config, usage)), context=contextvars.Context()
+        )
+        self._register(key, task, usage)
+        return key
+
+    def resolve(self, key: str, next_: str):
+        """Keep the run for the member node on a hit; cancel it on a miss."""
+        with self._lock:
+            if next_ == self.member:
+                self.hits += 1
+                return
+            entry = self._pending.pop(key, None)
+            self.misses += 1
+        if entry is not None:
+            handle, usage = entry
+            # Count once the run has stopped: a worker thread cannot be interrupted mid-call
+            handle.add_done_callback(lambda _: self._waste(usage))
+            handle.cancel()
+
+    def _waste(self, usage: UsageMetadataCallbackHandler):
+        wasted = sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values())
+        with self._lock:
+            self.wasted_tokens += wasted
+
+    def _take(self, name: str, state, config: RunnableConfig):
+        if name != self.member:
+            return None
+        with self._lock:
+            entry = self._pending.pop(self._key(state["messages"], config), None)
+        return entry[0] if entry else None
+
+    def take(self, name: str, state, config: RunnableConfig) -> dict | None:
+        """Return the speculative result for this member node, or ``None`` to run it normally."""
+        handle = self._take(name, state, config)
+        if handle is None:
+            return None
+        try:
+            return handle.result()
+        except Exception:
+            # A failed speculative run falls back to the regular one
+            return None
+
+    async def atake(self, name: str, state, config: RunnableConfig) -> dict | None:
+        """Async variant of ``take``."""
+        handle = self._take(name, state, config)
+        if handle is None:
+            return None
+        try:
+            return await (handle if isinstance(handle, asyncio.Future) else asyncio.wrap_future(handle))
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            return None
+        except Exception:
+            return None
+
+
+speculation = Speculation("destination_agent", destination_graph_builder.compile())
+
+
+def _speculate(state: State) -> bool:
+    # No member has answered in this thread yet, so the sub-graph has no saved state to merge
+    return SUPERVISOR_SPECULATE and not any(m.name in members for m in state["messages"])
+
+
+def supervisor_agent(state: State, config: RunnableConfig):
+    result = _rule_route(state)
+    if result is None:
+        key = speculation.start(state, config) if _speculate(state) else None
+        result = supervisor_chain.invoke(state)
+        if key is not None:
+            speculation.resolve(key, result.next)
+    return _route(result, state)
+
+
+async def asupervisor_agent(state: State, config: RunnableConfig):
+    result = _rule_route(state)
+    if result is None:
+        key = speculation.astart(state, config) if _speculate(state) else None
+        try:
+            result = await supervisor_chain.ainvoke(state)
+        except BaseException:
+            if key is not None:
+                speculation.resolve(key, None)
+            raise
+        if key is not None:
+            speculation.resolve(key, result.next)
+    return _route(result, state)
+
 import pprint
 
-def agent_node(state, agent, name):
-    result = agent.invoke(state)
+
+def _member_finished(messages) -> bool:
+    """Whether a member run called a tool and then ended with an answer that calls none."""
+    last = messages[-1]
+    if not isinstance(last, AIMessage) or last.tool_calls:
+        return False
+    # Walk back over this run's tool round trips, stopping at the routing message
+    for message in reversed(messages[:-1]):
+        if isinstance(message, ToolMessage):
+            return True
+        if not isinstance(message, AIMessage):
+            return False
+    return False
+
+
+def _agent_output(result, name):
     pprint.pprint(result["messages"][-1].dict())
 
     #print(result["messages"][-1].content[0]["text"])
     return {
         "messages": [
             #HumanMessage(content=result["messages"][-1].content[0]["text"], name=name)
-            HumanMessage(content=result["messages"][-1].content, name=name)
+            HumanMessage(
+                content=result["messages"][-1].content,
+                name=name,
+                additional_kwargs={"member_finished": _member_finished(result["messages"])},
+            )
         ]
     }
 
+
+def agent_node(state, agent, name, config: RunnableConfig):
+    result = speculation.take(name, state, config)
+    return _agent_output(result if result is not None else agent.invoke(state), name)
+
+
+async def aagent_node(state, agent, name, config: RunnableConfig):
+    result = await speculation.atake(name, state, config)
+    return _agent_output(result if result is not None else await agent.ainvoke(state), name)
+
 # def agent_node(state, agent, name):
 #     result = agent.invoke(state)
 
@@ -113,19 +435,27 @@ def agent_node(state, agent, name):
 
 
 full_workflow = StateGraph(State, config_schema=RunnableConfig)
-full_workflow.add_node("supervisor", supervisor_agent)
+full_workflow.add_node(
+    "supervisor", RunnableLambda(supervisor_agent, afunc=asupervisor_agent)
+)
 
 full_workflow.add_edge(START, "supervisor")
 
-planner_node = functools.partial(
-    agent_node, agent=destination_agent_graph, name="destination_agent"
-)
 
-flight_node = functools.partial(
-    agent_node, agent=flight_agent_graph, name="flight_agent"
-)
+def _member_node(agent, name):
+    # Sync path for graph.invoke, native async path for graph.ainvoke
+    return RunnableLambda(
+        functools.partial(agent_node, agent=agent, name=name),
+        afunc=functools.partial(aagent_node, agent=agent, name=name),
+        name=name,
+    )
+
+
+planner_node = _member_node(destination_agent_graph, "destination_agent")
+
+flight_node = _member_node(flight_agent_graph, "flight_agent")
 
-hotel_node = functools.partial(agent_node, agent=hotel_agent_graph, name="hotel_agent")
+hotel_node = _member_node(hotel_agent_graph, "hotel_agent")
 
 full_workflow.add_node("destination_agent", planner_node)
 full_workflow.add_node("flight_agent", flight_node)
@@ -151,22 +481,99 @@ full_workflow.add_edge("hotel_agent", "supervisor")
 
 conditional_map = {k: k for k in members}
 conditional_map["FINISH"] = END
-full_workflow.add_conditional_edges("supervisor", lambda x: x["next"], conditional_map)
+
+
+def _next_members(state: State):
+    if "," not in state["next"]:
+        return state["next"]
+    # Fan out: each branch sees the conversation with its own routing message;
+    # both answers are appended before the supervisor runs again
+    history = state["messages"][:-1]
+    return [
+        Send(member, {**state, "messages": history + [HumanMessage(content=f"Supervisor decided: {member}", name="supervisor")]})
+        for member in state["next"].split(",")
+    ]
+
+
+full_workflow.add_conditional_edges("supervisor", _next_members, conditional_map)
 
 #graph = full_workflow.compile(
 #    checkpointer=memory,
 #)
 
-if environ.get("env","") == "":
-    memory = MemorySaver()
-    graph = full_workflow.compile(checkpointer=memory)
-else:
-    graph = full_workflow.compile()
+graph = full_workflow.compile(checkpointer=make_checkpointer())
 
 graph.name = "SupervisorAgentGraph"
 
-def run_supervisor_agent(input):
-    """Wrap graph invocation for Windmill"""
-    config = RunnableConfig(configurable={"thread_id": "local-test","configurable":{"user_id":918}})
-    result = graph.invoke(input,config=config)
+DEFAULT_THREAD_ID = "local-test"
+DEFAULT_USER_ID = 918
+
+
+def session_config(thread_id: str | None = None, user_id: int | None = None) -> RunnableConfig:
+    """Build the run config for one conversation thread and traveler
+
+    ``user_id`` is coerced with ``int()``, since profiles are looked up by integer ``Id``
+    """
+    return RunnableConfig(
+        configurable={
+            "thread_id": thread_id or DEFAULT_THREAD_ID,
+            "configurable": {"user_id": DEFAULT_USER_ID if user_id is None else int(user_id)},
+        }
+    )
+
+
+def run_supervisor_agent(input, thread_id: str | None = None, user_id: int | None = None, callbacks=None):
+    """Wrap graph invocation for Windmill
+
+    The result carries a "metrics" summary of the run (see common.metrics).
+    """
+    config = session_config(thread_id, user_id)
+    if callbacks:
+        config["callbacks"] = callbacks
+    with instrumented(config) as handler:
+        result = graph.invoke(input,config=config)
+    if handler is not None:
+        result["metrics"] = handler.summary()
+    return result
+
+
+async def arun_supervisor_agent(input, thread_id: str | None = None, user_id: int | None = None):
+    """Async variant of run_supervisor_agent that does not block the event loop"""
+    config = session_config(thread_id, user_id)
+    with instrumented(config) as handler:
+        result = await graph.ainvoke(input,config=config)
+    if handler is not None:
+        result["metrics"] = handler.summary()
     return result
+
+
+async def astream_supervisor_agent(input, thread_id: str | None = None, user_id: int | None = None):
+    """Yield supervisor routing decisions, sub-agent completions and model tokens as they happen
+
+    Events are dicts with an "event" key: "route" (supervisor picked the next member),
+    "agent" (a member finished, with its final content) or "token" (text from any model call).
+    """
+    config = session_config(thread_id, user_id)
+    # The stream may be resumed from other contexts, so skip per-run SQLite attribution
+    with instrumented(config, track_queries=False):
+        async for event in _astream_events(input, config):
+            yield event
+
+
+async def _astream_events(input, config: RunnableConfig):
+    async for namespace, mode, chunk in graph.astream(
+        input, config=config, stream_mode=["updates", "messages"], subgraphs=True
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            text = _text(message.content) if isinstance(message, AIMessageChunk) else ""
+            if text:
+                # namespace is empty for the supervisor and "<member>:<task id>" inside a member
+                agent = namespace[0].split(":")[0] if namespace else metadata.get("langgraph_node")
+                yield {"event": "token", "agent": agent, "text": text}
+        elif not namespace:
+            for node, update in chunk.items():
+                if node == "supervisor":
+                    yield {"event": "route", "next": update["next"]}
+                elif node in members:
+                    yield {"event": "agent", "agent": node, "content": update["messages"][-1].content}
@@ -0,0 +1,5 @@
+import os
+
+# The agent packages build their graphs on import; keep that offline
+os.environ.setdefault("BEDROCK_FAKE", "1")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
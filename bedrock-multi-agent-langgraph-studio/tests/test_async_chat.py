@@ -0,0 +1,172 @@
+import asyncio
+import sys
+import time
+
+import httpx
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import app as app_module
+from app import app
+
+LATENCY = 0.2
+REQUESTS = 8
+WORKFLOW = ["destination_agent", "flight_agent", "hotel_agent"]
+REQUEST = {"messages": [{"role": "user", "content": "Plan a trip for me"}]}
+
+
+def stub_chain(respond) -> RunnableLambda:
+    """A chain that takes LATENCY seconds, blocking in invoke and awaiting in ainvoke."""
+
+    def invoke(state):
+        time.sleep(LATENCY)
+        return respond(state)
+
+    async def ainvoke(state):
+        await asyncio.sleep(LATENCY)
+        return respond(state)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    supervisor = sys.modules["src.supervisor_agent.graph"]
+
+    def route(state):
+        done = {getattr(m, "name", None) for m in state["messages"]}
+        return supervisor.routeResponse(next=next((m for m in WORKFLOW if m not in done), "FINISH"))
+
+    hotel_model = GenericFakeChatModel(
+        messages=iter(AIMessage(content="City Hotel Lisbon, 3 nights FINISHED") for _ in iter(int, 1))
+    )
+    monkeypatch.setattr(supervisor, "supervisor_chain", stub_chain(route))
+    monkeypatch.setattr(
+        sys.modules["destination_agent.graph"],
+        "destination_agent_chain",
+        stub_chain(lambda state: AIMessage(content="We recommend visiting Lisbon.")),
+    )
+    monkeypatch.setattr(
+        sys.modules["flight_agent.graph"],
+        "flight_agent_chain",
+        stub_chain(lambda state: AIMessage(content="Flight AirEurope 09:10 FINISHED")),
+    )
+    monkeypatch.setattr(
+        sys.modules["hotel_agent.graph"],
+        "runnable_with_tools",
+        stub_chain(lambda state: state["messages"]) | hotel_model,
+    )
+
+
+async def timed_chats(n: int) -> tuple[float, float]:
+    """Return the time of one /chat request and the wall time of ``n`` concurrent ones."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+
+        async def chat() -> float:
+            start = time.perf_counter()
+            response = await client.post("/chat", json=REQUEST)
+            response.raise_for_status()
+            return time.perf_counter() - start
+
+        single = await chat()
+        start = time.perf_counter()
+        await asyncio.gather(*(chat() for _ in range(n)))
+        return single, time.perf_counter() - start
+
+
+def test_concurrent_chat_requests_overlap(stub_models):
+    single, wall = asyncio.run(timed_chats(REQUESTS))
+    # Every request waits on several stub model calls; a blocking path would serialize them
+    assert single >= LATENCY
+    assert wall < 2 * single
+    assert wall < REQUESTS * single / 3
+
+
+async def post_chat(body: dict) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/chat", json=body)
+
+
+@pytest.mark.parametrize("user_id, expected", [("918", 918), (" 42 ", 42), (7, 7), (None, None)])
+def test_user_id_is_passed_as_an_int(monkeypatch, user_id, expected):
+    seen = {}
+
+    async def run(input, thread_id=None, user_id=None):
+        seen["user_id"] = user_id
+        return {"messages": []}
+
+    monkeypatch.setattr(app_module, "arun_supervisor_agent", run)
+    response = asyncio.run(post_chat({**REQUEST, "user_id": user_id}))
+    assert response.status_code == 200
+    assert seen["user_id"] == expected
+
+
+@pytest.mark.parametrize("user_id", ["abc", "9.5", 9.5, True, [918]])
+def test_invalid_user_id_is_a_bad_request(monkeypatch, user_id):
+    monkeypatch.setattr(app_module, "arun_supervisor_agent", None)
+    response = asyncio.run(post_chat({**REQUEST, "user_id": user_id}))
+    assert response.status_code == 400
+
+
+def sse_events(text: str) -> list[str]:
+    return [line.removeprefix("event: ") for line in text.splitlines() if line.startswith("event: ")]
+
+
+async def post_chat_stream(body: dict) -> list[str]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        response = await client.post("/chat/stream", json=body)
+        response.raise_for_status()
+        return sse_events(response.text)
+
+
+def test_chat_stream_event_order(stub_models):
+    events = asyncio.run(post_chat_stream(REQUEST))
+    steps = [event for event in events if event != "token"]
+    assert steps == ["start"] + ["route", "agent"] * len(WORKFLOW) + ["route", "done"]
+    # Only the hotel agent's model streams, so its tokens arrive just before it finishes
+    assert set(events[events.index("token"):-3]) == {"token"}
+    assert events[-3:] == ["agent", "route", "done"]
+
+
+def test_chat_stream_error_is_the_last_event(stub_models, monkeypatch):
+    def fail(state):
+        raise RuntimeError("flight search is down")
+
+    monkeypatch.setattr(sys.modules["flight_agent.graph"], "flight_agent_chain", stub_chain(fail))
+    events = asyncio.run(post_chat_stream(REQUEST))
+    assert events[-1] == "error"
+    assert "done" not in events
+
+
+class DisconnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return True
+
+
+def test_chat_stream_disconnect_cancels_the_run(stub_models, monkeypatch):
+    calls = []
+
+    def count(name, chain):
+        return RunnableLambda(lambda state: calls.append(name) or state) | chain
+
+    for name, attr in [("flight_agent", "flight_agent_chain"), ("hotel_agent", "runnable_with_tools")]:
+        module = sys.modules[f"{name}.graph"]
+        monkeypatch.setattr(module, attr, count(name, getattr(module, attr)))
+
+    async def read_until_first_agent():
+        events = app_module.astream_supervisor_agent(REQUEST, thread_id="disconnect-test")
+        stream = app_module._sse_stream(DisconnectedRequest(), events, "disconnect-test")
+        async for chunk in stream:
+            if chunk.startswith("event: agent"):
+                break
+        # What the server does when the client goes away
+        await stream.aclose()
+        await asyncio.sleep(3 * LATENCY)
+
+    asyncio.run(read_until_first_agent())
+    assert calls == []
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from common.bookings_db import BookingsDB, parse_cursor
+from flight_agent import tools as flight_tools
+from hotel_agent import tools as hotel_tools
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = BookingsDB(str(tmp_path / "bookings.db"))
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE hotel_bookings (booking_id INTEGER PRIMARY KEY, user_id INTEGER, check_in_date TEXT)")
+        conn.execute("CREATE TABLE flight_bookings (booking_id INTEGER PRIMARY KEY, user_id INTEGER, departure_date TEXT)")
+        conn.execute("INSERT INTO flight_bookings VALUES (1, 1, '2025-02-01')")
+        conn.executemany(
+            "INSERT INTO hotel_bookings VALUES (?, ?, ?)",
+            [(i, 1, f"2025-01-{i % 3 + 1:02d}") for i in range(1, 8)] + [(8, 2, "2025-01-01")],
+        )
+    yield db
+    db.close_all()
+
+
+def test_pages_cover_every_booking_once(db):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db.list_user_bookings("hotel_bookings", "check_in_date", 1, cursor, limit=3)
+        seen += [(row["check_in_date"], row["booking_id"]) for row in rows]
+        if cursor is None:
+            break
+    assert seen == sorted(seen)
+    assert [booking_id for _, booking_id in seen] == [3, 6, 1, 4, 7, 2, 5]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "2025-01-01|", "|3", "2025-01-01|three", "2025-01-01|-1"])
+def test_malformed_cursor(db, cursor):
+    with pytest.raises(ValueError, match="invalid cursor"):
+        db.list_user_bookings("hotel_bookings", "check_in_date", 1, cursor)
+
+
+def test_nested_transactions_join_the_outer_one(db):
+    def check_ins() -> list:
+        return [row[0] for row in db.fetch_all("SELECT check_in_date FROM hotel_bookings WHERE booking_id = 1")]
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE hotel_bookings SET check_in_date = '2025-03-01' WHERE booking_id = 1")
+        assert db.execute("UPDATE hotel_bookings SET check_in_date = '2025-03-02' WHERE booking_id = 1") == 1
+        with db.transaction() as inner:
+            assert inner is conn and conn.in_transaction
+    assert check_ins() == ["2025-03-02"]
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.execute("UPDATE hotel_bookings SET check_in_date = '2025-04-01' WHERE booking_id = 1")
+            raise RuntimeError
+    assert check_ins() == ["2025-03-02"]
+
+
+def test_parse_cursor_keeps_pipes_in_the_date():
+    assert parse_cursor("2025-01-01|x|12") == ("2025-01-01|x", 12)
+
+
+LIST_TOOLS = [flight_tools.list_my_flight_bookings, hotel_tools.list_my_hotel_bookings]
+
+
+@pytest.fixture
+def list_tools(db, monkeypatch):
+    for module in (flight_tools, hotel_tools):
+        monkeypatch.setattr(module, "get_bookings_db", lambda: db)
+    return LIST_TOOLS
+
+
+CONFIG = {"configurable": {"configurable": {"user_id": 1}}}
+
+
+@pytest.mark.parametrize("tool", LIST_TOOLS, ids=lambda tool: tool.name)
+def test_list_tools_return_json(list_tools, tool):
+    reply = json.loads(tool.invoke({"limit": 1}, config=CONFIG))
+    assert reply["status"] == "FINISHED"
+    assert len(reply["bookings"]) == 1
+
+
+@pytest.mark.parametrize("tool", LIST_TOOLS, ids=lambda tool: tool.name)
+def test_list_tools_report_invalid_cursor(list_tools, tool):
+    reply = json.loads(tool.invoke({"cursor": "garbage"}, config=CONFIG))
+    assert reply["error"].startswith("invalid cursor")
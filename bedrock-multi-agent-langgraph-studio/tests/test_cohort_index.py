@@ -0,0 +1,105 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from common.profiles import ProfileSnapshot
+from destination_agent.cohort import CohortIndex
+
+CITIES = ["Paris", "Rome", "Lisbon", "Berlin", "Oslo", "Prague", "Vienna", "Madrid"]
+
+
+def legacy_recommend(df: pd.DataFrame, user_id) -> str | None:
+    """The DataFrame/Counter logic compare_and_recommend_destination used before the index."""
+    user_data = df[df["Id"] == user_id].iloc[0]
+    current_location = user_data["Current_Location"]
+    age = user_data["Age"]
+    past_destinations = user_data["Past_Travel_Destinations"].split(", ")
+    similar_users = df[(df["Current_Location"] == current_location) & (df["Age"].between(age - 5, age + 5))]
+    destination_counts = Counter(
+        dest for user_dests in similar_users["Past_Travel_Destinations"].str.split(", ") for dest in user_dests
+    )
+    for dest in [current_location] + past_destinations:
+        if dest in destination_counts:
+            del destination_counts[dest]
+    if not destination_counts:
+        return None
+    return destination_counts.most_common(1)[0][0]
+
+
+def indexed_recommend(snapshot: ProfileSnapshot, index: CohortIndex, user_id) -> str | None:
+    user_data = snapshot.get(user_id)
+    location = user_data["Current_Location"]
+    return index.recommend(location, user_data["Age"], [location] + user_data["Past_Travel_Destinations"].split(", "))
+
+
+def travelers(rows) -> pd.DataFrame:
+    return pd.DataFrame(
+        [(float(i), loc, float(age), past) for i, (loc, age, past) in enumerate(rows, start=1)],
+        columns=["Id", "Current_Location", "Age", "Past_Travel_Destinations"],
+    )
+
+
+def synthetic(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        past = rng.choice(CITIES, size=rng.integers(1, 4))
+        rows.append((str(rng.choice(CITIES[:3])), int(rng.integers(20, 60)), ", ".join(past)))
+    return travelers(rows)
+
+
+def assert_parity(df: pd.DataFrame):
+    snapshot = ProfileSnapshot(df, mtime_ns=None)
+    index = CohortIndex(snapshot.frame)
+    for user_id in df["Id"].astype(int):
+        assert indexed_recommend(snapshot, index, user_id) == legacy_recommend(df, user_id), user_id
+
+
+def test_ties_go_to_the_destination_seen_first():
+    # Rome and Oslo both appear twice in the Paris/30±5 cohort; Rome comes first in the file
+    df = travelers(
+        [
+            ("Paris", 30, "Lisbon"),
+            ("Paris", 28, "Rome, Oslo"),
+            ("Paris", 34, "Oslo, Rome"),
+            ("Paris", 50, "Berlin, Berlin, Berlin"),
+        ]
+    )
+    assert_parity(df)
+    snapshot = ProfileSnapshot(df, mtime_ns=None)
+    assert indexed_recommend(snapshot, CohortIndex(snapshot.frame), 1) == "Rome"
+
+
+def test_cohort_edges_and_exclusions():
+    df = travelers(
+        [
+            ("Rome", 40, "Paris"),
+            ("Rome", 35, "Oslo"),  # exactly 5 years younger: inside the cohort
+            ("Rome", 46, "Vienna, Vienna"),  # 6 years older: outside
+            ("Rome", 45, "Rome, Paris"),  # own location is never recommended
+            ("Lisbon", 40, "Madrid"),
+        ]
+    )
+    assert_parity(df)
+
+
+def test_nothing_left_to_recommend():
+    df = travelers([("Oslo", 30, "Paris"), ("Oslo", 31, "Paris, Oslo")])
+    assert_parity(df)
+    snapshot = ProfileSnapshot(df, mtime_ns=None)
+    assert indexed_recommend(snapshot, CohortIndex(snapshot.frame), 1) is None
+
+
+def test_unknown_user_and_location():
+    df = travelers([("Paris", 30, "Rome")])
+    snapshot = ProfileSnapshot(df, mtime_ns=None)
+    index = CohortIndex(snapshot.frame)
+    assert snapshot.get(999) is None
+    assert index.recommend("Atlantis", 30, ["Atlantis"]) is None
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_legacy_on_synthetic_travelers(seed):
+    assert_parity(synthetic(300, seed))
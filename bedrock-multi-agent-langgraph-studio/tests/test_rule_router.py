@@ -0,0 +1,48 @@
+import sys
+import uuid
+
+import pytest
+
+import src.supervisor_agent.graph as supervisor
+
+# The member graphs run their real prompts and tools; with BEDROCK_FAKE=1 the models
+# follow common.fake_bedrock's script, whose answers carry no FINISHED marker
+WORKFLOW = ["destination_agent", "flight_agent", "hotel_agent"]
+
+
+def run(request: str) -> tuple[list[str], dict]:
+    before = supervisor.router.stats()
+    result = supervisor.run_supervisor_agent(
+        {"messages": [("user", request)]}, thread_id=str(uuid.uuid4()), user_id=918
+    )
+    after = supervisor.router.stats()
+    members = [m.name for m in result["messages"] if m.name in WORKFLOW]
+    return members, {key: after[key] - before[key] for key in ("decisions", "rule_hits", "llm_calls")}
+
+
+@pytest.fixture(autouse=True)
+def rules(monkeypatch):
+    monkeypatch.setattr(supervisor, "SUPERVISOR_ROUTER", "rules")
+
+
+def test_rules_route_every_hop_after_the_first():
+    members, counts = run("Plan a vacation for me next month")
+    assert members == WORKFLOW
+    assert counts == {"decisions": 4, "rule_hits": 3, "llm_calls": 1}
+
+
+def test_member_reply_is_marked_finished_after_a_tool_call():
+    result = supervisor.run_supervisor_agent(
+        {"messages": [("user", "Suggest hotels for my trip")]}, thread_id=str(uuid.uuid4()), user_id=918
+    )
+    hotel = [m for m in result["messages"] if m.name == "hotel_agent"]
+    assert "FINISHED" not in hotel[-1].content
+    assert hotel[-1].additional_kwargs["member_finished"] is True
+
+
+def test_member_that_asks_back_goes_to_the_llm(monkeypatch):
+    model = sys.modules["destination_agent.graph"].llm
+    monkeypatch.setitem(model.script, "destination_agent", {"answer": "Which month would you like to travel?"})
+    members, counts = run("Plan a vacation for me")
+    assert members == ["destination_agent"]
+    assert counts == {"decisions": 2, "rule_hits": 0, "llm_calls": 2}
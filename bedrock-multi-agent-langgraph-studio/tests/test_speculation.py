@@ -0,0 +1,39 @@
+import uuid
+
+import pytest
+
+import src.supervisor_agent.graph as supervisor
+
+TURNS = ["Plan a vacation for me", "Plan another vacation for me"]
+
+
+def destination_replies(thread_id: str) -> list[str]:
+    """Run TURNS on one thread and return destination_agent's reply of each turn."""
+    replies = []
+    for turn in TURNS:
+        result = supervisor.run_supervisor_agent({"messages": [("user", turn)]}, thread_id=thread_id, user_id=918)
+        replies.append([m.content for m in result["messages"] if m.name == "destination_agent"][-1])
+    return replies
+
+
+@pytest.fixture
+def speculate(monkeypatch):
+    def set_speculate(enabled: bool):
+        monkeypatch.setattr(supervisor, "SUPERVISOR_SPECULATE", enabled)
+
+    return set_speculate
+
+
+def test_hit_matches_the_regular_run(speculate):
+    speculate(False)
+    regular = destination_replies(str(uuid.uuid4()))
+
+    speculate(True)
+    before = supervisor.speculation.stats()
+    speculated = destination_replies(str(uuid.uuid4()))
+    after = supervisor.speculation.stats()
+
+    assert speculated == regular
+    # Only the first turn of the thread is speculated on, and it is a hit
+    assert after["launched"] - before["launched"] == 1
+    assert after["hits"] - before["hits"] == 1
@@ -0,0 +1,27 @@
+"""Prune and compact the SQLite checkpoint database used with env=sqlite.
+
+Deletes whole conversation threads that have been idle longer than --max-age-days,
+then the least recently updated threads until the rest fit in --max-mb, and
+reclaims the freed space.
+"""
+
+import argparse
+
+from src.common.sqlite_checkpoint import CHECKPOINT_DB_PATH, SQLiteCheckpointSaver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=CHECKPOINT_DB_PATH)
+    parser.add_argument("--max-age-days", type=float)
+    parser.add_argument("--max-mb", type=float)
+    args = parser.parse_args()
+
+    result = SQLiteCheckpointSaver(args.db).vacuum(
+        max_age_seconds=args.max_age_days * 86400 if args.max_age_days is not None else None,
+        max_bytes=int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None,
+    )
+    print(
+        f"Deleted {result['deleted_threads']} threads, kept {result['kept_threads']}; "
+        f"{result['bytes_before'] / 1e6:.1f} MB -> {result['bytes_after'] / 1e6:.1f} MB"
+    )
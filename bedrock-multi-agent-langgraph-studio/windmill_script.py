@@ -1,8 +1,17 @@
 user_input="${1:-input message}"
+# One checkpoint thread per conversation; without one, each job starts a new conversation
+thread_id="${2:-${WM_JOB_ID:-}}"
 
 
 IMAGE="$DOCKER_IMAGE"
 
+# Warm path: hand the prompt to a long-lived `runner.py --serve` container
+# (see "Warm Worker" in README.md) instead of starting a new one per message
+if [ -n "$WARM_WORKER_CONTAINER" ]; then
+  docker exec "$WARM_WORKER_CONTAINER" python runner.py --send "$user_input" ${thread_id:+--thread-id "$thread_id"}
+  exit $?
+fi
+
 docker pull $IMAGE
 
 docker run \
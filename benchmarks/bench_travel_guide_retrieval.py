@@ -0,0 +1,78 @@
+"""Latency and recall of the travel_guide retrievers on data/examples.txt.
+
+Compares the BM25 ``KeywordRetriever``, the ``HybridRetriever`` and the
+``ParentDocumentRetriever`` over FAISS that ``utils.create_agent`` can use. Each
+example is queried twice: as the whole sentence, and as the city keyword the
+agent is told to search with. A result counts as a hit when its top document
+comes from that city's guide; examples naming no city with a guide are timed
+but not scored. The vector retriever calls Bedrock for query embeddings
+(cached after the first pass, see ``QueryEmbeddingCache``).
+
+Usage:
+    python benchmarks/bench_travel_guide_retrieval.py [--modes keyword,hybrid,vector] [--repeat 5]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def guide_city(doc) -> str:
+    """"new_york_travel_guide-1.pdf" -> "new york" """
+    return re.sub(r"_travel_guide.*$", "", doc.metadata["file"]).replace("_", " ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default="keyword,hybrid,vector")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    import utils
+
+    retrievers = {mode: utils.get_travel_guide_retriever(mode) for mode in args.modes.split(",")}
+    store = utils.SQLiteDocStore(utils.get_travel_guide_retriever("keyword").db)
+
+    cities = sorted({guide_city(doc) for doc in store.mget(list(store.yield_keys()))}, key=len, reverse=True)
+    examples = [line.strip() for line in (ROOT / "data" / "examples.txt").read_text().splitlines() if line.strip()]
+    queries = {"sentence": [], "keyword": []}
+    for example in examples:
+        city = next((c for c in cities if re.search(rf"\b{re.escape(c)}\b", example.lower())), None)
+        queries["sentence"].append((example, city))
+        queries["keyword"].append((city.title() if city else example, city))
+
+    print(f"{len(examples)} examples, {sum(1 for _, c in queries['keyword'] if c)} naming a city with a guide")
+    print(f"  {'mode':<8} {'queries':<9} {'mean ms':>8} {'p95 ms':>8} {'recall@1':>9}")
+    for mode, retriever in retrievers.items():
+        for kind, pairs in queries.items():
+            times, hits, scored = [], 0, 0
+            for i in range(args.repeat):
+                for query, city in pairs:
+                    start = time.perf_counter()
+                    docs = retriever.invoke(query)
+                    times.append(time.perf_counter() - start)
+                    if i == 0 and city:
+                        scored += 1
+                        hits += bool(docs) and guide_city(docs[0]) == city
+            recall = f"{hits / scored:.2f}" if scored else "-"
+            print(
+                f"  {mode:<8} {kind:<9} {statistics.mean(times) * 1000:>8.2f} "
+                f"{percentile(times, 0.95) * 1000:>8.2f} {recall:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
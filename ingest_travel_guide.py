@@ -0,0 +1,224 @@
+"""Add travel guides to the store utils.create_agent searches, without rebuilding it.
+
+Streams PDFs (one parent document per page, like the bundled guides) and text
+files through the same child splitter as create_agent, embeds the chunks in
+concurrent Bedrock requests and appends them to the FAISS index and SQLite
+docstore under TRAVEL_GUIDE_DIR. Pages whose content hash matches the last run
+are skipped; changed pages replace their previous version.
+
+The updated index is written as a new generation (``utils.index_file``) and
+becomes live in one SQLite transaction together with its positions and the new
+parent documents, so an interrupted run leaves the previous generation intact.
+Running agents keep reading the generation they opened until
+``utils.invalidate()``; the one before it, with the chunks and replaced parents
+only it uses, is removed by the next run.
+
+Usage:
+    python ingest_travel_guide.py data/europe data/us/boston_travel_guide.pdf [--concurrency 16]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+from langchain_core.documents import Document
+
+import utils
+
+SUFFIXES = (".pdf", ".txt", ".md")
+
+
+def iter_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    if name.lower().endswith(SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def iter_pages(paths):
+    """Yield one Document per PDF page or text file, with the metadata the bundled guides carry"""
+    for path in iter_files(paths):
+        metadata = {"source": path, "file": os.path.basename(path)}
+        if path.lower().endswith(".pdf"):
+            from langchain_community.document_loaders import PyPDFLoader
+
+            for page in PyPDFLoader(path).lazy_load():
+                yield Document(page_content=page.page_content, metadata={**metadata, "page": page.metadata.get("page", 0)})
+        else:
+            with open(path, encoding="utf-8") as f:
+                yield Document(page_content=f.read(), metadata={**metadata, "page": 0})
+
+
+def content_hash(doc: Document) -> str:
+    return hashlib.sha256(doc.page_content.encode()).hexdigest()
+
+
+def backfill_hashes(db: utils.DocumentDB):
+    """Record hashes for documents that predate ingestion (e.g. exported from the pickles)"""
+    conn = db.connection()
+    if conn.execute("SELECT 1 FROM ingested LIMIT 1").fetchone():
+        return
+    rows = []
+    for parent_id, page_content, metadata in conn.execute("SELECT id, page_content, metadata FROM parents"):
+        metadata = json.loads(metadata)
+        if "source" in metadata:
+            doc = Document(page_content=page_content)
+            rows.append((metadata["source"], metadata.get("page", 0), content_hash(doc), parent_id))
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO ingested VALUES (?, ?, ?, ?)", rows)
+
+
+def embed(embeddings, texts: list[str], pool: ThreadPoolExecutor, batch_size: int) -> list[list[float]]:
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    return [vector for vectors in pool.map(embeddings.embed_documents, batches) for vector in vectors]
+
+
+def remove_chunks(vector_db: FAISS, conn, parent_ids: list[str]):
+    """Drop the vectors of ``parent_ids``' chunks from the in-memory index and renumber the rest.
+
+    Unlike ``FAISS.delete`` this leaves the chunk rows alone: agents still reading the
+    live generation may look them up until collect_garbage runs on a later generation.
+    """
+    chunk_ids = set()
+    for start in range(0, len(parent_ids), 500):
+        batch = parent_ids[start:start + 500]
+        query = f"SELECT id FROM chunks WHERE json_extract(metadata, '$.doc_id') IN ({','.join('?' * len(batch))})"
+        chunk_ids.update(row[0] for row in conn.execute(query, batch))
+    mapping = vector_db.index_to_docstore_id
+    removed = [position for position, id_ in mapping.items() if id_ in chunk_ids]
+    if removed:
+        vector_db.index.remove_ids(np.array(removed, dtype=np.int64))
+        remaining = [id_ for position, id_ in sorted(mapping.items()) if id_ not in chunk_ids]
+        vector_db.index_to_docstore_id = dict(enumerate(remaining))
+
+
+def collect_garbage(directory: str, conn, generation: int):
+    """Delete generations older than the one before ``generation``, then the chunks and parents nothing uses.
+
+    A parent stays while a page is recorded with it or a kept chunk points at it, so
+    pages replaced by this run remain readable from the previous generation.
+    """
+    with conn:
+        conn.execute("DELETE FROM index_positions WHERE generation < ?", (generation - 1,))
+        conn.execute("DELETE FROM chunks WHERE id NOT IN (SELECT id FROM index_positions)")
+        conn.execute(
+            "DELETE FROM parents WHERE id NOT IN (SELECT parent_id FROM ingested)"
+            " AND id NOT IN (SELECT json_extract(metadata, '$.doc_id') FROM chunks)"
+        )
+    for old in range(generation - 1):
+        path = utils.index_file(directory, old)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="PDF or text files, or directories of them")
+    parser.add_argument("--directory", default=utils.TRAVEL_GUIDE_DIR, help="travel guide store to update")
+    parser.add_argument("--batch-size", type=int, default=256, help="pages split and embedded together")
+    # Titan embeds one text per request, so each worker sends its chunks one after another
+    parser.add_argument("--embed-batch-size", type=int, default=4, help="chunks per embedding worker task")
+    parser.add_argument("--concurrency", type=int, default=16, help="embedding workers, i.e. requests in flight")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    faiss = dependable_faiss_import()
+    embeddings = utils.get_embeddings_model()
+    if not utils.travel_guide_exists(args.directory) and args.directory == utils.TRAVEL_GUIDE_DIR and os.path.exists(utils.VECTOR_STORE_PICKLE):
+        utils.export_travel_guide()
+    if utils.travel_guide_exists(args.directory):
+        vector_db, store = utils.load_travel_guide(embeddings, args.directory, writable=True)
+        db = store.db
+        # Work on a copy; readers keep the live generation's positions until the switch
+        vector_db.index_to_docstore_id = dict(vector_db.index_to_docstore_id.items())
+    else:
+        os.makedirs(args.directory, exist_ok=True)
+        db = utils.DocumentDB(os.path.join(args.directory, utils.TRAVEL_GUIDE_DOCSTORE))
+        store, vector_db = utils.SQLiteDocStore(db), None
+    generation = db.generation()
+    conn = db.connection()
+    backfill_hashes(db)
+
+    splitter = utils.make_child_splitter()
+    counts = {"pages": 0, "unchanged": 0, "added": 0, "replaced": 0, "chunks": 0}
+    # Parents are written with the switch, so searches never see pages of an unfinished run
+    ingested, parents, stale = [], [], []
+    pages = iter_pages(args.paths)
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        while batch := list(itertools.islice(pages, args.batch_size)):
+            children = []
+            for doc in batch:
+                counts["pages"] += 1
+                digest = content_hash(doc)
+                row = conn.execute(
+                    "SELECT hash, parent_id FROM ingested WHERE source = ? AND page = ?",
+                    (doc.metadata["source"], doc.metadata["page"]),
+                ).fetchone()
+                if row and row[0] == digest:
+                    counts["unchanged"] += 1
+                    continue
+                if row:
+                    stale.append(row[1])
+                    counts["replaced"] += 1
+                else:
+                    counts["added"] += 1
+                parent_id = str(uuid.uuid4())
+                parents.append((parent_id, doc))
+                for child in splitter.split_documents([doc]):
+                    child.metadata["doc_id"] = parent_id
+                    children.append(child)
+                ingested.append((doc.metadata["source"], doc.metadata["page"], digest, parent_id))
+            if not children:
+                continue
+
+            vectors = embed(embeddings, [c.page_content for c in children], pool, args.embed_batch_size)
+            if vector_db is None:
+                vector_db = FAISS(embeddings, faiss.IndexFlatL2(len(vectors[0])), utils.SQLiteChunkStore(db), {})
+            vector_db.add_embeddings(
+                [(c.page_content, v) for c, v in zip(children, vectors)],
+                metadatas=[c.metadata for c in children],
+                ids=[str(uuid.uuid4()) for _ in children],
+            )
+            counts["chunks"] += len(children)
+
+    switch = vector_db is not None and (counts["chunks"] or stale)
+    if switch:
+        if stale:
+            remove_chunks(vector_db, conn, stale)
+        generation += 1
+        path = utils.index_file(args.directory, generation)
+        faiss.write_index(vector_db.index, path + ".tmp")
+        os.replace(path + ".tmp", path)
+    with conn:
+        if switch:
+            # Rows left by an earlier run that stopped before switching
+            conn.execute("DELETE FROM index_positions WHERE generation = ?", (generation,))
+            conn.executemany(
+                "INSERT INTO index_positions VALUES (?, ?, ?)",
+                [(generation, position, id_) for position, id_ in vector_db.index_to_docstore_id.items()],
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(generation),))
+        # Only now, so a run that stops early is redone rather than skipped
+        store.write(conn, parents)
+        conn.executemany("INSERT OR REPLACE INTO ingested VALUES (?, ?, ?, ?)", ingested)
+    # Also clears what an interrupted run left behind
+    collect_garbage(args.directory, conn, generation)
+
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# utils.py lives at the repository root, next to the notebooks that import it
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+utils = pytest.importorskip("utils")
+ingest = pytest.importorskip("ingest_travel_guide")
+
+from langchain_core.documents import Document  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = utils.DocumentDB(str(tmp_path / utils.TRAVEL_GUIDE_DOCSTORE))
+    yield db
+    db.close()
+
+
+def add_page(conn, generation: int, parent_id: str, text: str, source: str = "lisbon.pdf"):
+    """Record one page with a single chunk the way a finished ingest run does."""
+    utils.SQLiteDocStore.write(conn, [(parent_id, Document(page_content=text, metadata={"source": source, "page": 0}))])
+    conn.execute("INSERT INTO chunks VALUES (?, ?, ?)", (f"chunk-{parent_id}", text, json.dumps({"doc_id": parent_id})))
+    conn.execute("INSERT INTO index_positions VALUES (?, 0, ?)", (generation, f"chunk-{parent_id}"))
+    conn.execute("INSERT OR REPLACE INTO ingested VALUES (?, 0, ?, ?)", (source, text, parent_id))
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(generation),))
+
+
+def parent_ids(conn) -> list[str]:
+    return sorted(row[0] for row in conn.execute("SELECT id FROM parents"))
+
+
+def test_replaced_parent_lives_until_its_generation_is_collected(db, tmp_path):
+    conn = db.connection()
+    keyword = utils.KeywordRetriever(db=db, k=5)
+    with conn:
+        add_page(conn, 0, "old", "Lisbon trams climb the old town")
+    with conn:
+        add_page(conn, 1, "new", "Lisbon trams climb the Alfama hills")
+    ingest.collect_garbage(str(tmp_path), conn, 1)
+    # Readers of generation 0 still resolve the old parent; searches only see the new page
+    assert parent_ids(conn) == ["new", "old"]
+    assert [doc.page_content for doc in keyword.invoke("lisbon trams")] == ["Lisbon trams climb the Alfama hills"]
+
+    ingest.collect_garbage(str(tmp_path), conn, 2)
+    assert parent_ids(conn) == ["new"]
+    conn.execute("INSERT INTO parents_fts (parents_fts) VALUES ('integrity-check')")
+
+
+def test_parents_of_an_interrupted_run_are_collected(db, tmp_path):
+    conn = db.connection()
+    with conn:
+        add_page(conn, 0, "kept", "Boston harbor walks")
+    # A run that stopped before the switch: parent and chunk rows, no positions or ingested row
+    utils.SQLiteDocStore(db).mset([("orphan", Document(page_content="Boston harbor cruises", metadata={"source": "x.pdf"}))])
+    with conn:
+        conn.execute("INSERT INTO chunks VALUES ('chunk-orphan', 'cruises', ?)", (json.dumps({"doc_id": "orphan"}),))
+    ingest.collect_garbage(str(tmp_path), conn, 0)
+    assert parent_ids(conn) == ["kept"]
+    assert [row[0] for row in conn.execute("SELECT id FROM chunks")] == ["chunk-kept"]
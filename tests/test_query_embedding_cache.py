@@ -0,0 +1,131 @@
+import threading
+
+import pytest
+
+utils = pytest.importorskip("utils")
+
+
+class StubEmbeddings:
+    """Embeds each text as [len(text), call number, 0.5], optionally blocking until released."""
+
+    def __init__(self, size: int = 3, gate: threading.Event | None = None):
+        self.size = size
+        self.gate = gate
+        self.texts = []
+        self.entered = threading.Event()
+
+    def embed_query(self, text: str) -> list[float]:
+        self.texts.append(text)
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return [float(len(text)), float(len(self.texts)), 0.5, 0.25][: self.size]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "query_embeddings.bin")
+
+
+def test_normalized_queries_share_the_vector_of_the_text_as_written(path):
+    stub = StubEmbeddings()
+    cache = utils.QueryEmbeddingCache(stub, path)
+    first = cache.embed_query("  Hotels in BOSTON ")
+    assert cache.embed_query("hotels in boston") == first
+    assert stub.texts == ["  Hotels in BOSTON "]
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_lru_evicts_to_disk(path):
+    stub = StubEmbeddings()
+    cache = utils.QueryEmbeddingCache(stub, path, max_entries=2)
+    vectors = {query: cache.embed_query(query) for query in ["a", "bb", "ccc"]}
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.embed_query("a") == vectors["a"]
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["misses"], stats["disk_entries"]) == (1, 3, 3)
+    assert len(stub.texts) == 3
+
+
+def test_reload_from_disk(path):
+    first = utils.QueryEmbeddingCache(StubEmbeddings(), path)
+    vectors = [first.embed_query(query) for query in ["lisbon", "paris"]]
+    stub = StubEmbeddings()
+    second = utils.QueryEmbeddingCache(stub, path)
+    assert [second.embed_query(query) for query in ["lisbon", "paris"]] == vectors
+    assert stub.texts == []
+    assert second.stats()["disk_hits"] == 2
+
+
+def test_concurrent_misses_are_coalesced(path):
+    stub = StubEmbeddings(gate=threading.Event())
+    cache = utils.QueryEmbeddingCache(stub, path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.embed_query("rome"))) for _ in range(4)]
+    threads[0].start()
+    assert stub.entered.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while cache.stats()["coalesced"] < 3:
+        pass
+    stub.gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert stub.texts == ["rome"]
+    assert len(results) == 4 and all(result == results[0] for result in results)
+
+
+def test_appends_from_two_caches_keep_their_rows(path):
+    # Both open the file before either writes, like forked workers
+    a = utils.QueryEmbeddingCache(StubEmbeddings(), path, max_entries=1)
+    b = utils.QueryEmbeddingCache(StubEmbeddings(), path, max_entries=1)
+    from_a = a.embed_query("madrid")
+    from_b = b.embed_query("oslo")
+    b.embed_query("vienna")  # evicts oslo from b's memory
+    assert b.embed_query("oslo") == from_b
+    assert b.stats()["disk_hits"] == 1
+    assert utils.QueryEmbeddingCache(StubEmbeddings(), path).embed_query("madrid") == from_a
+
+
+def test_a_row_holding_another_key_is_a_miss(path):
+    stub = StubEmbeddings()
+    cache = utils.QueryEmbeddingCache(stub, path, max_entries=1)
+    cache.embed_query("madrid")
+    cache.embed_query("oslo")
+    # Point madrid at oslo's record, as a stale row number would
+    cache._rows[next(iter(cache._rows))] = 1
+    cache.embed_query("madrid")
+    assert stub.texts == ["madrid", "oslo", "madrid"]
+
+
+def test_torn_record_is_dropped(path):
+    cache = utils.QueryEmbeddingCache(StubEmbeddings(), path)
+    before = cache.embed_query("berlin")
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+    after = cache.embed_query("prague")
+    reloaded = utils.QueryEmbeddingCache(StubEmbeddings(), path)
+    assert [reloaded.embed_query("berlin"), reloaded.embed_query("prague")] == [before, after]
+    assert reloaded.stats()["disk_hits"] == 2
+
+
+def test_foreign_header_is_left_alone(path):
+    with open(path, "wb") as f:
+        f.write(b"not an embedding file")
+    stub = StubEmbeddings()
+    cache = utils.QueryEmbeddingCache(stub, path)
+    assert cache.embed_query("tokyo") == cache.embed_query("tokyo")
+    assert open(path, "rb").read() == b"not an embedding file"
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_dimension_mismatch_only_costs_persistence(path):
+    utils.QueryEmbeddingCache(StubEmbeddings(size=3), path).embed_query("boston")
+    size = len(open(path, "rb").read())
+    cache = utils.QueryEmbeddingCache(StubEmbeddings(size=4), path)
+    assert len(cache.embed_query("chicago")) == 4
+    assert len(open(path, "rb").read()) == size
+    assert cache.embed_query("boston") == [6.0, 1.0, 0.5]
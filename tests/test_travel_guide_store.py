@@ -0,0 +1,142 @@
+import os
+import pickle
+import sqlite3
+
+import pytest
+
+utils = pytest.importorskip("utils")
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.stores import InMemoryStore  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = utils.DocumentDB(str(tmp_path / utils.TRAVEL_GUIDE_DOCSTORE))
+    yield db
+    db.close()
+
+
+def doc(text: str, **metadata) -> Document:
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_docstore(db):
+    store = utils.SQLiteDocStore(db)
+    store.mset([("p1", doc("Lisbon trams", source="lisbon.pdf", page=3)), ("q1", doc("Paris cafes"))])
+    found = store.mget(["q1", "missing", "p1"])
+    assert found[1] is None
+    assert (found[0].page_content, found[2].metadata) == ("Paris cafes", {"source": "lisbon.pdf", "page": 3})
+    assert sorted(store.yield_keys()) == ["p1", "q1"]
+    assert list(store.yield_keys(prefix="p")) == ["p1"]
+    store.mset([("p1", doc("Lisbon trams and tiles"))])
+    store.mdelete(["q1"])
+    assert [d.page_content for d in store.mget(["p1", "q1"]) if d] == ["Lisbon trams and tiles"]
+    db.connection().execute("INSERT INTO parents_fts (parents_fts) VALUES ('integrity-check')")
+
+
+def test_chunk_store(db):
+    chunks = utils.SQLiteChunkStore(db)
+    chunks.add({"c1": doc("trams", doc_id="p1")})
+    assert chunks.search("c1").metadata == {"doc_id": "p1"}
+    assert chunks.search("c2") == "ID c2 not found."
+    with pytest.raises(ValueError):
+        chunks.add({"c1": doc("again")})
+    chunks.delete(["c1"])
+    assert chunks.search("c1") == "ID c1 not found."
+
+
+def test_index_to_id_keeps_generations_apart(db):
+    live = utils.SQLiteIndexToId(db)
+    live.update({0: "a", 1: "b", 2: "c"})
+    staged = utils.SQLiteIndexToId(db, generation=1)
+    staged[0] = "c"
+    assert (live[1], len(live), list(live)) == ("b", 3, [0, 1, 2])
+    assert (dict(staged.items()), len(staged)) == ({0: "c"}, 1)
+    del live[1]
+    assert list(live) == [0, 2]
+    with pytest.raises(KeyError):
+        live[1]
+    with pytest.raises(KeyError):
+        del staged[5]
+
+
+def test_generation_and_index_file(db, tmp_path):
+    directory = str(tmp_path)
+    assert db.generation() == 0
+    assert utils.index_file(directory, 0) == os.path.join(directory, utils.TRAVEL_GUIDE_INDEX)
+    assert utils.index_file(directory, 3) == os.path.join(directory, "index.3.faiss")
+    with db.connection() as conn:
+        conn.execute("INSERT INTO meta VALUES ('generation', '3')")
+    assert db.generation() == 3
+    assert utils.travel_guide_exists(directory)
+    assert not utils.travel_guide_exists(str(tmp_path / "elsewhere"))
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_migrates_unversioned_positions(tmp_path, version):
+    path = str(tmp_path / utils.TRAVEL_GUIDE_DOCSTORE)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE parents (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL);
+        CREATE TABLE chunks (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL);
+        CREATE TABLE positions (position INTEGER PRIMARY KEY, id TEXT NOT NULL);
+        INSERT INTO parents VALUES ('p1', 'Boston harbor walks', '{}');
+        INSERT INTO positions VALUES (0, 'c1'), (1, 'c2');
+        """
+    )
+    if version == 1:
+        # Version 1 files already carried the keyword index
+        conn.execute(
+            "CREATE VIRTUAL TABLE parents_fts USING fts5("
+            "page_content, content='parents', tokenize='unicode61 remove_diacritics 2')"
+        )
+        conn.execute("INSERT INTO parents_fts (parents_fts) VALUES ('rebuild')")
+        conn.execute("PRAGMA user_version=1")
+    conn.commit()
+    conn.close()
+
+    db = utils.DocumentDB(path)
+    conn = db.connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == utils.DOCSTORE_VERSION
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'positions'").fetchone() is None
+    assert dict(utils.SQLiteIndexToId(db, db.generation()).items()) == {0: "c1", 1: "c2"}
+    assert [d.page_content for d in utils.KeywordRetriever(db=db).invoke("harbor")] == ["Boston harbor walks"]
+    db.close()
+
+
+class WordEmbeddings(Embeddings):
+    """One dimension per known word, enough for nearest-neighbour checks"""
+
+    words = ["lisbon", "tram", "paris", "cafe", "boston", "harbor"]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(word in text.lower()) for word in self.words]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def test_export_and_load_round_trip(tmp_path):
+    pytest.importorskip("faiss")
+    embeddings = WordEmbeddings()
+    parents = {"p1": doc("Lisbon guide", source="lisbon.pdf"), "p2": doc("Paris guide", source="paris.pdf")}
+    chunks = [doc("Lisbon tram 28", doc_id="p1"), doc("Paris cafe terraces", doc_id="p2"), doc("Lisbon harbor", doc_id="p1")]
+    vector_db = utils.FAISS.from_documents(chunks, embeddings)
+    parent_store = InMemoryStore()
+    parent_store.mset(list(parents.items()))
+    vector_file, doc_file = tmp_path / "vectors.pkl", tmp_path / "docs.pkl"
+    vector_file.write_bytes(pickle.dumps(vector_db.serialize_to_bytes()))
+    doc_file.write_bytes(pickle.dumps(parent_store))
+
+    directory = str(tmp_path / "travel_guide")
+    utils.export_travel_guide(str(vector_file), str(doc_file), directory)
+    loaded, store = utils.load_travel_guide(embeddings, directory)
+
+    found = loaded.similarity_search("paris cafe", k=1)
+    assert [d.page_content for d in found] == ["Paris cafe terraces"]
+    assert store.mget([found[0].metadata["doc_id"]])[0].page_content == "Paris guide"
+    assert [d.page_content for d in loaded.similarity_search("lisbon tram", k=1)] == ["Lisbon tram 28"]
+    assert loaded.index.ntotal == 3 and len(loaded.index_to_docstore_id) == 3
@@ -1,8 +1,26 @@
 import pandas as pd
+import numpy as np
 import boto3
+from botocore.config import Config
+import asyncio
+import fcntl
+import functools
+import hashlib
+import json
+import os
 import pickle
+import re
+import sqlite3
+import threading
+import unicodedata
 
-from collections import Counter
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from collections.abc import MutableMapping
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.stores import BaseStore
 from langchain_core.tools import tool
 from langchain_core.runnables.config import RunnableConfig
 from langchain_aws import ChatBedrockConverse
@@ -11,7 +29,9 @@ from langchain_aws.embeddings.bedrock import BedrockEmbeddings
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 from langchain.tools.retriever import create_retriever_tool
+from langchain_community.docstore.base import AddableMixin, Docstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
 from langchain.retrievers import ParentDocumentRetriever
 
 
@@ -20,7 +40,6 @@ from ragas.messages import AIMessage as RGAIMessage
 from ragas.messages import ToolMessage as RGToolMessage
 from ragas.messages import ToolCall as RGToolCall
 
-from io import BytesIO
 
 def convert_message_langchain_to_ragas(lc_message):
     message_dict = lc_message.model_dump()
@@ -50,31 +69,669 @@ def convert_message_langchain_to_ragas(lc_message):
     return rg_message
 
 
-def create_agent(enable_memory = False):
-    # ---- ⚠️ Update region for your AWS setup ⚠️ ----
-    bedrock_client = boto3.client("bedrock-runtime", region_name="us-west-2")
-    
-    
-    
-    llm = ChatBedrockConverse(
-        model="anthropic.claude-3-haiku-20240307-v1:0",
+TRAVEL_DATA_COLUMNS = ["Id", "Name","Current_Location","Age","Past_Travel_Destinations", "Number_of_Trips", "Flight_Number", "Departure_City","Arrival_City","Flight_Date",]
+
+
+@functools.lru_cache(maxsize=4)
+def _load_travel_data(file_path: str, mtime_ns: int) -> pd.DataFrame:
+    return pd.read_csv(file_path)
+
+
+def read_travel_data(file_path: str = "data/synthetic_travel_data.csv") -> pd.DataFrame:
+    """Read travel data from CSV file, parsing it again only when its mtime changes"""
+    try:
+        mtime_ns = os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return pd.DataFrame(columns=TRAVEL_DATA_COLUMNS)
+    return _load_travel_data(os.path.abspath(file_path), mtime_ns)
+
+
+# Model and region have their own names, so the studio's BEDROCK_MODEL_ID / BEDROCK_REGION
+# never switch this agent; the connection settings below are shared with common/bedrock.py on purpose
+# ---- ⚠️ Set UTILS_BEDROCK_REGION for your AWS setup ⚠️ ----
+UTILS_BEDROCK_REGION = os.environ.get("UTILS_BEDROCK_REGION", "us-west-2")
+UTILS_BEDROCK_MODEL_ID = os.environ.get("UTILS_BEDROCK_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "6"))
+BEDROCK_RETRY_MODE = os.environ.get("BEDROCK_RETRY_MODE", "adaptive")
+BEDROCK_CONNECT_TIMEOUT = float(os.environ.get("BEDROCK_CONNECT_TIMEOUT", "5"))
+BEDROCK_READ_TIMEOUT = float(os.environ.get("BEDROCK_READ_TIMEOUT", "120"))
+
+
+@functools.lru_cache(maxsize=None)
+def get_bedrock_client(service: str = "bedrock-runtime", region: str = None):
+    """Return one shared client per service and region, created on first use"""
+    config = Config(
+        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=BEDROCK_READ_TIMEOUT,
+        retries={"total_max_attempts": BEDROCK_MAX_ATTEMPTS, "mode": BEDROCK_RETRY_MODE},
+    )
+    return boto3.session.Session().client(service, region_name=region or UTILS_BEDROCK_REGION, config=config)
+
+
+# Travel guide store: a native FAISS index file, memory-mapped read-only, and an SQLite
+# docstore read by key, so startup no longer copies both pickles into every process
+TRAVEL_GUIDE_DIR = os.environ.get("TRAVEL_GUIDE_DIR", "data/travel_guide")
+TRAVEL_GUIDE_INDEX = "index.faiss"
+TRAVEL_GUIDE_DOCSTORE = "docstore.db"
+DOC_STORE_PICKLE = "data/section_doc_store.pkl"
+VECTOR_STORE_PICKLE = "data/section_vector_store.pkl"
+# travel_guide retrieval: "vector" (ParentDocumentRetriever over FAISS), "keyword" (BM25)
+# or "hybrid" (BM25 when the query appears verbatim in a document, else vector)
+TRAVEL_GUIDE_RETRIEVER = os.environ.get("TRAVEL_GUIDE_RETRIEVER", "hybrid")
+# Approximate tokens of guide text travel_guide returns per call; 0 returns whole sections
+TRAVEL_GUIDE_MAX_TOKENS = int(os.environ.get("TRAVEL_GUIDE_MAX_TOKENS", "300"))
+
+DOCSTORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parents (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL);
+-- FAISS position -> chunk id, per index generation (see index_file); meta.generation is live
+CREATE TABLE IF NOT EXISTS index_positions (
+    generation INTEGER NOT NULL, position INTEGER NOT NULL, id TEXT NOT NULL,
+    PRIMARY KEY (generation, position)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+-- Content hash of every ingested page, so re-ingesting unchanged files is a no-op
+CREATE TABLE IF NOT EXISTS ingested (
+    source TEXT NOT NULL, page INTEGER NOT NULL, hash TEXT NOT NULL, parent_id TEXT NOT NULL,
+    PRIMARY KEY (source, page)
+);
+-- BM25 keyword index over the parent documents, kept in sync by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS parents_fts USING fts5(
+    page_content, content='parents', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS parents_fts_insert AFTER INSERT ON parents BEGIN
+    INSERT INTO parents_fts (rowid, page_content) VALUES (new.rowid, new.page_content);
+END;
+CREATE TRIGGER IF NOT EXISTS parents_fts_delete AFTER DELETE ON parents BEGIN
+    INSERT INTO parents_fts (parents_fts, rowid, page_content) VALUES ('delete', old.rowid, old.page_content);
+END;
+CREATE TRIGGER IF NOT EXISTS parents_fts_update AFTER UPDATE ON parents BEGIN
+    INSERT INTO parents_fts (parents_fts, rowid, page_content) VALUES ('delete', old.rowid, old.page_content);
+    INSERT INTO parents_fts (rowid, page_content) VALUES (new.rowid, new.page_content);
+END;
+"""
+# Bumped when the schema gains something existing files must be migrated to
+DOCSTORE_VERSION = 2
+
+
+def _document(row) -> Document:
+    return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+
+def _row(doc: Document) -> tuple:
+    return (doc.page_content, json.dumps(doc.metadata))
+
+
+class DocumentDB:
+    """Thread-local connections to the travel guide docstore, reopened after a fork"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # INSERT OR REPLACE only fires the delete trigger with recursive triggers on
+            conn.execute("PRAGMA recursive_triggers=ON")
+            conn.executescript(DOCSTORE_SCHEMA)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < DOCSTORE_VERSION:
+                with conn:
+                    if version < 1:
+                        # Files exported before the keyword index existed
+                        conn.execute("INSERT INTO parents_fts (parents_fts) VALUES ('rebuild')")
+                    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'positions'").fetchone():
+                        # Unversioned positions from before index generations
+                        conn.execute("INSERT OR IGNORE INTO index_positions SELECT 0, position, id FROM positions")
+                        conn.execute("DROP TABLE positions")
+                    conn.execute(f"PRAGMA user_version={DOCSTORE_VERSION}")
+            local.conn = conn
+            local.pid = os.getpid()
+        return conn
+
+    def generation(self) -> int:
+        """Return the index generation readers should open"""
+        row = self.connection().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteDocStore(BaseStore[str, Document]):
+    """Parent documents for ParentDocumentRetriever, fetched by id on demand"""
+
+    def __init__(self, db: DocumentDB):
+        self.db = db
+
+    def mget(self, keys):
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            query = f"SELECT id, page_content, metadata FROM parents WHERE id IN ({','.join('?' * len(batch))})"
+            found.update((row[0], _document(row[1:])) for row in self.db.connection().execute(query, batch))
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs):
+        conn = self.db.connection()
+        with conn:
+            self.write(conn, key_value_pairs)
+
+    @staticmethod
+    def write(conn: sqlite3.Connection, key_value_pairs):
+        """Insert documents on ``conn`` without committing, so callers can group them with other writes"""
+        conn.executemany(
+            "INSERT OR REPLACE INTO parents VALUES (?, ?, ?)", [(key, *_row(doc)) for key, doc in key_value_pairs]
+        )
+
+    def mdelete(self, keys):
+        conn = self.db.connection()
+        with conn:
+            conn.executemany("DELETE FROM parents WHERE id = ?", [(key,) for key in keys])
+
+    def yield_keys(self, *, prefix=None):
+        if prefix is None:
+            rows = self.db.connection().execute("SELECT id FROM parents")
+        else:
+            rows = self.db.connection().execute("SELECT id FROM parents WHERE substr(id, 1, ?) = ?", (len(prefix), prefix))
+        for (key,) in rows:
+            yield key
+
+
+class SQLiteChunkStore(Docstore, AddableMixin):
+    """FAISS docstore for the embedded child chunks"""
+
+    def __init__(self, db: DocumentDB):
+        self.db = db
+
+    def search(self, search: str):
+        row = self.db.connection().execute("SELECT page_content, metadata FROM chunks WHERE id = ?", (search,)).fetchone()
+        return _document(row) if row else f"ID {search} not found."
+
+    def add(self, texts: dict):
+        conn = self.db.connection()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO chunks VALUES (?, ?, ?)", [(key, *_row(doc)) for key, doc in texts.items()])
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Tried to add ids that already exist: {e}") from e
+
+    def delete(self, ids: list):
+        conn = self.db.connection()
+        with conn:
+            conn.executemany("DELETE FROM chunks WHERE id = ?", [(key,) for key in ids])
+
+
+class SQLiteIndexToId(MutableMapping):
+    """FAISS ``index_to_docstore_id`` for one index generation, kept in SQLite instead of a dict built at load time"""
+
+    def __init__(self, db: DocumentDB, generation: int = 0):
+        self.db = db
+        self.generation = generation
+
+    def __getitem__(self, position):
+        row = self.db.connection().execute(
+            "SELECT id FROM index_positions WHERE generation = ? AND position = ?", (self.generation, int(position))
+        ).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __setitem__(self, position, id_):
+        self.update({position: id_})
+
+    def __delitem__(self, position):
+        conn = self.db.connection()
+        with conn:
+            deleted = conn.execute(
+                "DELETE FROM index_positions WHERE generation = ? AND position = ?", (self.generation, int(position))
+            ).rowcount
+        if deleted == 0:
+            raise KeyError(position)
+
+    def __iter__(self):
+        rows = self.db.connection().execute(
+            "SELECT position FROM index_positions WHERE generation = ? ORDER BY position", (self.generation,)
+        )
+        for (position,) in rows:
+            yield position
+
+    def __len__(self):
+        return self.db.connection().execute(
+            "SELECT COUNT(*) FROM index_positions WHERE generation = ?", (self.generation,)
+        ).fetchone()[0]
+
+    def update(self, other=(), **kwargs):
+        items = dict(other, **kwargs).items()
+        conn = self.db.connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO index_positions VALUES (?, ?, ?)",
+                [(self.generation, int(p), i) for p, i in items],
+            )
+
+
+class KeywordRetriever(BaseRetriever):
+    """BM25 search over the parent documents with the docstore's SQLite FTS5 index.
+
+    By default any query term may match; ``phrase=True`` only returns documents
+    containing the whole normalized query as a phrase. Pages replaced by a later
+    ingest are skipped while their old version is kept for the previous index
+    generation.
+    """
+
+    db: DocumentDB
+    k: int = 1
+    phrase: bool = False
+
+    def search(self, query: str, k: int = None, phrase: bool = None) -> list[tuple[Document, float]]:
+        """Return up to ``k`` (document, BM25 score) pairs, best first"""
+        terms = re.findall(r"\w+", normalize_query(query))
+        if not terms:
+            return []
+        if self.phrase if phrase is None else phrase:
+            match = '"' + " ".join(terms) + '"'
+        else:
+            match = " OR ".join(f'"{term}"' for term in terms)
+        rows = self.db.connection().execute(
+            "SELECT p.page_content, p.metadata, bm25(parents_fts) FROM parents_fts"
+            " JOIN parents p ON p.rowid = parents_fts.rowid"
+            " WHERE parents_fts MATCH ? AND NOT EXISTS ("
+            "  SELECT 1 FROM ingested i WHERE i.source = json_extract(p.metadata, '$.source')"
+            "  AND i.page = json_extract(p.metadata, '$.page') AND i.parent_id != p.id"
+            " ) ORDER BY bm25(parents_fts) LIMIT ?",
+            (match, k or self.k),
+        )
+        # FTS5's bm25() is negated so that ascending order ranks best first
+        return [(_document(row[:2]), -row[2]) for row in rows]
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> list[Document]:
+        return [doc for doc, _ in self.search(query)]
+
+
+class HybridRetriever(BaseRetriever):
+    """Answers from the keyword index when the query appears verbatim, else from ``vector``"""
+
+    keyword: KeywordRetriever
+    vector: BaseRetriever
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> list[Document]:
+        hits = self.keyword.search(query, phrase=True)
+        if hits:
+            return [doc for doc, _ in hits]
+        return self.vector.invoke(query, {"callbacks": run_manager.get_child()})
+
+
+def split_passages(text: str) -> list[str]:
+    """Split a guide section into sentences, rejoining the lines PDF extraction wrapped"""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        passages.extend(p for p in re.split(r"(?<!\bSt\.)(?<!\bMt\.)(?<=[.!?])\s+(?=[A-Z0-9\"'(])", paragraph) if p)
+    return passages
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class PassageRetriever(BaseRetriever):
+    """Cuts ``retriever``'s documents down to the passages that best match the query.
+
+    Sentences are ranked by BM25 against the query, computed over the retrieved
+    sentences only, and the best ones are kept in document order until ``max_tokens``
+    is spent. Without any matching term the leading sentences are kept.
+    """
+
+    retriever: BaseRetriever
+    max_tokens: int = TRAVEL_GUIDE_MAX_TOKENS
+    k1: float = 1.2
+    b: float = 0.75
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> list[Document]:
+        docs = self.retriever.invoke(query, {"callbacks": run_manager.get_child()})
+        if self.max_tokens <= 0:
+            return docs
+        passages = [(i, p) for i, doc in enumerate(docs) for p in split_passages(doc.page_content)]
+        if not passages:
+            return docs
+
+        terms = set(re.findall(r"\w+", normalize_query(query)))
+        words = [Counter(re.findall(r"\w+", normalize_query(p))) for _, p in passages]
+        lengths = [sum(w.values()) for w in words]
+        avg_length = sum(lengths) / len(lengths) or 1.0
+        idf = {}
+        for term in terms:
+            df = sum(1 for w in words if term in w)
+            idf[term] = np.log(1 + (len(passages) - df + 0.5) / (df + 0.5))
+        scores = []
+        for w, length in zip(words, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores.append(sum(idf[t] * w[t] * (self.k1 + 1) / (w[t] + norm) for t in terms if t in w))
+
+        # Best first; ties keep document order, so no match at all keeps the opening sentences
+        kept, spent = set(), 0
+        for n in sorted(range(len(passages)), key=lambda n: (-scores[n], n)):
+            cost = estimate_tokens(passages[n][1])
+            if spent + cost <= self.max_tokens:
+                kept.add(n)
+                spent += cost
+        if not kept:
+            # The best sentence alone is over budget
+            n = max(range(len(passages)), key=lambda n: (scores[n], -n))
+            passages[n] = (passages[n][0], passages[n][1][: self.max_tokens * 4])
+            kept.add(n)
+
+        trimmed = []
+        for i, doc in enumerate(docs):
+            text = "\n".join(p for n, (j, p) in enumerate(passages) if j == i and n in kept)
+            if text:
+                trimmed.append(Document(page_content=text, metadata=doc.metadata))
+        return trimmed
+
+
+def index_file(directory: str, generation: int) -> str:
+    """Return the FAISS index path of ``generation``.
+
+    Ingestion that renumbers vectors writes a new generation next to the live one
+    and switches ``meta.generation`` in the same transaction as its positions, so
+    readers always pair an index file with the positions written for it.
+    """
+    return os.path.join(directory, TRAVEL_GUIDE_INDEX if generation == 0 else f"index.{generation}.faiss")
+
+
+def travel_guide_exists(directory: str = TRAVEL_GUIDE_DIR) -> bool:
+    return os.path.exists(os.path.join(directory, TRAVEL_GUIDE_DOCSTORE))
+
+
+def export_travel_guide(
+    vector_store_file: str = VECTOR_STORE_PICKLE,
+    doc_store_file: str = DOC_STORE_PICKLE,
+    directory: str = TRAVEL_GUIDE_DIR,
+):
+    """Convert the pickled FAISS store and parent docstore into the files load_travel_guide opens"""
+    with open(vector_store_file, "rb") as f:
+        vector_db = FAISS.deserialize_from_bytes(
+            serialized=pickle.load(f), embeddings=None, allow_dangerous_deserialization=True
+        )
+    with open(doc_store_file, "rb") as f:
+        store = pickle.load(f)
+
+    os.makedirs(directory, exist_ok=True)
+    index_path = index_file(directory, 0)
+    db_path = os.path.join(directory, TRAVEL_GUIDE_DOCSTORE)
+    # Write next to the targets and rename, so a concurrent reader never sees half a store
+    suffix = f".{os.getpid()}.tmp"
+    if os.path.exists(db_path + suffix):
+        os.remove(db_path + suffix)
+    db = DocumentDB(db_path + suffix)
+    keys = list(store.yield_keys())
+    SQLiteDocStore(db).mset(zip(keys, store.mget(keys)))
+    ids = vector_db.index_to_docstore_id
+    SQLiteChunkStore(db).add({id_: vector_db.docstore.search(id_) for id_ in ids.values()})
+    SQLiteIndexToId(db).update(ids)
+    db.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close()
+    dependable_faiss_import().write_index(vector_db.index, index_path + suffix)
+    # Index first: a docstore on disk means a complete store (travel_guide_exists)
+    os.replace(index_path + suffix, index_path)
+    os.replace(db_path + suffix, db_path)
+
+
+def load_travel_guide(embeddings, directory: str = TRAVEL_GUIDE_DIR, writable: bool = False):
+    """Open the exported travel guide, returning the FAISS vector store and the parent docstore.
+
+    The index is memory-mapped read-only, so forked workers share its pages, and
+    documents are read from SQLite by id, so startup time does not grow with the corpus.
+    ``writable=True`` reads the index into memory instead so vectors can be added.
+    """
+    faiss = dependable_faiss_import()
+    # IO_FLAG_MMAP_IFC maps flat indexes too; older faiss only maps inverted lists
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    flags = 0 if writable else mmap_flag | faiss.IO_FLAG_READ_ONLY
+    db = DocumentDB(os.path.join(directory, TRAVEL_GUIDE_DOCSTORE))
+    generation = db.generation()
+    index = faiss.read_index(index_file(directory, generation), flags)
+    vector_db = FAISS(embeddings, index, SQLiteChunkStore(db), SQLiteIndexToId(db, generation))
+    return vector_db, SQLiteDocStore(db)
+
+
+# Query embedding cache: agents keep searching the same city names, so travel_guide
+# lookups reuse earlier vectors instead of calling Titan again
+QUERY_EMBEDDING_CACHE_DIR = os.environ.get("QUERY_EMBEDDING_CACHE_DIR", TRAVEL_GUIDE_DIR)
+QUERY_EMBEDDING_CACHE_ENTRIES = int(os.environ.get("QUERY_EMBEDDING_CACHE_ENTRIES", "4096"))
+EMBEDDING_FILE_MAGIC = b"QEMB0001"
+EMBEDDING_FILE_HEADER = len(EMBEDDING_FILE_MAGIC) + 4
+
+
+def normalize_query(text: str) -> str:
+    """Unicode-normalize, casefold and collapse whitespace, so trivially different queries share a vector"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class QueryEmbeddingCache(Embeddings):
+    """Caches ``embed_query`` results of ``embeddings``.
+
+    Vectors are kept in an in-memory LRU and appended to ``path``, a file of
+    (sha256 of the normalized query, float32 vector) records that is memory-mapped
+    on startup. Concurrent calls for the same query wait for a single request.
+    A miss embeds the text as given, so queries that normalize alike share the
+    vector of the first spelling seen. Documents are passed through uncached.
+
+    Processes may share ``path``: appends hold an exclusive ``flock``, and a
+    record whose key does not match the one looked up counts as a miss.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: str, max_entries: int = QUERY_EMBEDDING_CACHE_ENTRIES):
+        self.embeddings = embeddings
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._memory = OrderedDict()
+        self._rows = {}
+        self._records = None
+        self._dtype = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(EMBEDDING_FILE_HEADER)
+        except FileNotFoundError:
+            return
+        if len(header) < EMBEDDING_FILE_HEADER or not header.startswith(EMBEDDING_FILE_MAGIC):
+            return
+        self._dtype = np.dtype([("key", "u1", 32), ("vector", "<f4", int.from_bytes(header[-4:], "little"))])
+        self._map()
+        self._rows = {key.tobytes(): row for row, key in enumerate(self._records["key"])}
+
+    def _map(self):
+        # A crash mid-append can leave a partial record at the end; it is ignored
+        count = (os.path.getsize(self.path) - EMBEDDING_FILE_HEADER) // self._dtype.itemsize
+        self._records = np.memmap(self.path, dtype=self._dtype, mode="r", offset=EMBEDDING_FILE_HEADER, shape=(count,))
+
+    def _append(self, digest: bytes, vector: list):
+        try:
+            dtype = self._dtype or np.dtype([("key", "u1", 32), ("vector", "<f4", len(vector))])
+            record = np.zeros(1, dtype=dtype)
+            record["key"] = np.frombuffer(digest, dtype="u1")
+            record["vector"] = vector
+            header = EMBEDDING_FILE_MAGIC + dtype["vector"].shape[0].to_bytes(4, "little")
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a+b") as f:
+                # Forked workers share the file: the header check, offset and write must not interleave
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                existing = f.read(EMBEDDING_FILE_HEADER)
+                if not existing:
+                    f.write(header)
+                elif existing != header:
+                    return
+                end = f.seek(0, os.SEEK_END)
+                row, partial = divmod(end - EMBEDDING_FILE_HEADER, dtype.itemsize)
+                if partial:
+                    # Drop the torn record a crashed writer left behind
+                    f.truncate(end - partial)
+                f.write(record.tobytes())
+            self._dtype = dtype
+            self._rows[digest] = row
+        except (OSError, ValueError):
+            # A read-only or mismatched file only costs persistence
+            pass
+
+    def _read(self, digest: bytes, row: int) -> list | None:
+        if self._records is None or row >= len(self._records):
+            self._map()
+        if row >= len(self._records) or self._records["key"][row].tobytes() != digest:
+            return None
+        return self._records["vector"][row].tolist()
+
+    def _remember(self, digest: bytes, vector: list):
+        self._memory[digest] = vector
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def embed_query(self, text: str) -> list[float]:
+        digest = hashlib.sha256(normalize_query(text).encode()).digest()
+        with self._lock:
+            vector = self._memory.get(digest)
+            if vector is not None:
+                self._memory.move_to_end(digest)
+                self.memory_hits += 1
+                return vector
+            row = self._rows.get(digest)
+            vector = self._read(digest, row) if row is not None else None
+            if vector is not None:
+                self._remember(digest, vector)
+                self.disk_hits += 1
+                return vector
+            future = self._inflight.get(digest)
+            waiting = future is not None
+            if waiting:
+                self.coalesced += 1
+            else:
+                future = self._inflight[digest] = Future()
+                self.misses += 1
+        if waiting:
+            return future.result()
+        try:
+            # Only the key is normalized; the model sees the query as it was written
+            vector = self.embeddings.embed_query(text)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[digest]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._remember(digest, vector)
+            self._append(digest, vector)
+            del self._inflight[digest]
+        future.set_result(vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> dict:
+        """Return hit counts per tier and the number of persisted vectors"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses + self.coalesced
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._rows),
+            }
+
+
+@functools.lru_cache(maxsize=None)
+def get_embeddings_model(model_id: str = "amazon.titan-embed-text-v1"):
+    """Return the Bedrock embeddings model behind one process-wide query cache file per model"""
+    name = re.sub(r"[^\w.-]", "_", model_id)
+    path = os.path.join(QUERY_EMBEDDING_CACHE_DIR, f"query_embeddings.{name}.f32")
+    return QueryEmbeddingCache(BedrockEmbeddings(client=get_bedrock_client(), model_id=model_id), path)
+
+
+# create_agent builds the models, the travel guide store and the tools once per process
+# and the ReAct graph once per (enable_memory, cache); invalidate() drops them all
+@functools.lru_cache(maxsize=None)
+def _chat_model(cache=None):
+    return ChatBedrockConverse(
+        model=UTILS_BEDROCK_MODEL_ID,
         temperature=0,
         max_tokens=None,
-        client=bedrock_client,
+        client=get_bedrock_client(),
+        bedrock_client=get_bedrock_client("bedrock"),
+        # Optional langchain BaseCache, e.g. the studio's common.llm_cache.get_llm_cache("utils")
+        cache=cache,
         # other params...
     )
-    
-    def read_travel_data(file_path: str = "data/synthetic_travel_data.csv") -> pd.DataFrame:
-        """Read travel data from CSV file"""
-        try:
-            df = pd.read_csv(file_path)
-            return df
-        except FileNotFoundError:
-            return pd.DataFrame(
-                columns=["Id", "Name","Current_Location","Age","Past_Travel_Destinations", "Number_of_Trips", "Flight_Number", "Departure_City","Arrival_City","Flight_Date",]
-            )
-    
-    
+
+
+def make_child_splitter():
+    """The splitter the travel guide's FAISS chunks were made with; ingestion must use the same one"""
+    return RecursiveCharacterTextSplitter(
+        separators=["\n", "\n\n"], chunk_size=2000, chunk_overlap=250
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_travel_guide_retriever(mode: str = TRAVEL_GUIDE_RETRIEVER):
+    """Return the travel_guide retriever for ``mode``: "vector", "keyword" or "hybrid" """
+    if mode not in ("vector", "keyword", "hybrid"):
+        raise ValueError(f"Unknown travel guide retriever {mode!r}")
+
+    # Not dropped by invalidate(): query vectors don't depend on the travel guide files
+    embeddings_model = get_embeddings_model("amazon.titan-embed-text-v1")
+
+    if not travel_guide_exists():
+        # First run: convert the bundled pickles once
+        export_travel_guide()
+    vector_db, store = load_travel_guide(embeddings_model)
+    keyword = KeywordRetriever(db=store.db, k=1)
+    if mode == "keyword":
+        return keyword
+
+    retriever = ParentDocumentRetriever(
+        vectorstore=vector_db,
+        docstore=store,
+        child_splitter=make_child_splitter(),
+        search_kwargs={"k":1}
+    )
+    if mode == "hybrid":
+        return HybridRetriever(keyword=keyword, vector=retriever)
+    return retriever
+
+
+@functools.lru_cache(maxsize=1)
+def _travel_tools():
     @tool
     def compare_and_recommend_destination(config: RunnableConfig) -> str:
         """This tool is used to check which destinations user has already traveled.
@@ -117,34 +774,9 @@ def create_agent(enable_memory = False):
         return f"Based on your current location ({current_location}), age ({age}), and past travel data, we recommend visiting {recommended_destination}."
     
     
-    embeddings_model = BedrockEmbeddings(
-        client=bedrock_client, model_id="amazon.titan-embed-text-v1"
-    )
-    
-    child_splitter = RecursiveCharacterTextSplitter(
-        separators=["\n", "\n\n"], chunk_size=2000, chunk_overlap=250
-    )
-    
-    in_memory_store_file = "data/section_doc_store.pkl"
-    vector_store_file = "data/section_vector_store.pkl"
-    
-    store = pickle.load(open(in_memory_store_file, "rb"))
-    vector_db_buff = BytesIO(pickle.load(open(vector_store_file, "rb")))
-    vector_db = FAISS.deserialize_from_bytes(
-        serialized=vector_db_buff.read(),
-        embeddings=embeddings_model,
-        allow_dangerous_deserialization=True,
-    )
-
-    retriever = ParentDocumentRetriever(
-        vectorstore=vector_db,
-        docstore=store,
-        child_splitter=child_splitter,
-        search_kwargs={"k":1}
-    )    
-    
+    # Only the passages matching the query go back into the agent's context
     retriever_tool = create_retriever_tool(
-        retriever,
+        PassageRetriever(retriever=get_travel_guide_retriever()),
         "travel_guide",
         """Holds information from travel guide books containing city details to find information matching the user's interests in various cities. Only search based on the keyword mentioned in user input.
 
@@ -156,14 +788,30 @@ def create_agent(enable_memory = False):
         """,
     )
     
-    tools = [compare_and_recommend_destination, retriever_tool]
+    return (compare_and_recommend_destination, retriever_tool)
+
 
+@functools.lru_cache(maxsize=None)
+def _compiled_agent(enable_memory, cache):
+    checkpointer = MemorySaver() if enable_memory else None
+    return create_react_agent(_chat_model(cache), list(_travel_tools()), checkpointer=checkpointer)
+
+
+def create_agent(enable_memory = False, cache = None):
+    """Return the Lab 3 ReAct agent, reusing the compiled graph from earlier calls"""
+    agent = _compiled_agent(bool(enable_memory), cache)
     if enable_memory:
+        # Each caller still gets a conversation memory of its own
+        return agent.copy(update={"checkpointer": MemorySaver()})
+    return agent
 
-        memory = MemorySaver()
-        agent = create_react_agent(llm, tools, checkpointer = memory)
 
-    else:
-        agent = create_react_agent(llm, tools)
-    
-    return agent
\ No newline at end of file
+def invalidate():
+    """Forget the cached models, travel guide store, tools and agents.
+
+    Call after the files under TRAVEL_GUIDE_DIR change; the next create_agent() reloads them.
+    """
+    _compiled_agent.cache_clear()
+    _travel_tools.cache_clear()
+    get_travel_guide_retriever.cache_clear()
+    _chat_model.cache_clear()